@@ -0,0 +1,5 @@
+"""Synthetic-workload benchmarks; run with ``python -m benchmarks``."""
+from benchmarks.suite import compare, run_suite
+from benchmarks.workload import make_project, make_workload
+
+__all__ = ["compare", "make_project", "make_workload", "run_suite"]
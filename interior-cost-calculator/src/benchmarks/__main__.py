@@ -0,0 +1,87 @@
+"""Benchmark the storage, catalog and costing hot paths.
+
+Run from src/:
+
+    python -m benchmarks --users 20 --projects 25 -o run.json
+    python -m benchmarks --baseline baseline.bench.json --threshold 0.3
+
+Results are written as JSON. With --baseline the run is compared per op
+against an earlier result file and the exit status is 1 if anything got
+slower than the threshold allows. Baselines are machine specific; keep
+them out of the repository.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from data.material_costs import get_catalog
+from benchmarks.suite import BACKENDS, DEFAULT_THRESHOLD, compare, run_suite
+from benchmarks.workload import make_workload
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark the calculator's hot paths.")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--projects", type=int, default=10, help="projects per user")
+    parser.add_argument("--bedrooms", type=int, default=3)
+    parser.add_argument("--elements", type=int, default=3, help="elements per room")
+    parser.add_argument("--bunk-sections", type=int, default=2, help="sections per Bunk Bed (0-3)")
+    parser.add_argument("--materials", type=int, default=4, help="distinct board/laminate choices per project")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark; the fastest counts")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="comma-separated store backends")
+    parser.add_argument("--compile-workbook", action="store_true", help="also time parsing materials_cost.xlsx")
+    parser.add_argument("-o", "--output", help="write the results here instead of stdout")
+    parser.add_argument("--baseline", help="result file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown per op as a fraction (default %(default)s)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    params = {
+        "users": args.users, "projects": args.projects, "bedrooms": args.bedrooms,
+        "elements_per_room": args.elements, "bunk_sections": args.bunk_sections,
+        "materials": args.materials, "seed": args.seed, "repeat": args.repeat,
+    }
+    catalog = get_catalog()
+    workload = make_workload(
+        catalog, args.users, args.projects, args.seed, bedrooms=args.bedrooms,
+        elements_per_room=args.elements, bunk_sections=args.bunk_sections, materials=args.materials,
+    )
+    backends = [backend.strip() for backend in args.backends.split(",") if backend.strip()]
+    results = run_suite(workload, catalog, args.repeat, backends, args.compile_workbook)
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": params,
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("params") != params:
+        print("warning: baseline was run with different parameters", file=sys.stderr)
+    regressed = False
+    print(f"{'benchmark':<28}{'baseline ms':>14}{'current ms':>14}{'ratio':>8}", file=sys.stderr)
+    for name, before, after, ratio, slower in compare(results, baseline.get("results", {}), args.threshold):
+        flag = "  REGRESSION" if slower else ""
+        print(f"{name:<28}{before:>14.4f}{after:>14.4f}{ratio:>8.2f}{flag}", file=sys.stderr)
+        regressed = regressed or slower
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
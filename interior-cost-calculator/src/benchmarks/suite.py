@@ -0,0 +1,146 @@
+import copy
+import os
+import shutil
+import tempfile
+import time
+import pandas as pd
+from data import material_costs
+from data.material_costs import MaterialCatalog
+from quoting import ELEMENT_COLUMNS, quote
+from utils import cutlist
+from utils.cost_engine import element_table, compute
+from utils.project_model import ProjectModel
+from utils.storage import JsonProjectStore, SQLiteProjectStore
+
+BACKENDS = ("json", "sqlite")
+# A benchmark regresses when it is this much slower than the baseline.
+DEFAULT_THRESHOLD = 0.25
+
+
+def _best(run, repeat):
+    """Fastest of ``repeat`` runs, in seconds; ``run`` returns its own timing."""
+    return min(run() for _ in range(repeat))
+
+
+def _time_each(fn, items):
+    def run():
+        started = time.perf_counter()
+        for item in items:
+            fn(item)
+        return time.perf_counter() - started
+    return run
+
+
+def _open(backend, root):
+    missing = os.path.join(root, "no-legacy.json")
+    if backend == "sqlite":
+        return SQLiteProjectStore(os.path.join(root, "projects.sqlite3"), legacy_path=missing)
+    return JsonProjectStore(os.path.join(root, "projects"), legacy_path=missing)
+
+
+def _store_benchmarks(backend, workload, repeat, record):
+    users = sorted({username for username, _, _ in workload})
+    keys = [(username, project_name) for username, project_name, _ in workload]
+    root = tempfile.mkdtemp(prefix=f"bench-{backend}-")
+    try:
+        def save():
+            # A fresh store each run, so every save creates its project.
+            shutil.rmtree(root)
+            os.makedirs(root)
+            store = _open(backend, root)
+            documents = [(u, p, copy.deepcopy(d)) for u, p, d in workload]
+            try:
+                started = time.perf_counter()
+                for username, project_name, project_data in documents:
+                    store.save_project(username, project_name, project_data)
+                return time.perf_counter() - started
+            finally:
+                store.close()
+        record(f"store_{backend}_save", len(workload), _best(save, repeat))
+
+        def load_cold():
+            # A newly opened store has nothing cached yet.
+            store = _open(backend, root)
+            try:
+                return _time_each(lambda key: store.load_project(*key), keys)()
+            finally:
+                store.close()
+        record(f"store_{backend}_load_cold", len(keys), _best(load_cold, repeat))
+
+        store = _open(backend, root)
+        try:
+            load_warm = _time_each(lambda key: store.load_project(*key), keys)
+            load_warm()
+            record(f"store_{backend}_load_warm", len(keys), _best(load_warm, repeat))
+            record(f"store_{backend}_list", len(users), _best(_time_each(store.list_projects, users), repeat))
+        finally:
+            store.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def _summary_frame(result):
+    # What the summary page builds before rendering: the element table
+    # and its room-wise sums.
+    df = pd.DataFrame(result["elements"], columns=ELEMENT_COLUMNS)
+    return df.groupby("Room", as_index=False).sum(numeric_only=True)
+
+
+def run_suite(workload, catalog, repeat=3, backends=BACKENDS, compile_workbook=False):
+    """Time the storage, catalog and costing hot paths on ``workload``.
+
+    Returns {benchmark: {"ops", "seconds", "per_op_ms"}}, where seconds is
+    the best of ``repeat`` runs over all ops. Parsing the workbook with
+    openpyxl is slow and only timed with ``compile_workbook``.
+    """
+    results = {}
+
+    def record(name, ops, seconds):
+        results[name] = {"ops": ops, "seconds": seconds, "per_op_ms": seconds * 1000 / max(ops, 1)}
+
+    if compile_workbook:
+        record("catalog_compile", 1, _best(_time_each(lambda _: material_costs._compile_workbook(), [None]), repeat))
+
+    def catalog_load(_):
+        cache = material_costs._load_compiled()
+        MaterialCatalog(cache["sheets"], cache["sha256"]).option_index
+    record("catalog_load", 1, _best(_time_each(catalog_load, [None]), repeat))
+
+    for backend in backends:
+        _store_benchmarks(backend, workload, repeat, record)
+
+    documents = [project_data for _, _, project_data in workload]
+    record("project_model", len(documents), _best(_time_each(ProjectModel.from_dict, documents), repeat))
+    models = [ProjectModel.from_dict(project_data) for project_data in documents]
+    record("cost_compute", len(models),
+           _best(_time_each(lambda model: compute(element_table(model), stored_areas=True), models), repeat))
+
+    def cut_list():
+        # Cold: repeated panel sets would otherwise come from the cache.
+        cutlist._pack.cache_clear()
+        return _time_each(cutlist.plan_project, models)()
+    record("cut_list", len(models), _best(cut_list, repeat))
+    record("quote", len(documents), _best(_time_each(quote, documents), repeat))
+    record("quote_reprice", len(documents),
+           _best(_time_each(lambda project_data: quote(project_data, catalog), documents), repeat))
+    quotes = [quote(project_data) for project_data in documents]
+    record("summary_dataframe", len(quotes), _best(_time_each(_summary_frame, quotes), repeat))
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Per-op times against a baseline run.
+
+    Returns [(benchmark, baseline ms, current ms, ratio, regressed)] for
+    the benchmarks both runs have; ``regressed`` is set when the current
+    run is more than ``threshold`` (a fraction) slower per op.
+    """
+    rows = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        before, after = previous["per_op_ms"], current["per_op_ms"]
+        ratio = after / before if before else float("inf")
+        rows.append((name, before, after, ratio, ratio > 1 + threshold))
+    return rows
@@ -0,0 +1,121 @@
+import random
+from numpy import ceil
+from data.option_index import NO_OPTION
+from utils.calculations import shutter_area, side_area, top_bottom_area, back_panel_area, shelf_area
+
+# Room and element names as the project input page offers them.
+BEDROOM_NAMES = ["Master Bedroom", "Kids Bedroom", "Guest Bedroom"]
+OTHER_ROOMS = {
+    "Kitchen": ["Kitchen Lower", "Kitchen Upper", "Kitchen Side", "Loft"],
+    "Living": ["TV Unit", "Pooja Unit"],
+    "Dining": ["Crockery"],
+}
+BEDROOM_ELEMENTS = ["Wardrobe", "Dresser", "Loft", "TV Unit", "Bunk Bed", "Bed", "Pooja Unit"]
+BUNK_SECTIONS = ["Bunk bed Lower", "Bunk bed Upper", "Bunk Bed Extra"]
+BOARD_TYPES = ("Plywood", "HDHMR", "MDF")
+AREA_KEYS = ("shutter_area", "side_area", "top_bottom_area", "back_panel_area", "shelf_area")
+
+
+def room_names(bedrooms):
+    """Room names of a house with ``bedrooms`` bedrooms, as page 01 names them."""
+    rooms = BEDROOM_NAMES[:bedrooms]
+    rooms += [f"Other Bedroom {i - 3}" for i in range(4, bedrooms + 1)]
+    return rooms + list(OTHER_ROOMS)
+
+
+def _dims(rng):
+    return {
+        "length": rng.choice([1, 2, 3, 4, 5, 6.25, 8]),
+        "width": rng.choice([1, 1.5, 2]),
+        "height": rng.choice([0, 2, 3.5, 7]),
+        "num_shelves": rng.randint(0, 6),
+    }
+
+
+def _areas(dims):
+    # Same formulas and rounding as "Calculate & Save" on page 01.
+    h, l, w, n = dims["height"], dims["length"], dims["width"], dims["num_shelves"]
+    areas = dict(zip(AREA_KEYS, (
+        shutter_area(h, l), side_area(w, h), top_bottom_area(l, w), back_panel_area(h, l), shelf_area(n, w, l),
+    )))
+    areas["total_area"] = float(ceil(sum(areas.values())))
+    return areas
+
+
+def board_choices(catalog, board_types=BOARD_TYPES):
+    """Every full board selection in the catalog, as page 02 saves them."""
+    index = catalog.option_index
+    choices = []
+
+    def walk(mat_type, picked):
+        if len(picked) == 4:
+            rate = index.price(mat_type, *picked)
+            if rate is not None:
+                grade, brand, model, thickness = picked
+                choices.append({"type": mat_type, "grade": grade, "brand": brand,
+                                "model": model, "thickness": thickness, "rate": rate})
+            return
+        for option in index.options(mat_type, *picked) or (NO_OPTION,):
+            walk(mat_type, picked + (option,))
+
+    for mat_type in board_types:
+        walk(mat_type, ())
+    return choices
+
+
+def laminate_choices(catalog):
+    return [
+        {"type": lam_type, "thickness": thickness, "rate": rate}
+        for lam_type, thicknesses in catalog.laminate["Laminate"].items()
+        for thickness, rate in thicknesses.items()
+    ]
+
+
+def make_project(rng, boards, laminates, bedrooms=3, elements_per_room=3, bunk_sections=2, materials=4):
+    """One synthetic project document in the shape the pages save.
+
+    Every room gets up to ``elements_per_room`` elements, a Bunk Bed gets
+    ``bunk_sections`` sections, and selections are drawn from a mix of
+    ``materials`` distinct board/laminate choices.
+    """
+    boards = rng.sample(boards, min(materials, len(boards)))
+    laminates = rng.sample(laminates, min(materials, len(laminates)))
+    rooms, area_details, element_materials = {}, {}, {}
+    for room in room_names(bedrooms):
+        options = OTHER_ROOMS.get(room, BEDROOM_ELEMENTS)
+        rooms[room], area_details[room] = {}, {}
+        for element in rng.sample(options, min(elements_per_room, len(options))):
+            if element == "Bunk Bed":
+                sections = {section: _dims(rng) for section in BUNK_SECTIONS[:bunk_sections]}
+                rooms[room][element] = sections
+                area_details[room][element] = {section: _areas(dims) for section, dims in sections.items()}
+                keys = [f"{room}|{element}|{section}" for section in sections]
+            else:
+                dims = rooms[room][element] = _dims(rng)
+                area_details[room][element] = _areas(dims)
+                keys = [f"{room}|{element}"]
+            for key in keys:
+                element_materials[key] = {
+                    "shutter": dict(rng.choice(boards)),
+                    "carcus": dict(rng.choice(boards)),
+                    "laminate": dict(rng.choice(laminates)),
+                }
+    return {
+        "rooms": rooms,
+        "house_type": "Apartment Flat",
+        "num_bedrooms": bedrooms,
+        "area_details": area_details,
+        "element_materials": element_materials,
+        "last_modified": "2024-01-01 00:00:00",
+    }
+
+
+def make_workload(catalog, users=10, projects=10, seed=0, **project_options):
+    """[(username, project_name, project_data)] for ``users`` x ``projects``."""
+    rng = random.Random(seed)
+    boards, laminates = board_choices(catalog), laminate_choices(catalog)
+    return [
+        (f"user{u:03d}", f"project{p:03d}", make_project(rng, boards, laminates, **project_options))
+        for u in range(users)
+        for p in range(projects)
+    ]
@@ -1,15 +1,18 @@
-
-import pandas as pd
 import os
+import pickle
+import threading
+from functools import cached_property
+from data.option_index import OptionIndex
+from utils.fileio import atomic_write, file_sha256
+from utils.metrics import timed
 
 # Get the absolute path to the repo root
 base_dir = os.path.dirname(os.path.abspath(__file__))
 excel_path = os.path.join(base_dir, 'materials_cost.xlsx')
-
-material_costs = pd.read_excel(excel_path, sheet_name='Plywood', engine='openpyxl')
-material_costs_hdmr_mdf = pd.read_excel(excel_path, sheet_name='HDMR', engine='openpyxl')
-material_costs_hdmr = material_costs_hdmr_mdf[material_costs_hdmr_mdf['Grade'] == 'HDHMR']
-material_costs_mdf = material_costs_hdmr_mdf[material_costs_hdmr_mdf['Grade'] == 'MDF'].reset_index(drop=True)
+# Parsed copy of the workbook; rebuilt whenever the spreadsheet changes.
+cache_path = os.path.join(base_dir, '.materials_cost.cache.pkl')
+CACHE_FORMAT = 1
+SHEETS = ('Plywood', 'HDMR')
 
 laminate={"Laminate": {
         "Standard": {
@@ -22,3 +25,150 @@ laminate={"Laminate": {
             "1.25mm (Avg Price)": 116
         }
     }}
+
+
+def _read_cache(stat):
+    """Return the cache if it was compiled from this workbook."""
+    try:
+        with open(cache_path, 'rb') as f:
+            cache = pickle.load(f)
+    except Exception:
+        return None
+    if not isinstance(cache, dict) or cache.get('format') != CACHE_FORMAT:
+        return None
+    if cache.get('stamp') == (stat.st_mtime_ns, stat.st_size):
+        return cache
+    # Touched but maybe not edited: fall back to comparing contents.
+    if cache.get('sha256') == file_sha256(excel_path):
+        return _write_cache(cache['sheets'], stat, cache['sha256'])
+    return None
+
+
+def _write_cache(sheets, stat, sha256):
+    cache = {
+        'format': CACHE_FORMAT,
+        'stamp': (stat.st_mtime_ns, stat.st_size),
+        'sha256': sha256,
+        'sheets': sheets,
+    }
+    try:
+        with atomic_write(cache_path, 'wb') as f:
+            pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        # A read-only deployment just keeps parsing the workbook.
+        pass
+    return cache
+
+
+def _compile_workbook():
+    """Parse every sheet once with openpyxl into plain column lists."""
+    import pandas as pd
+    frames = pd.read_excel(excel_path, sheet_name=list(SHEETS), engine='openpyxl')
+    return {
+        name: {'columns': list(df.columns), 'data': {col: df[col].tolist() for col in df.columns}}
+        for name, df in frames.items()
+    }
+
+
+@timed("catalog_load")
+def _load_compiled():
+    stat = os.stat(excel_path)
+    cache = _read_cache(stat)
+    if cache is None:
+        cache = _write_cache(_compile_workbook(), stat, file_sha256(excel_path))
+    return cache
+
+
+class MaterialCatalog:
+    """Price tables of one version of materials_cost.xlsx.
+
+    Holds the compiled sheets as plain columns; the pandas DataFrames the
+    pages use are built on first access.
+    """
+
+    def __init__(self, sheets, version):
+        self.sheets = sheets
+        self.version = version
+        self.laminate = laminate
+
+    def _frame(self, name):
+        import pandas as pd
+        sheet = self.sheets[name]
+        return pd.DataFrame(sheet['data'], columns=sheet['columns'])
+
+    @cached_property
+    def plywood(self):
+        return self._frame('Plywood')
+
+    @cached_property
+    def hdmr_mdf(self):
+        return self._frame('HDMR')
+
+    @cached_property
+    def hdmr(self):
+        return self.hdmr_mdf[self.hdmr_mdf['Grade'] == 'HDHMR']
+
+    @cached_property
+    def mdf(self):
+        return self.hdmr_mdf[self.hdmr_mdf['Grade'] == 'MDF'].reset_index(drop=True)
+
+    @property
+    def type_map(self):
+        """Board type shown on the material page -> its price table."""
+        return {"Plywood": self.plywood, "HDHMR": self.hdmr, "MDF": self.mdf}
+
+    def _columns(self, name, grade=None):
+        data = self.sheets[name]['data']
+        if grade is None:
+            return data
+        keep = [i for i, value in enumerate(data['Grade']) if value == grade]
+        return {col: [values[i] for i in keep] for col, values in data.items()}
+
+    @cached_property
+    def option_index(self):
+        """Cascading option lists and prices, built once for this version."""
+        return OptionIndex({
+            "Plywood": self._columns('Plywood'),
+            "HDHMR": self._columns('HDMR', 'HDHMR'),
+            "MDF": self._columns('HDMR', 'MDF'),
+        })
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    """The catalog shared by every session in this process, loaded on first use."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                cache = _load_compiled()
+                _catalog = MaterialCatalog(cache['sheets'], cache['sha256'])
+    return _catalog
+
+
+def refresh_catalog():
+    """Reload the workbook if it changed since the catalog was loaded."""
+    global _catalog
+    with _catalog_lock:
+        cache = _load_compiled()
+        if _catalog is None or _catalog.version != cache['sha256']:
+            _catalog = MaterialCatalog(cache['sheets'], cache['sha256'])
+        return _catalog
+
+
+_LEGACY_NAMES = {
+    'material_costs': 'plywood',
+    'material_costs_hdmr_mdf': 'hdmr_mdf',
+    'material_costs_hdmr': 'hdmr',
+    'material_costs_mdf': 'mdf',
+}
+
+
+def __getattr__(name):
+    # Keep `from data.material_costs import material_costs` working, lazily.
+    if name in _LEGACY_NAMES:
+        return getattr(get_catalog(), _LEGACY_NAMES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,75 @@
+import math
+from types import MappingProxyType
+
+# Cascade of choices on the material page, in order.
+LEVELS = ("Grade", "Brand", "Model", "Thickness")
+PRICE_COLUMN = "Per sft Price"
+# Stands in for a level that offers no choice (the page shows "-").
+NO_OPTION = "-"
+
+
+def _missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _unique(values):
+    """Distinct non-missing values in first-seen order, like dropna().unique()."""
+    seen = {}
+    for value in values:
+        if not _missing(value) and value not in seen:
+            seen[value] = None
+    return list(seen)
+
+
+class OptionIndex:
+    """Immutable Grade -> Brand -> Model -> Thickness -> price lookup.
+
+    Built once per catalog version from the board price tables. Option
+    lists are keyed by (material type, *choices so far) and prices by the
+    full (material type, grade, brand, model, thickness) tuple, so both
+    are a single dict lookup. A level without options is represented by
+    NO_OPTION in the key, matching what the material page stores.
+    """
+
+    def __init__(self, tables):
+        """``tables`` maps material type -> {column name: [values, ...]}."""
+        options = {}
+        prices = {}
+        for mat_type, columns in tables.items():
+            if any(level not in columns for level in LEVELS):
+                options[(mat_type,)] = ()
+                continue
+            has_price = PRICE_COLUMN in columns
+            size = len(columns[LEVELS[0]])
+            price_values = columns[PRICE_COLUMN] if has_price else [None] * size
+            rows = list(zip(*(columns[level] for level in LEVELS), price_values))
+            self._build(options, prices, (mat_type,), rows, 0, has_price)
+        self._options = MappingProxyType(options)
+        self._prices = MappingProxyType(prices)
+        self.material_types = tuple(tables)
+
+    @staticmethod
+    def _build(options, prices, key, rows, depth, has_price):
+        if depth == len(LEVELS):
+            if rows and has_price:
+                prices[key] = float(rows[0][depth])
+            return
+        values = _unique(row[depth] for row in rows)
+        if depth == 0 and key[0] == "MDF" and values == [""]:
+            # MDF rows carry an empty grade; the page skips the choice.
+            values = []
+        options[key] = tuple(values)
+        if not values:
+            OptionIndex._build(options, prices, key + (NO_OPTION,), rows, depth + 1, has_price)
+            return
+        for value in values:
+            subset = [row for row in rows if row[depth] == value]
+            OptionIndex._build(options, prices, key + (value,), subset, depth + 1, has_price)
+
+    def options(self, mat_type, *choices):
+        """Options for the level after ``choices``; () means no choice."""
+        return self._options.get((mat_type,) + choices, ())
+
+    def price(self, mat_type, grade, brand, model, thickness):
+        """Per sft price of a full selection, or None if there is none."""
+        return self._prices.get((mat_type, grade, brand, model, thickness))
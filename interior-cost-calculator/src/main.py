@@ -1,7 +1,11 @@
 import streamlit as st
 import pandas as pd
+import json
 from datetime import datetime
-from utils.db import create_user, authenticate_user, save_project, load_project, list_projects
+from utils.db import create_user, authenticate_user, save_project, load_project, list_projects, delete_project, is_admin, pool_stats
+from utils import metrics, profiling
+from utils.storage import get_store
+from data.material_costs import get_catalog, refresh_catalog
 
 st.set_page_config(page_title="Interior Cost Calculator", layout="wide", initial_sidebar_state="collapsed")
 hide_sidebar_style = """
@@ -11,6 +15,7 @@ hide_sidebar_style = """
     </style>
 """
 st.markdown(hide_sidebar_style, unsafe_allow_html=True)
+metrics.begin_run("Home")
 
 if 'authenticated' not in st.session_state:
     st.session_state.authenticated = False
@@ -47,11 +52,7 @@ def project_selector():
             else:
                 st.switch_page("pages/01_ProjectInput.py")
         if col2.button("Delete Project"):
-            # Remove project from JSON
-            from utils.db import _load_json, _save_json
-            data = _load_json()
-            data["projects"] = [p for p in data["projects"] if not (p.get("username") == user and p.get("project_name") == selected_project)]
-            _save_json(data)
+            delete_project(user, selected_project)
             st.success(f"Project '{selected_project}' deleted.")
             st.rerun()
     else:
@@ -77,9 +78,98 @@ def project_selector():
                     "element_materials": {},
                     "area_details": {}
                 }
-                save_project(user, new_project, data)
-                st.success(f"Project '{new_project}' created!")
-                st.rerun()
+                if save_project(user, new_project, data):
+                    st.success(f"Project '{new_project}' created!")
+                    st.rerun()
+                else:
+                    st.error(f"Project '{new_project}' already exists.")
+
+def storage_status():
+    failure = getattr(get_store(), "compaction_error", lambda: None)()
+    if failure:
+        failed_at, error = failure
+        st.error(f"Background journal compaction failed at {failed_at}: {error}")
+
+def materials_panel():
+    with st.expander("🧱 Material prices"):
+        st.caption(f"Loaded materials_cost.xlsx version {get_catalog().version[:12]}.")
+        if st.button("Reload materials"):
+            before = get_catalog().version
+            catalog = refresh_catalog()
+            if catalog.version == before:
+                st.info("materials_cost.xlsx has not changed.")
+            else:
+                st.success(f"Loaded materials_cost.xlsx version {catalog.version[:12]}.")
+
+def metrics_panel():
+    with st.expander("📈 Performance metrics"):
+        # Counted whether or not timing metrics are on.
+        pool = pool_stats()
+        if pool:
+            st.markdown("**Database connection pool**")
+            pool_cols = st.columns(5)
+            pool_cols[0].metric("In use / open", f"{pool['in_use']} / {pool['open']}")
+            pool_cols[1].metric("Checkouts", pool["checkouts"])
+            pool_cols[2].metric("Waits", pool["waits"])
+            pool_cols[3].metric("Avg / max wait (ms)", f"{pool['avg_wait_seconds'] * 1000:.1f} / {pool['max_wait_seconds'] * 1000:.1f}")
+            pool_cols[4].metric("Timeouts", pool["timeouts"])
+        if not metrics.enabled():
+            st.info(f"Timing metrics are off. Start the app with {metrics.METRICS_ENV}=1 to record them.")
+            return
+        data = metrics.snapshot()
+        rows = [
+            (page, name, values["calls"], round(values["seconds"], 3),
+             round(values["seconds"] * 1000 / values["calls"], 2), info["runs"])
+            for page, info in data["pages"].items()
+            for name, values in info["spans"].items()
+        ]
+        if rows:
+            st.dataframe(
+                pd.DataFrame(rows, columns=["Page", "Span", "Calls", "Total (s)", "Mean (ms)", "Page Runs"]),
+                use_container_width=True, hide_index=True
+            )
+        else:
+            st.info("Nothing recorded yet.")
+        recent = [
+            (run["started"], run["page"], round(run["seconds"] * 1000, 1),
+             ", ".join(f"{name} {values['seconds'] * 1000:.1f}ms" for name, values in run["spans"].items()))
+            for run in reversed(data["recent_runs"])
+        ]
+        if recent:
+            st.markdown("**Recent page runs**")
+            st.dataframe(pd.DataFrame(recent, columns=["Started", "Page", "Run (ms)", "Spans"]), use_container_width=True, hide_index=True)
+        col1, col2, col3 = st.columns(3)
+        col1.download_button("Download (Prometheus)", metrics.prometheus_text(), file_name="metrics.prom", mime="text/plain")
+        col2.download_button("Download (JSON)", json.dumps(data, indent=2), file_name="metrics.json", mime="application/json")
+        if col3.button("Reset metrics"):
+            metrics.reset()
+            st.rerun()
+
+def profiles_panel():
+    with st.expander("🔬 Slow run profiles"):
+        if profiling.active():
+            st.info(f"{profiling.PROFILE_ENV} is set: every session's Material Selection and Summary runs are profiled.")
+        # Kept under its own key so it survives leaving this page.
+        st.session_state[profiling.SESSION_FLAG] = st.toggle(
+            "Profile my Material Selection and Summary runs",
+            value=st.session_state.get(profiling.SESSION_FLAG, False)
+        )
+        st.caption(f"Runs slower than {profiling.threshold_ms():.0f} ms are saved to {profiling.profile_dir()}.")
+        profiles = profiling.list_profiles()
+        if not profiles:
+            st.info("No profiles captured yet.")
+            return
+        df = pd.DataFrame(profiles, columns=["created", "page", "user", "project", "ms", "file"])
+        df.columns = ["Captured", "Page", "User", "Project", "Run (ms)", "File"]
+        st.dataframe(df, use_container_width=True, hide_index=True)
+        chosen = st.selectbox("Profile", [p["file"] for p in profiles])
+        path = next(p["path"] for p in profiles if p["file"] == chosen)
+        try:
+            with open(path, "rb") as f:
+                st.download_button("Download .prof", f.read(), file_name=chosen, mime="application/octet-stream")
+            st.code(profiling.report(path), language="text")
+        except OSError:
+            st.warning("That profile was removed.")
 
 if not st.session_state.authenticated:
     st.title("Login or Register")
@@ -114,5 +204,11 @@ else:
         st.rerun()
     if "project" not in st.session_state:
         project_selector()
+        if is_admin(st.session_state.username):
+            storage_status()
+            materials_panel()
+            metrics_panel()
+            profiles_panel()
     else:
-        st.switch_page("pages/01_ProjectInput.py")
\ No newline at end of file
+        st.switch_page("pages/01_ProjectInput.py")
+metrics.end_run()
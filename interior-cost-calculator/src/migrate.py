@@ -1,100 +1,305 @@
 import json
 import os
 import hashlib
-from utils.db import get_db_connection, hash_password
+from contextlib import contextmanager, nullcontext
+from urllib.parse import unquote
+from utils.db import db_connection, hash_password
+from utils.storage import MANIFEST_FILE, JsonProjectStore
 
-def migrate_users(users_json_path):
+MATERIAL_TYPES = ["shutter", "carcus", "laminate"]
+# Projects written per transaction by migrate_projects().
+PROJECT_BATCH_SIZE = 50
+
+
+@contextmanager
+def _transaction(conn=None):
+    """A cursor inside one transaction, on ``conn`` or a pooled connection.
+
+    Passing ``conn`` lets the migration run against any DB-API connection
+    that speaks this SQL, e.g. a local stand-in instead of MySQL.
+    """
+    with (nullcontext(conn) if conn is not None else db_connection()) as conn:
+        cursor = conn.cursor()
+        try:
+            yield cursor
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+
+def _placeholders(values):
+    return ",".join(["%s"] * len(values))
+
+
+def migrate_users(users_json_path, conn=None):
     with open(users_json_path, "r") as f:
         users = json.load(f)
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    for username, info in users.items():
-        password = info["password"]
-        password_hash = hash_password(password)
-        try:
-            cursor.execute("INSERT IGNORE INTO Users (username, password_hash) VALUES (%s, %s)", (username, password_hash))
-        except Exception as e:
-            print(f"Error inserting user {username}: {e}")
-    conn.commit()
-    cursor.close()
-    conn.close()
-    print("Users migrated.")
-
-def get_user_id(username):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM Users WHERE username=%s", (username,))
-    row = cursor.fetchone()
-    cursor.close()
-    conn.close()
+    rows = [(username, hash_password(info["password"])) for username, info in users.items()]
+    with _transaction(conn) as cursor:
+        if rows:
+            cursor.executemany("INSERT IGNORE INTO Users (username, password_hash) VALUES (%s, %s)", rows)
+    print(f"Users migrated ({len(rows)}).")
+
+def get_user_id(username, conn=None):
+    with _transaction(conn) as cursor:
+        cursor.execute("SELECT id FROM Users WHERE username=%s", (username,))
+        row = cursor.fetchone()
     return row[0] if row else None
 
-def migrate_project(username, project_name, project_json_path):
+
+def project_rows(data):
+    """Rooms, elements and materials of a project document as flat rows.
+
+    Rooms are [room_name], elements [(room_name, element_name, height,
+    length, width, num_shelves)] and materials [(room_name, element_name,
+    material_type, brand, model, grade, thickness, rate)]. Children refer
+    to their parent by name, which is unique within the parent, so the
+    rows can be linked to database IDs after a bulk insert.
+    """
+    element_materials = data.get("element_materials", {})
+    rooms, elements, materials = [], [], []
+
+    def add(room_name, element_name, dims, key_prefix):
+        elements.append((room_name, element_name, dims.get("height", 0), dims.get("length", 0),
+                         dims.get("width", 0), dims.get("num_shelves", 0)))
+        for mat_type in MATERIAL_TYPES:
+            mat = element_materials.get(key_prefix, {}).get(mat_type, {})
+            if mat:
+                materials.append((room_name, element_name, mat_type, mat.get("brand", ""), mat.get("model", ""),
+                                  mat.get("grade", ""), mat.get("thickness", ""), mat.get("rate", 0)))
+
+    for room_name, room_elements in data.get("rooms", {}).items():
+        rooms.append(room_name)
+        for el_name, el in room_elements.items():
+            if el_name == "Bunk Bed" and isinstance(el, dict):
+                for section_name, section in el.items():
+                    add(room_name, f"{el_name} - {section_name}", section, f"{room_name}|{el_name}|{section_name}")
+            else:
+                add(room_name, el_name, el, f"{room_name}|{el_name}")
+    return rooms, elements, materials
+
+
+def _write_batch(cursor, batch):
+    """Write (username, project_name, data) projects with a few bulk statements.
+
+    Each table gets one executemany and one SELECT mapping names back to
+    the IDs MySQL assigned. Projects that already exist have their rooms,
+    elements and materials replaced. Returns the projects whose user is
+    not in the database.
+    """
+    # The last copy of a project wins if it appears twice.
+    batch = list({(username, project_name): (username, project_name, data) for username, project_name, data in batch}.values())
+    usernames = sorted({username for username, _, _ in batch})
+    cursor.execute(f"SELECT id, username FROM Users WHERE username IN ({_placeholders(usernames)})", usernames)
+    user_ids = {username: user_id for user_id, username in cursor.fetchall()}
+    missing = [(username, project_name) for username, project_name, _ in batch if username not in user_ids]
+    batch = [item for item in batch if item[0] in user_ids]
+    if not batch:
+        return missing
+
+    cursor.executemany(
+        "INSERT INTO Projects (user_id, project_name, created_at, last_modified) VALUES (%s, %s, NOW(), NOW()) ON DUPLICATE KEY UPDATE last_modified=NOW()",
+        [(user_ids[username], project_name) for username, project_name, _ in batch]
+    )
+    wanted_users = sorted({user_ids[username] for username, _, _ in batch})
+    names = sorted({project_name for _, project_name, _ in batch})
+    cursor.execute(
+        f"SELECT id, user_id, project_name FROM Projects WHERE user_id IN ({_placeholders(wanted_users)}) AND project_name IN ({_placeholders(names)})",
+        wanted_users + names
+    )
+    project_ids = {(user_id, project_name): project_id for project_id, user_id, project_name in cursor.fetchall()}
+    ids = [project_ids[(user_ids[username], project_name)] for username, project_name, _ in batch]
+
+    # Replace whatever an earlier run left for these projects.
+    in_projects = _placeholders(ids)
+    cursor.execute(
+        f"DELETE FROM Materials WHERE element_id IN (SELECT e.id FROM Elements e JOIN Rooms r ON e.room_id = r.id WHERE r.project_id IN ({in_projects}))",
+        ids
+    )
+    cursor.execute(f"DELETE FROM Elements WHERE room_id IN (SELECT id FROM Rooms WHERE project_id IN ({in_projects}))", ids)
+    cursor.execute(f"DELETE FROM Rooms WHERE project_id IN ({in_projects})", ids)
+
+    rows = [(project_id,) + project_rows(data) for project_id, (_, _, data) in zip(ids, batch)]
+    room_rows = [(project_id, room_name) for project_id, rooms, _, _ in rows for room_name in rooms]
+    if not room_rows:
+        return missing
+    cursor.executemany("INSERT INTO Rooms (project_id, room_name) VALUES (%s, %s)", room_rows)
+    cursor.execute(f"SELECT id, project_id, room_name FROM Rooms WHERE project_id IN ({in_projects})", ids)
+    room_ids = {(project_id, room_name): room_id for room_id, project_id, room_name in cursor.fetchall()}
+
+    element_rows = [
+        (room_ids[(project_id, element[0])],) + element[1:]
+        for project_id, _, elements, _ in rows
+        for element in elements
+    ]
+    if not element_rows:
+        return missing
+    cursor.executemany(
+        "INSERT INTO Elements (room_id, element_name, height, length, width, num_shelves) VALUES (%s, %s, %s, %s, %s, %s)",
+        element_rows
+    )
+    wanted_rooms = sorted(set(room_ids.values()))
+    cursor.execute(f"SELECT id, room_id, element_name FROM Elements WHERE room_id IN ({_placeholders(wanted_rooms)})", wanted_rooms)
+    element_ids = {(room_id, element_name): element_id for element_id, room_id, element_name in cursor.fetchall()}
+
+    material_rows = [
+        (element_ids[(room_ids[(project_id, material[0])], material[1])],) + material[2:]
+        for project_id, _, _, materials in rows
+        for material in materials
+    ]
+    if material_rows:
+        cursor.executemany(
+            "INSERT INTO Materials (element_id, material_type, brand, model, grade, thickness, rate) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            material_rows
+        )
+    return missing
+
+
+def migrate_projects(projects, conn=None, batch_size=PROJECT_BATCH_SIZE):
+    """Migrate (username, project_name, data) projects, one transaction per batch.
+
+    A failing batch is rolled back as a whole and the error re-raised.
+    Returns the number of projects written.
+    """
+    written = 0
+    batch = []
+
+    def flush():
+        nonlocal written
+        with _transaction(conn) as cursor:
+            missing = _write_batch(cursor, batch)
+        for username, project_name in missing:
+            print(f"User {username} not found in DB, skipping project '{project_name}'.")
+        # A project listed twice in the batch is written once.
+        written += len({(username, project_name) for username, project_name, _ in batch}) - len(missing)
+        batch.clear()
+
+    for item in projects:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return written
+
+
+def migrate_project(username, project_name, project_json_path, conn=None):
     with open(project_json_path, "r") as f:
         data = json.load(f)
-    user_id = get_user_id(username)
+    if migrate_projects([(username, project_name, data)], conn):
+        print(f"Project '{project_name}' for user '{username}' migrated.")
+
+
+INSERT_MATERIAL = (
+    "INSERT INTO Materials (element_id, material_type, type, brand, model, grade, thickness, rate) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"
+)
+
+
+def _element_id_map(cursor, project_id):
+    """element_materials key -> Elements.id for one project, in two queries."""
+    cursor.execute("SELECT id, room_name FROM Rooms WHERE project_id=%s", (project_id,))
+    # Reverse map, so each element row finds its room in one lookup.
+    room_names = {room_id: room_name for room_id, room_name in cursor.fetchall()}
+    if not room_names:
+        return {}
+    room_ids = list(room_names)
+    cursor.execute(f"SELECT id, room_id, element_name FROM Elements WHERE room_id IN ({_placeholders(room_ids)})", room_ids)
+    element_id_map = {}
+    for element_id, room_id, el_name in cursor.fetchall():
+        room_name = room_names[room_id]
+        # Handle Bunk Bed sections
+        if el_name.startswith("Bunk Bed - "):
+            section = el_name[len("Bunk Bed - "):]
+            element_id_map[f"{room_name}|Bunk Bed|{section}"] = element_id
+        # Also map the full name for non-bunk-bed
+        element_id_map[f"{room_name}|{el_name}"] = element_id
+    return element_id_map
+
+
+def migrate_element_materials_only(username, project_name, project_json_path, conn=None):
+    """Re-sync one project's element materials; False if anything was not found.
+
+    The user, the project or some of its elements may be missing from the
+    database. The materials that could be matched are still written.
+    """
+    with open(project_json_path, "r") as f:
+        data = json.load(f)
+    user_id = get_user_id(username, conn)
     if not user_id:
         print(f"User {username} not found in DB.")
-        return
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    # Insert project
-    cursor.execute(
-        "INSERT INTO Projects (user_id, project_name, created_at, last_modified) VALUES (%s, %s, NOW(), NOW()) ON DUPLICATE KEY UPDATE last_modified=NOW()",
-        (user_id, project_name)
-    )
-    conn.commit()
-    cursor.execute("SELECT id FROM Projects WHERE user_id=%s AND project_name=%s", (user_id, project_name))
-    project_id = cursor.fetchone()[0]
-    # Insert rooms, elements, materials
-    for room_name, elements in data.get("rooms", {}).items():
-        cursor.execute("INSERT INTO Rooms (project_id, room_name) VALUES (%s, %s)", (project_id, room_name))
-        room_id = cursor.lastrowid
-        for el_name, el in elements.items():
-            if el_name == "Bunk Bed" and isinstance(el, dict):
-                for section_name, section in el.items():
-                    cursor.execute(
-                        "INSERT INTO Elements (room_id, element_name, height, length, width, num_shelves) VALUES (%s, %s, %s, %s, %s, %s)",
-                        (room_id, f"{el_name} - {section_name}", section.get("height", 0), section.get("length", 0), section.get("width", 0), section.get("num_shelves", 0))
-                    )
-                    element_id = cursor.lastrowid
-                    key_prefix = f"{room_name}|{el_name}|{section_name}"
-                    for mat_type in ["shutter", "carcus", "laminate"]:
-                        mat = data.get("element_materials", {}).get(key_prefix, {}).get(mat_type, {})
-                        if mat:
-                            cursor.execute(
-                                "INSERT INTO Materials (element_id, material_type, brand, model, grade, thickness, rate) VALUES (%s, %s, %s, %s, %s, %s, %s)",
-                                (element_id, mat_type, mat.get("brand", ""), mat.get("model", ""), mat.get("grade", ""), mat.get("thickness", ""), mat.get("rate", 0))
-                            )
-            else:
-                cursor.execute(
-                    "INSERT INTO Elements (room_id, element_name, height, length, width, num_shelves) VALUES (%s, %s, %s, %s, %s, %s)",
-                    (room_id, el_name, el.get("height", 0), el.get("length", 0), el.get("width", 0), el.get("num_shelves", 0))
-                )
-                element_id = cursor.lastrowid
-                key_prefix = f"{room_name}|{el_name}"
-                for mat_type in ["shutter", "carcus", "laminate"]:
-                    mat = data.get("element_materials", {}).get(key_prefix, {}).get(mat_type, {})
-                    if mat:
-                        cursor.execute(
-                            "INSERT INTO Materials (element_id, material_type, brand, model, grade, thickness, rate) VALUES (%s, %s, %s, %s, %s, %s, %s)",
-                            (element_id, mat_type, mat.get("brand", ""), mat.get("model", ""), mat.get("grade", ""), mat.get("thickness", ""), mat.get("rate", 0))
-                        )
-    conn.commit()
-    cursor.close()
-    conn.close()
-    print(f"Project '{project_name}' for user '{username}' migrated.")
+        return False
+    with _transaction(conn) as cursor:
+        # Get project_id
+        cursor.execute("SELECT id FROM Projects WHERE user_id=%s AND project_name=%s", (user_id, project_name))
+        row = cursor.fetchone()
+        if not row:
+            print(f"Project {project_name} not found for user {username}.")
+            return False
+        element_id_map = _element_id_map(cursor, row[0])
+
+        # Stage every material row, then replace them in two statements. The
+        # schema has no unique key on (element_id, material_type), so the
+        # rows are deleted and re-inserted rather than upserted.
+        rows = []
+        complete = True
+        for key_prefix, mats in data.get("element_materials", {}).items():
+            element_id = element_id_map.get(key_prefix)
+            if not element_id:
+                print(f"Element for key '{key_prefix}' not found in DB, skipping.")
+                complete = False
+                continue
+            for mat_type in MATERIAL_TYPES:
+                mat = mats.get(mat_type, {})
+                if mat:
+                    rows.append((element_id, mat_type, mat.get("type", ""), mat.get("brand", ""), mat.get("model", ""),
+                                 mat.get("grade", ""), mat.get("thickness", ""), mat.get("rate", 0)))
+        if rows:
+            pairs = [value for row in rows for value in row[:2]]
+            cursor.execute(
+                f"DELETE FROM Materials WHERE (element_id, material_type) IN ({','.join(['(%s, %s)'] * len(rows))})",
+                pairs
+            )
+            cursor.executemany(INSERT_MATERIAL, rows)
+    print(f"Element materials for project '{project_name}' and user '{username}' migrated.")
+    return complete
+
+
+def iter_project_files(projects_root):
+    """(username, project_name, path) of every projects/<user>/<project>.json.
+
+    Names are decoded from the percent-encoded file names the project
+    store writes. If ``projects_root`` is a JSON project store, its journal
+    is compacted first, so saves not yet folded into the files are
+    included. Dot-prefixed entries (the store's .journal, .index.json and
+    the like) are not projects and are skipped.
+    """
+    if os.path.exists(os.path.join(projects_root, MANIFEST_FILE)):
+        store = JsonProjectStore(projects_root)
+        try:
+            store.compact()
+        finally:
+            store.close()
+    for user_dir_name in sorted(os.listdir(projects_root)):
+        user_dir = os.path.join(projects_root, user_dir_name)
+        if not user_dir_name.startswith(".") and os.path.isdir(user_dir):
+            for file in sorted(os.listdir(user_dir)):
+                if not file.startswith(".") and file.endswith(".json"):
+                    yield unquote(user_dir_name), unquote(file[:-len(".json")]), os.path.join(user_dir, file)
+
+
+def _load_projects(projects_root):
+    for username, project_name, project_json_path in iter_project_files(projects_root):
+        with open(project_json_path, "r") as f:
+            yield username, project_name, json.load(f)
+
 
 if __name__ == "__main__":
     # 1. Migrate users
     migrate_users("users.json")
     # 2. Migrate projects
     projects_root = os.path.join("projects")
-    for username in os.listdir(projects_root):
-        user_dir = os.path.join(projects_root, username)
-        if os.path.isdir(user_dir):
-            for file in os.listdir(user_dir):
-                if file.endswith(".json"):
-                    project_name = file.replace(".json", "")
-                    project_json_path = os.path.join(user_dir, file)
-                    migrate_project(username, project_name, project_json_path)
\ No newline at end of file
+    print(f"Projects migrated ({migrate_projects(_load_projects(projects_root))}).")
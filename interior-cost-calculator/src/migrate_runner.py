@@ -0,0 +1,256 @@
+"""Parallel, resumable migration of projects/<user>/*.json into MySQL.
+
+    python migrate_runner.py --root projects --users users.json --workers 8
+    python migrate_runner.py --mode materials      # re-sync material choices only
+
+Users are spread over worker processes, each with its own connection. A
+checkpoint log records the content hash of every file migrated, so a
+rerun (e.g. a nightly sync) only touches new or changed files; --force
+ignores it. A report with throughput and errors is printed at the end.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from migrate import (PROJECT_BATCH_SIZE, get_user_id, iter_project_files, migrate_element_materials_only,
+                     migrate_projects, migrate_users)
+from utils.fileio import atomic_write, file_sha256
+
+MODES = ("full", "materials")
+CHECKPOINT_VERSION = 2
+
+# Set in each worker by _init_worker.
+_connect = None
+_conn = None
+
+
+def default_checkpoint(root, mode):
+    return os.path.join(root, f".migrate_{mode}.checkpoint.jsonl")
+
+
+def load_checkpoint(path):
+    """{file path: sha256} of the files a previous run finished.
+
+    The checkpoint is a JSON-lines log: a header with the version, then
+    one {"path", "sha256"} record per file, the last record of a path
+    winning (a null sha256 un-records it). A torn last line, left by a
+    run killed mid-write, is ignored.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return {}
+    try:
+        header = json.loads(lines[0])
+    except (IndexError, ValueError):
+        return {}
+    if not isinstance(header, dict) or header.get("version") != CHECKPOINT_VERSION:
+        return {}
+    files = {}
+    for line in lines[1:]:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if record["sha256"] is None:
+            files.pop(record["path"], None)
+        else:
+            files[record["path"]] = record["sha256"]
+    return files
+
+
+def _checkpoint_lines(records):
+    return (json.dumps({"path": path, "sha256": digest}) + "\n" for path, digest in records)
+
+
+def save_checkpoint(path, files, completed=None):
+    """Rewrite the checkpoint with just the current ``files``."""
+    with atomic_write(path) as f:
+        f.write(json.dumps({"version": CHECKPOINT_VERSION, "completed": completed}) + "\n")
+        f.writelines(_checkpoint_lines(files.items()))
+
+
+def append_checkpoint(f, records):
+    """Append (path, sha256 or None) records to an open checkpoint log."""
+    f.writelines(_checkpoint_lines(records))
+    f.flush()
+
+
+def _default_connect():
+    from utils.db import get_db_connection
+    return get_db_connection()
+
+
+def _init_worker(connect):
+    global _connect
+    _connect = connect
+
+
+def _connection():
+    # One connection per worker process, opened on its first task.
+    global _conn
+    if _conn is None:
+        _conn = _connect()
+    return _conn
+
+
+def _reset_connection():
+    # After a failure the connection may be dead; the next task opens a new one.
+    global _conn
+    conn, _conn = _conn, None
+    if conn is not None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+def _migrate_files(files, migrate_batch):
+    """Migrate [(username, project_name, path, sha256)] in batches.
+
+    A batch that fails is retried one file at a time, so only the broken
+    files are reported. Returns [(path, sha256, error or None)].
+    """
+    results = []
+    for start in range(0, len(files), PROJECT_BATCH_SIZE):
+        batch = files[start:start + PROJECT_BATCH_SIZE]
+        try:
+            migrate_batch(batch)
+            results += [(path, digest, None) for _, _, path, digest in batch]
+            continue
+        except Exception as e:
+            _reset_connection()
+            if len(batch) == 1:
+                results.append((batch[0][2], batch[0][3], f"{type(e).__name__}: {e}"))
+                continue
+        for item in batch:
+            try:
+                migrate_batch([item])
+                results.append((item[2], item[3], None))
+            except Exception as e:
+                _reset_connection()
+                results.append((item[2], item[3], f"{type(e).__name__}: {e}"))
+    return results
+
+
+def _full_batch(batch):
+    projects = []
+    for username, project_name, path, _ in batch:
+        with open(path, "r") as f:
+            projects.append((username, project_name, json.load(f)))
+    migrate_projects(projects, _connection())
+
+
+def _materials_batch(batch):
+    for username, project_name, path, _ in batch:
+        # Kept out of the checkpoint, so the file is retried on the next run.
+        if not migrate_element_materials_only(username, project_name, path, _connection()):
+            raise LookupError(f"project '{project_name}' or some of its elements not found in DB")
+
+
+def _run_user(mode, files):
+    try:
+        # Checked up front: the migration functions only print and skip.
+        if not get_user_id(files[0][0], _connection()):
+            return [(path, digest, "user not found in DB") for _, _, path, digest in files]
+        return _migrate_files(files, _full_batch if mode == "full" else _materials_batch)
+    except Exception as e:
+        # Typically the worker could not connect; fail the user's files.
+        _reset_connection()
+        return [(path, digest, f"{type(e).__name__}: {e}") for _, _, path, digest in files]
+
+
+def run(root, mode="full", workers=None, checkpoint_path=None, force=False, connect=_default_connect):
+    """Migrate every new or changed project file under ``root``.
+
+    Returns a report dict with counts, elapsed seconds, files per second
+    and the [(path, error)] of files that failed. ``connect`` opens a
+    DB-API connection in each worker (it must be picklable).
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown migration mode: {mode}")
+    checkpoint_path = checkpoint_path or default_checkpoint(root, mode)
+    done = {} if force else load_checkpoint(checkpoint_path)
+    started = time.perf_counter()
+
+    by_user = {}
+    total = skipped = 0
+    for username, project_name, path in iter_project_files(root):
+        total += 1
+        digest = file_sha256(path)
+        if done.get(path) == digest:
+            skipped += 1
+            continue
+        by_user.setdefault(username, []).append((username, project_name, path, digest))
+
+    migrated, errors = 0, []
+    workers = workers or os.cpu_count() or 1
+    if by_user:
+        # Start from a compact log, then append each user's results as they
+        # finish, so an interrupted run resumes after the last user logged.
+        save_checkpoint(checkpoint_path, done)
+        with open(checkpoint_path, "a", encoding="utf-8") as log, \
+                ProcessPoolExecutor(max_workers=min(workers, len(by_user)), initializer=_init_worker,
+                                    initargs=(connect,)) as pool:
+            futures = [pool.submit(_run_user, mode, files) for files in by_user.values()]
+            for future in as_completed(futures):
+                records = []
+                for path, digest, error in future.result():
+                    if error is None:
+                        done[path] = digest
+                        migrated += 1
+                    else:
+                        done.pop(path, None)
+                        errors.append((path, error))
+                        digest = None
+                    records.append((path, digest))
+                append_checkpoint(log, records)
+    elapsed = time.perf_counter() - started
+    completed = time.strftime("%Y-%m-%d %H:%M:%S") if not errors else None
+    save_checkpoint(checkpoint_path, done, completed)
+    return {
+        "mode": mode,
+        "files": total,
+        "skipped": skipped,
+        "migrated": migrated,
+        "failed": len(errors),
+        "seconds": elapsed,
+        "files_per_second": migrated / elapsed if elapsed else 0.0,
+        "errors": sorted(errors),
+    }
+
+
+def print_report(report, out=sys.stdout):
+    print(
+        f"{report['mode']}: {report['migrated']} migrated, {report['skipped']} unchanged, "
+        f"{report['failed']} failed of {report['files']} files in {report['seconds']:.1f}s "
+        f"({report['files_per_second']:.1f} files/s)",
+        file=out
+    )
+    for path, error in report["errors"]:
+        print(f"  {path}: {error}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migrate project JSON files into MySQL.")
+    parser.add_argument("--root", default="projects", help="projects/<user>/<project>.json directory")
+    parser.add_argument("--users", help="users.json to migrate first")
+    parser.add_argument("--mode", choices=MODES, default="full",
+                        help="full: projects, rooms, elements and materials; materials: re-sync materials only")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <root>/.migrate_<mode>.checkpoint.jsonl)")
+    parser.add_argument("--force", action="store_true", help="migrate every file, ignoring the checkpoint")
+    args = parser.parse_args(argv)
+
+    if args.users:
+        migrate_users(args.users)
+    report = run(args.root, args.mode, args.workers, args.checkpoint, args.force)
+    print_report(report)
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
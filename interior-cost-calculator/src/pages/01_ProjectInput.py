@@ -1,10 +1,12 @@
 from numpy import ceil
 import streamlit as st
 import pandas as pd
-from utils.calculations import calculate_total_element_area, calculate_sheets_needed, shutter_area, side_area, top_bottom_area, back_panel_area, shelf_area
-from data.material_costs import material_costs
+from utils.calculations import calculate_total_element_area, shutter_area, side_area, top_bottom_area, back_panel_area, shelf_area
 from utils.db import save_project, load_project
+from utils.cutlist import plan_project
+from utils import metrics
 import os
+import copy
 
 st.set_page_config(initial_sidebar_state="collapsed")
 hide_sidebar_style = """
@@ -14,6 +16,7 @@ hide_sidebar_style = """
     </style>
 """
 st.markdown(hide_sidebar_style, unsafe_allow_html=True)
+metrics.begin_run("Project Input")
 
 if st.button("🏠 Home"):
     st.session_state.pop("project", None)
@@ -74,77 +77,150 @@ def main():
     dining_elements = ["Crockery"]
     bedroom_elements = ["Wardrobe","Dresser", "Loft", "TV Unit", "Bunk Bed", "Bed", "Pooja Unit"]
 
-    room_data = {}
+    # Room inputs live in the session so a room can rerun on its own and
+    # rooms whose tab is closed keep their values.
+    room_state_key = f"room_data|{user}|{project}"
+    # Saved against the version this session started editing, so a save
+    # made in another session in between is not overwritten.
+    version_key = f"project_version|{user}|{project}"
+    if room_state_key not in st.session_state:
+        st.session_state[room_state_key] = copy.deepcopy(existing_room_data)
+        st.session_state[version_key] = project_data.get("version", 0)
+    st.session_state.setdefault(version_key, project_data.get("version", 0))
+    saved_room_data = st.session_state[room_state_key]
 
-    st.subheader("Room Elements and Dimensions")
-    cols = st.columns(len(all_rooms))
-    for i, room in enumerate(all_rooms):
-        with cols[i]:
-            st.markdown(f"### {room}")
-
-            # Select elements based on room type
-            if "Kitchen" in room:
-                element_options = kitchen_elements
-            elif "Living" in room:
-                element_options = living_elements
-            elif "Dining" in room:
-                element_options = dining_elements
+    def element_options_for(room):
+        # Select elements based on room type
+        if "Kitchen" in room:
+            return kitchen_elements
+        elif "Living" in room:
+            return living_elements
+        elif "Dining" in room:
+            return dining_elements
+        return bedroom_elements
+
+    bunk_sections = ["Bunk bed Lower", "Bunk bed Upper", "Bunk Bed Extra"]
+    dim_columns = [("length", "L"), ("width", "W"), ("height", "H"), ("num_shelves", "Shelves")]
+
+    def validate_dims(edited):
+        """Messages for rows of the dimensions table that can't be saved."""
+        errors = []
+        for _, row in edited.iterrows():
+            name = f"{row['Element']} {row['Section']}".strip()
+            for field, label in dim_columns:
+                value = row[label]
+                if pd.isna(value):
+                    errors.append(f"{name}: {label} is required.")
+                elif value < 0:
+                    errors.append(f"{name}: {label} can't be negative.")
+                elif field == "num_shelves" and (value != int(value) or value > 10):
+                    errors.append(f"{name}: Shelves must be a whole number from 0 to 10.")
+        return errors
+
+    # Rooms whose edits could not be applied on this run; nothing is saved.
+    unapplied_rooms = []
+
+    @st.fragment
+    def room_inputs(room, i):
+        element_options = element_options_for(room)
+
+        # Preselect elements if present in existing data
+        preselected_elements = [
+            el for el in (saved_room_data.get(room, {}) or {}).keys()
+            if el in element_options
+        ]
+        selected_elements = st.multiselect(
+            f"Elements",
+            element_options,
+            default=preselected_elements,
+            key=f"elements_{room}_{i}"
+        )
+        # One editable row per element (three for a Bunk Bed); edits are
+        # checked and committed for the whole room when Apply (or
+        # Calculate & Save) is pressed.
+        rows = []
+        for el in selected_elements:
+            sections = bunk_sections if el == "Bunk Bed" else [""]
+            for section in sections:
+                prev = saved_room_data.get(room, {}).get(el, {})
+                if section:
+                    prev = prev.get(section, {})
+                rows.append([el, section] + [
+                    int(prev.get(field, 0)) if field == "num_shelves" else float(prev.get(field, 0.0))
+                    for field, _ in dim_columns
+                ])
+        # Not in a form: the server has to see unapplied edits, so that
+        # Calculate & Save can commit them too.
+        edited = st.data_editor(
+            pd.DataFrame(rows, columns=["Element", "Section"] + [label for _, label in dim_columns]),
+            # New key when the element list changes, so stale cell edits are dropped.
+            key=f"dims_editor_{room}_{i}_{'|'.join(selected_elements)}",
+            hide_index=True,
+            num_rows="fixed",
+            disabled=["Element", "Section"],
+            column_config={
+                "L": st.column_config.NumberColumn("L", min_value=0.0, format="%.2f"),
+                "W": st.column_config.NumberColumn("W", min_value=0.0, format="%.2f"),
+                "H": st.column_config.NumberColumn("H", min_value=0.0, format="%.2f"),
+                "Shelves": st.column_config.NumberColumn("Shelves (same L & W)", min_value=0, max_value=10, step=1),
+            },
+        )
+        pending = edited.values.tolist() != rows
+        submitted = st.button("Apply", key=f"apply_dims_{room}_{i}", disabled=not pending)
+        # The Calculate & Save click is in the session before its button is drawn.
+        submitted = pending and (submitted or st.session_state.get("calculate_save", False))
+
+        errors = validate_dims(edited) if submitted else []
+        if errors:
+            st.error("Not applied:\n\n" + "\n\n".join(errors))
+            unapplied_rooms.append(room)
+            rows_for_room = rows
+        elif submitted:
+            rows_for_room = edited.values.tolist()
+        else:
+            if pending:
+                st.info("Unapplied changes. Press Apply (or Calculate & Save) before switching rooms.")
+            rows_for_room = rows
+
+        element_dims = {}
+        for el, section, length, width, height, shelves in rows_for_room:
+            dims = {
+                "length": float(length),
+                "width": float(width),
+                "height": float(height),
+                "num_shelves": int(shelves)
+            }
+            if el == "Bunk Bed":
+                element_dims.setdefault(el, {})[section] = dims
             else:
-                element_options = bedroom_elements
-
-            # Preselect elements if present in existing data
-            preselected_elements = [
-                el for el in (existing_room_data.get(room, {}) or {}).keys()
-                if el in element_options
-            ]
-            selected_elements = st.multiselect(
-                f"Elements",
-                element_options,
-                default=preselected_elements,
-                key=f"elements_{room}_{i}"
-            )
-            element_dims = {}
-
-            for el in selected_elements:
-                # Special handling for Bunk Bed in bedrooms
-                if el == "Bunk Bed":
-                    st.markdown("**Bunk Bed Sections:**")
-                    bunk_sections = ["Bunk bed Lower", "Bunk bed Upper", "Bunk Bed Extra"]
-                    bunk_dims = {}
-                    bunk_cols = st.columns(3)
-                    for j, section in enumerate(bunk_sections):
-                        with bunk_cols[j]:
-                            st.markdown(f"**{section}**")
-                            prev = existing_room_data.get(room, {}).get(el, {}).get(section, {})
-                            l = st.number_input(f"L", min_value=0.0, value=float(prev.get("length", 0.0)), key=f"{room}_{el}_{section}_length")
-                            w = st.number_input(f"W", min_value=0.0, value=float(prev.get("width", 0.0)), key=f"{room}_{el}_{section}_width")
-                            h = st.number_input(f"H", min_value=0.0, value=float(prev.get("height", 0.0)), key=f"{room}_{el}_{section}_height")
-                            shelves = st.number_input(f"Shelves (same L & W)", min_value=0, max_value=10, value=int(prev.get("num_shelves", 0)), key=f"{room}_{el}_{section}_shelves")
-                            bunk_dims[section] = {
-                                "length": l,
-                                "width": w,
-                                "height": h,
-                                "num_shelves": shelves
-                            }
-                    element_dims[el] = bunk_dims
-                else:
-                    st.markdown(f"**{el}**")
-                    prev = existing_room_data.get(room, {}).get(el, {})
-                    lwh_cols = st.columns(3)
-                    length = lwh_cols[0].number_input(f"L", min_value=0.0, value=float(prev.get("length", 0.0)), key=f"{room}_{el}_length")
-                    width = lwh_cols[1].number_input(f"W", min_value=0.0, value=float(prev.get("width", 0.0)), key=f"{room}_{el}_width")
-                    height = lwh_cols[2].number_input(f"H", min_value=0.0, value=float(prev.get("height", 0.0)), key=f"{room}_{el}_height")
-                    num_shelves = st.number_input(f"Shelves (same L & W)", min_value=0, max_value=10, value=int(prev.get("num_shelves", 0)), key=f"{room}_{el}_shelves")
-                    element_dims[el] = {
-                        "length": length,
-                        "width": width,
-                        "height": height,
-                        "num_shelves": num_shelves
-                    }
-            room_data[room] = element_dims
+                element_dims[el] = dims
+        saved_room_data[room] = element_dims
+        if submitted and not errors:
+            st.success(f"{room} updated.")
+
+    st.subheader("Room Elements and Dimensions")
+    # Only the open room's widgets are built and rerun on edits.
+    room_tabs = st.tabs(all_rooms, key="input_room_tabs", on_change="rerun")
+    for i, (tab, room) in enumerate(zip(room_tabs, all_rooms)):
+        if tab.open:
+            with tab:
+                st.markdown(f"### {room}")
+                room_inputs(room, i)
+
+    room_data = {
+        room: {el: dims for el, dims in (saved_room_data.get(room, {}) or {}).items() if el in element_options_for(room)}
+        for room in all_rooms
+    }
 
     # Calculate total area and sheets
-    if st.button("Calculate & Save"):
+    conflict_key = f"save_conflict|{user}|{project}"
+    if st.session_state.pop(conflict_key, False):
+        st.error("This project was changed in another session, so your changes were not saved. "
+                 "Its saved rooms are shown above.")
+    if st.button("Calculate & Save", key="calculate_save"):
+        if unapplied_rooms:
+            st.error(f"Not saved: fix the dimensions in {', '.join(unapplied_rooms)} first.")
+            st.stop()
         with st.spinner("Saving data..."):
             total_area = 0
             area_details = {}
@@ -195,16 +271,29 @@ def main():
                 project_data["num_bedrooms"] = num_bedrooms
                 project_data["area_details"] = area_details
                 project_data["last_modified"] = pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
-                save_project(user, project, project_data)
+                project_data["version"] = st.session_state[version_key]
+                if not save_project(user, project, project_data):
+                    # Drop this session's edits, so the page shows the saved rooms next.
+                    for key in [key for key in st.session_state if str(key).startswith(("elements_", "dims_editor_"))]:
+                        st.session_state.pop(key)
+                    st.session_state.pop(room_state_key, None)
+                    st.session_state.pop(version_key, None)
+                    st.session_state[conflict_key] = True
+                    st.rerun()
+                st.session_state[version_key] = project_data["version"]
 
-            sheets_required = calculate_sheets_needed(ceil(total_area))
+            # Materials aren't chosen yet, so every panel is cut from one board type.
+            sheet_plan = plan_project({"rooms": room_data}, by_material=False)
             st.session_state['total_area'] = ceil(total_area)
-            st.session_state['sheets_required'] = ceil(sheets_required)
+            st.session_state['sheets_required'] = sheet_plan["sheets"]
+            st.session_state['sheet_waste'] = round(sheet_plan["waste_pct"], 1)
             st.session_state['calculated'] = True
 
     if st.session_state.get('calculated', False):
         st.write(f"**Total Area:** {st.session_state['total_area']} sq ft")
         st.write(f"**Sheets of 8x4 required:** {st.session_state['sheets_required']}")
+        if 'sheet_waste' in st.session_state:
+            st.write(f"**Offcut waste:** {st.session_state['sheet_waste']}%")
 
     # Add navigation button at the bottom
     st.markdown("---")
@@ -212,4 +301,5 @@ def main():
         st.switch_page("pages/02_MaterialSelection.py")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    metrics.end_run()
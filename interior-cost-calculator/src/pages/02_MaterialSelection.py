@@ -1,8 +1,10 @@
 import streamlit as st
 import pandas as pd
-from data.material_costs import material_costs, material_costs_hdmr, material_costs_mdf, laminate
-from utils.calculations import shutter_area, side_area, top_bottom_area, back_panel_area, shelf_area
+from data.material_costs import get_catalog, laminate
+from utils.cost_engine import IncrementalCosts, row_inputs
+from utils.project_model import NONE, ProjectModel
 from utils.db import save_project, load_project
+from utils import metrics, profiling
 
 st.set_page_config(initial_sidebar_state="collapsed")
 hide_sidebar_style = """
@@ -12,6 +14,8 @@ hide_sidebar_style = """
     </style>
 """
 st.markdown(hide_sidebar_style, unsafe_allow_html=True)
+metrics.begin_run("Material Selection")
+profiling.begin_run(st.session_state.get(profiling.SESSION_FLAG, False))
 
 if st.button("🏠 Home"):
     st.session_state.pop("project", None)
@@ -40,370 +44,311 @@ existing_materials = project_data.get("element_materials", {})
 
 st.title("Material Selection (Element-wise)")
 
-material_type_map = {
-    "Plywood": material_costs,
-    "HDHMR": material_costs_hdmr,
-    "MDF": material_costs_mdf
-}
-material_types = list(material_type_map.keys())
+catalog = get_catalog()
+option_index = catalog.option_index
+material_types = list(option_index.material_types)
+laminate_types = list(laminate["Laminate"].keys())
+mat_labels = [("shutter", "Shutter"), ("carcus", "Carcus"), ("laminate", "Laminate")]
+prop_labels = ["Type", "Grade", "Brand", "Model", "Thickness", "Price/sft"]
+board_levels = [("grade", "Grade"), ("brand", "Brand"), ("model", "Model"), ("thickness", "Thickness")]
 
+# Saved against the version this session started editing, so a save made
+# in another session in between is not overwritten.
+version_key = f"project_version|{user}|{project}"
 if "element_materials" not in st.session_state:
     st.session_state["element_materials"] = existing_materials.copy()
+    st.session_state[version_key] = project_data.get("version", 0)
+st.session_state.setdefault(version_key, project_data.get("version", 0))
 element_materials = st.session_state["element_materials"]
 
+
+def choose(column, label, options, key, saved):
+    """Selectbox that starts on the saved choice when it is still offered.
+
+    Without a column no widget is drawn and that starting choice is returned.
+    """
+    index = options.index(saved) if saved in options else 0
+    if column is None:
+        return options[index]
+    return column.selectbox(label, options, key=key, index=index)
+
+
+def select_laminate(cols, key_prefix, mat, mat_label, saved):
+    laminate_type = choose(cols and cols[0], f"{mat_label} Type", laminate_types, f"{key_prefix}_{mat}_type", saved.get("type"))
+    thicknesses = list(laminate["Laminate"][laminate_type].keys())
+    if cols:
+        cols[1].markdown("-")
+        cols[2].markdown("-")
+        cols[3].markdown("-")
+    laminate_thickness = choose(cols and cols[4], f"{mat_label} Thickness", thicknesses, f"{key_prefix}_{mat}_thickness", saved.get("thickness"))
+    laminate_rate = laminate["Laminate"][laminate_type][laminate_thickness]
+    if cols:
+        cols[5].info(f"₹{laminate_rate}/sft")
+    return {
+        "type": laminate_type,
+        "thickness": laminate_thickness,
+        "rate": laminate_rate
+    }
+
+
+def select_board(cols, key_prefix, mat, mat_label, saved):
+    mat_type = choose(cols and cols[0], f"{mat_label} Type", material_types, f"{key_prefix}_{mat}_type", saved.get("type"))
+    selection = {"type": mat_type}
+    choices = ()
+    # Each level only offers what the catalog has under the choices made so far.
+    for col, (field, level_label) in enumerate(board_levels, start=1):
+        options = list(option_index.options(mat_type, *choices))
+        if options:
+            value = choose(cols and cols[col], f"{mat_label} {level_label}", options, f"{key_prefix}_{mat}_{field}", saved.get(field))
+        else:
+            value = "-"
+            if cols:
+                cols[col].markdown("-")
+        selection[field] = value
+        choices += (value,)
+    per_sft_price = option_index.price(mat_type, *choices)
+    if per_sft_price is None:
+        per_sft_price = 0
+        if cols:
+            cols[5].warning("No price found")
+    elif cols:
+        cols[5].info(f"₹{per_sft_price}/sft")
+    selection["rate"] = per_sft_price
+    return selection
+
+
+def material_selection(row_id, show=True):
+    """Material widgets of one element; ``show=False`` just settles its defaults."""
+    _, _, key_prefix, _, dims = layout[row_id]
+    cols = st.columns(len(prop_labels)) if show else None
+    with metrics.span("material_options"):
+        for mat, mat_label in mat_labels:
+            saved = element_materials.get(key_prefix, {}).get(mat, {})
+            select = select_laminate if mat == "laminate" else select_board
+            element_materials.setdefault(key_prefix, {})[mat] = select(cols, key_prefix, mat, mat_label, saved)
+    st.session_state["element_materials"] = element_materials
+    cost_memo.set_row(row_id, row_inputs(dims, element_materials[key_prefix]))
+
+
+def build_layout(project_data):
+    """Rows of a project and the row ids of each room, from its ProjectModel.
+
+    Each row, addressed by its index in the model, is (room, expander
+    label, element_materials key, is section, dimensions). Built once per
+    saved version of the project, not on every rerun.
+    """
+    model = ProjectModel.from_dict(project_data)
+    rows = [
+        (model.rooms[row.room], model.row_label(row), model.row_key(row), row.section != NONE, row.dims())
+        for row in model.rows
+    ]
+    room_rows = {room: [] for room in model.rooms.names}
+    for row_id, row in enumerate(rows):
+        room_rows[row[0]].append(row_id)
+    return rows, room_rows
+
+
+def current_costs():
+    """Cost engine results for the current selections, aligned with ``layout``."""
+    with metrics.span("cost_compute"):
+        return cost_memo.flush()
+
+
+@st.fragment
+def room_materials(room, row_ids, expanded):
+    # Runs on its own when one of this room's widgets changes; only the
+    # elements whose selections changed are repriced.
+    for row_id in row_ids:
+        _, label, _, is_section, _ = layout[row_id]
+        with st.expander(label, expanded=expanded):
+            if is_section:
+                st.markdown("**Material Selection**")
+            material_selection(row_id)
+    current_costs()
+    if summary_drawn and st.session_state.get(breakup_key, (None,))[0] != cost_memo.version:
+        # A fragment rerun changed the totals; redraw the page so the cost
+        # summary below shows them too.
+        st.rerun(scope="app")
+    room_cost, project_cost = st.columns(2)
+    room_cost.metric(f"{room} Material Cost (₹)", round(cost_memo.total("material_cost", row_ids), 2))
+    project_cost.metric("Project Grand Total (₹)", round(cost_memo.totals["material_cost"], 2))
+
+
+def spec_label(selection):
+    """Short text for a material selection, e.g. "Plywood BWP AustinPly Club Plus 6MM"."""
+    parts = [selection.get(field, "") for field in ("type", "grade", "brand", "model", "thickness")]
+    return " ".join(str(part) for part in parts if part not in ("", "-", None))
+
+
+@st.fragment
+def bulk_assign():
+    # Picking rows and a spec reruns only this block; Apply reruns the page.
+    grid = pd.DataFrame({
+        "Room": [room for room, _, _, _, _ in layout],
+        "Element": [label for _, label, _, _, _ in layout],
+        **{
+            mat_label: [spec_label(element_materials.get(key_prefix, {}).get(mat, {})) for _, _, key_prefix, _, _ in layout]
+            for mat, mat_label in mat_labels
+        },
+    })
+    picked = st.dataframe(
+        grid,
+        key="bulk_material_rows",
+        hide_index=True,
+        on_select="rerun",
+        selection_mode="multi-row",
+        use_container_width=True,
+    )
+    selected_rows = picked.selection.rows
+
+    slot_labels = dict(mat_labels)
+    mat = st.selectbox("Material slot", list(slot_labels), format_func=slot_labels.get, key="bulk_slot")
+    cols = st.columns(len(prop_labels))
+    select = select_laminate if mat == "laminate" else select_board
+    spec = select(cols, "bulk", mat, slot_labels[mat], {})
+
+    scope = st.radio(
+        "Apply to",
+        ["Selected rows", "All in room", "All in project"],
+        horizontal=True,
+        key="bulk_scope",
+    )
+    if scope == "All in room":
+        target_room = st.selectbox("Room", list(room_rows), key="bulk_room")
+        targets = [layout[row_id][2] for row_id in room_rows[target_room]]
+    elif scope == "All in project":
+        targets = [key_prefix for _, _, key_prefix, _, _ in layout]
+    else:
+        targets = [layout[row][2] for row in selected_rows]
+
+    if st.button(f"Apply {slot_labels[mat]} to {len(targets)} element(s)", disabled=not targets):
+        for key_prefix in targets:
+            element_materials.setdefault(key_prefix, {})[mat] = dict(spec)
+            # Drop the element's own widget state so it shows the new choice.
+            for field in ("type", "grade", "brand", "model", "thickness"):
+                st.session_state.pop(f"{key_prefix}_{mat}_{field}", None)
+        st.session_state["element_materials"] = element_materials
+        st.rerun(scope="app")
+
+
+# Results are kept in the session and only elements whose dimensions or
+# rates changed since the last rerun are recomputed.
+memo_key = f"cost_memo|{user}|{project}"
+if memo_key not in st.session_state:
+    st.session_state[memo_key] = IncrementalCosts()
+cost_memo = st.session_state[memo_key]
+# Element-wise breakup as (cost_memo.version, DataFrame), rebuilt by
+# cost_summary() when the costs change.
+breakup_key = f"cost_breakup|{user}|{project}"
+# Set once the whole page has been drawn; only fragment reruns see it.
+summary_drawn = False
+
 # --- Group/Ungroup Toggle ---
 group_by_room = st.toggle("Show Room-wise Details (Ungroup)", value=True)
 
-for room, elements in project_data.get("rooms", {}).items():
-    with st.expander(f"Room: {room}", expanded=group_by_room):
-        for el_name, el in elements.items():
-            if el_name == "Bunk Bed" and isinstance(el, dict):
-                for section_name, section in el.items():
-                    with st.expander(f"{el_name} - {section_name}", expanded=True):
-                        key_prefix = f"{room}|{el_name}|{section_name}"
-                        st.markdown("**Material Selection**")
-                        mat_labels = [("shutter", "Shutter"), ("carcus", "Carcus"), ("laminate", "Laminate")]
-                        prop_labels = ["Type", "Grade", "Brand", "Model", "Thickness", "Price/sft"]
-                        cols = st.columns(len(prop_labels))
-                        for idx, (mat, mat_label) in enumerate(mat_labels):
-                            if mat == "laminate":
-                                laminate_type = cols[0].selectbox(
-                                    f"{mat_label} Type",
-                                    list(laminate["Laminate"].keys()),
-                                    key=f"{key_prefix}_{mat}_type",
-                                    index=list(laminate["Laminate"].keys()).index(
-                                        element_materials.get(key_prefix, {}).get(mat, {}).get("type", list(laminate["Laminate"].keys())[0])
-                                    ) if element_materials.get(key_prefix, {}).get(mat, {}).get("type", list(laminate["Laminate"].keys())[0]) in list(laminate["Laminate"].keys()) else 0
-                                )
-                                cols[1].markdown("-")
-                                cols[2].markdown("-")
-                                cols[3].markdown("-")
-                                laminate_thickness = cols[4].selectbox(
-                                    f"{mat_label} Thickness",
-                                    list(laminate["Laminate"][laminate_type].keys()),
-                                    key=f"{key_prefix}_{mat}_thickness",
-                                    index=list(laminate["Laminate"][laminate_type].keys()).index(
-                                        element_materials.get(key_prefix, {}).get(mat, {}).get("thickness", list(laminate["Laminate"][laminate_type].keys())[0])
-                                    ) if element_materials.get(key_prefix, {}).get(mat, {}).get("thickness", list(laminate["Laminate"][laminate_type].keys())[0]) in list(laminate["Laminate"][laminate_type].keys()) else 0
-                                )
-                                laminate_rate = laminate["Laminate"][laminate_type][laminate_thickness]
-                                cols[5].info(f"₹{laminate_rate}/sft")
-                                element_materials.setdefault(key_prefix, {})[mat] = {
-                                    "type": laminate_type,
-                                    "thickness": laminate_thickness,
-                                    "rate": laminate_rate
-                                }
-                                st.session_state["element_materials"] = element_materials
-                            else:
-                                mat_type = cols[0].selectbox(
-                                    f"{mat_label} Type",
-                                    material_types,
-                                    key=f"{key_prefix}_{mat}_type",
-                                    index=material_types.index(
-                                        element_materials.get(key_prefix, {}).get(mat, {}).get("type", material_types[0])
-                                    ) if element_materials.get(key_prefix, {}).get(mat, {}).get("type", material_types[0]) in material_types else 0
-                                )
-                                df = material_type_map[mat_type]
-                                grades = df["Grade"].dropna().unique().tolist()
-                                if not grades or (mat_type == "MDF" and (len(grades) == 1 and (grades[0] == "" or pd.isna(grades[0])))):
-                                    grade = "-"
-                                    cols[1].markdown("-")
-                                else:
-                                    grade = cols[1].selectbox(
-                                        f"{mat_label} Grade",
-                                        grades,
-                                        key=f"{key_prefix}_{mat}_grade",
-                                        index=grades.index(
-                                            element_materials.get(key_prefix, {}).get(mat, {}).get("grade", grades[0])
-                                        ) if element_materials.get(key_prefix, {}).get(mat, {}).get("grade", grades[0]) in grades else 0
-                                    )
-                                filtered_df = df[df["Grade"] == grade] if grade != "-" else df
-                                brands = filtered_df["Brand"].dropna().unique().tolist()
-                                if brands:
-                                    brand = cols[2].selectbox(
-                                        f"{mat_label} Brand",
-                                        brands,
-                                        key=f"{key_prefix}_{mat}_brand",
-                                        index=brands.index(
-                                            element_materials.get(key_prefix, {}).get(mat, {}).get("brand", brands[0])
-                                        ) if element_materials.get(key_prefix, {}).get(mat, {}).get("brand", brands[0]) in brands else 0
-                                    )
-                                else:
-                                    brand = "-"
-                                    cols[2].markdown("-")
-                                filtered_df = filtered_df[filtered_df["Brand"] == brand] if brand != "-" else filtered_df
-                                models = filtered_df["Model"].dropna().unique().tolist()
-                                if models:
-                                    model = cols[3].selectbox(
-                                        f"{mat_label} Model",
-                                        models,
-                                        key=f"{key_prefix}_{mat}_model",
-                                        index=models.index(
-                                            element_materials.get(key_prefix, {}).get(mat, {}).get("model", models[0])
-                                        ) if element_materials.get(key_prefix, {}).get(mat, {}).get("model", models[0]) in models else 0
-                                    )
-                                else:
-                                    model = "-"
-                                    cols[3].markdown("-")
-                                filtered_df = filtered_df[filtered_df["Model"] == model] if model != "-" else filtered_df
-                                thicknesses = filtered_df["Thickness"].dropna().unique().tolist()
-                                if thicknesses:
-                                    thickness = cols[4].selectbox(
-                                        f"{mat_label} Thickness",
-                                        thicknesses,
-                                        key=f"{key_prefix}_{mat}_thickness",
-                                        index=thicknesses.index(
-                                            element_materials.get(key_prefix, {}).get(mat, {}).get("thickness", thicknesses[0])
-                                        ) if element_materials.get(key_prefix, {}).get(mat, {}).get("thickness", thicknesses[0]) in thicknesses else 0
-                                    )
-                                else:
-                                    thickness = "-"
-                                    cols[4].markdown("-")
-                                filtered_df = filtered_df[filtered_df["Thickness"] == thickness] if thickness != "-" else filtered_df
-                                if not filtered_df.empty and "Per sft Price" in filtered_df.columns:
-                                    per_sft_price = float(filtered_df.iloc[0]["Per sft Price"])
-                                    cols[5].info(f"₹{per_sft_price}/sft")
-                                else:
-                                    per_sft_price = 0
-                                    cols[5].warning("No price found")
-                                element_materials.setdefault(key_prefix, {})[mat] = {
-                                    "type": mat_type,
-                                    "grade": grade,
-                                    "brand": brand,
-                                    "model": model,
-                                    "thickness": thickness,
-                                    "rate": per_sft_price
-                                }
-                                st.session_state["element_materials"] = element_materials
-            else:
-                with st.expander(f"{el_name}", expanded=True):
-                    key_prefix = f"{room}|{el_name}"
-                    mat_labels = [("shutter", "Shutter"), ("carcus", "Carcus"), ("laminate", "Laminate")]
-                    prop_labels = ["Type", "Grade", "Brand", "Model", "Thickness", "Price/sft"]
-                    cols = st.columns(len(prop_labels))
-                    for idx, (mat, mat_label) in enumerate(mat_labels):
-                        if mat == "laminate":
-                            laminate_type = cols[0].selectbox(
-                                f"{mat_label} Type",
-                                list(laminate["Laminate"].keys()),
-                                key=f"{key_prefix}_{mat}_type",
-                                index=list(laminate["Laminate"].keys()).index(
-                                    element_materials.get(key_prefix, {}).get(mat, {}).get("type", list(laminate["Laminate"].keys())[0])
-                                ) if element_materials.get(key_prefix, {}).get(mat, {}).get("type", list(laminate["Laminate"].keys())[0]) in list(laminate["Laminate"].keys()) else 0
-                            )
-                            cols[1].markdown("-")
-                            cols[2].markdown("-")
-                            cols[3].markdown("-")
-                            laminate_thickness = cols[4].selectbox(
-                                f"{mat_label} Thickness",
-                                list(laminate["Laminate"][laminate_type].keys()),
-                                key=f"{key_prefix}_{mat}_thickness",
-                                index=list(laminate["Laminate"][laminate_type].keys()).index(
-                                    element_materials.get(key_prefix, {}).get(mat, {}).get("thickness", list(laminate["Laminate"][laminate_type].keys())[0])
-                                ) if element_materials.get(key_prefix, {}).get(mat, {}).get("thickness", list(laminate["Laminate"][laminate_type].keys())[0]) in list(laminate["Laminate"][laminate_type].keys()) else 0
-                            )
-                            laminate_rate = laminate["Laminate"][laminate_type][laminate_thickness]
-                            cols[5].info(f"₹{laminate_rate}/sft")
-                            element_materials.setdefault(key_prefix, {})[mat] = {
-                                "type": laminate_type,
-                                "thickness": laminate_thickness,
-                                "rate": laminate_rate
-                            }
-                            st.session_state["element_materials"] = element_materials
-                        else:
-                            mat_type = cols[0].selectbox(
-                                f"{mat_label} Type",
-                                material_types,
-                                key=f"{key_prefix}_{mat}_type",
-                                index=material_types.index(
-                                    element_materials.get(key_prefix, {}).get(mat, {}).get("type", material_types[0])
-                                ) if element_materials.get(key_prefix, {}).get(mat, {}).get("type", material_types[0]) in material_types else 0
-                            )
-                            df = material_type_map[mat_type]
-                            grades = df["Grade"].dropna().unique().tolist()
-                            if not grades or (mat_type == "MDF" and (len(grades) == 1 and (grades[0] == "" or pd.isna(grades[0])))):
-                                grade = "-"
-                                cols[1].markdown("-")
-                            else:
-                                grade = cols[1].selectbox(
-                                    f"{mat_label} Grade",
-                                    grades,
-                                    key=f"{key_prefix}_{mat}_grade",
-                                    index=grades.index(
-                                        element_materials.get(key_prefix, {}).get(mat, {}).get("grade", grades[0])
-                                    ) if element_materials.get(key_prefix, {}).get(mat, {}).get("grade", grades[0]) in grades else 0
-                                )
-                            filtered_df = df[df["Grade"] == grade] if grade != "-" else df
-                            brands = filtered_df["Brand"].dropna().unique().tolist()
-                            if brands:
-                                brand = cols[2].selectbox(
-                                    f"{mat_label} Brand",
-                                    brands,
-                                    key=f"{key_prefix}_{mat}_brand",
-                                    index=brands.index(
-                                        element_materials.get(key_prefix, {}).get(mat, {}).get("brand", brands[0])
-                                    ) if element_materials.get(key_prefix, {}).get(mat, {}).get("brand", brands[0]) in brands else 0
-                                )
-                            else:
-                                brand = "-"
-                                cols[2].markdown("-")
-                            filtered_df = filtered_df[filtered_df["Brand"] == brand] if brand != "-" else filtered_df
-                            models = filtered_df["Model"].dropna().unique().tolist()
-                            if models:
-                                model = cols[3].selectbox(
-                                    f"{mat_label} Model",
-                                    models,
-                                    key=f"{key_prefix}_{mat}_model",
-                                    index=models.index(
-                                        element_materials.get(key_prefix, {}).get(mat, {}).get("model", models[0])
-                                    ) if element_materials.get(key_prefix, {}).get(mat, {}).get("model", models[0]) in models else 0
-                                )
-                            else:
-                                model = "-"
-                                cols[3].markdown("-")
-                            filtered_df = filtered_df[filtered_df["Model"] == model] if model != "-" else filtered_df
-                            thicknesses = filtered_df["Thickness"].dropna().unique().tolist()
-                            if thicknesses:
-                                thickness = cols[4].selectbox(
-                                    f"{mat_label} Thickness",
-                                    thicknesses,
-                                    key=f"{key_prefix}_{mat}_thickness",
-                                    index=thicknesses.index(
-                                        element_materials.get(key_prefix, {}).get(mat, {}).get("thickness", thicknesses[0])
-                                    ) if element_materials.get(key_prefix, {}).get(mat, {}).get("thickness", thicknesses[0]) in thicknesses else 0
-                                )
-                            else:
-                                thickness = "-"
-                                cols[4].markdown("-")
-                            filtered_df = filtered_df[filtered_df["Thickness"] == thickness] if thickness != "-" else filtered_df
-                            if not filtered_df.empty and "Per sft Price" in filtered_df.columns:
-                                per_sft_price = float(filtered_df.iloc[0]["Per sft Price"])
-                                cols[5].info(f"₹{per_sft_price}/sft")
-                            else:
-                                per_sft_price = 0
-                                cols[5].warning("No price found")
-                            element_materials.setdefault(key_prefix, {})[mat] = {
-                                "type": mat_type,
-                                "grade": grade,
-                                "brand": brand,
-                                "model": model,
-                                "thickness": thickness,
-                                "rate": per_sft_price
-                            }
-                            st.session_state["element_materials"] = element_materials
+# Rows are addressed by their id in the project model; the memo keeps its
+# results in the same order.
+layout_key = f"material_layout|{user}|{project}"
+project_version = project_data.get("version", 0)
+if st.session_state.get(layout_key, (None,))[0] != project_version:
+    st.session_state[layout_key] = (project_version,) + build_layout(project_data)
+    # Row ids may now name other elements; reprice them all.
+    cost_memo.retain(())
+_, layout, room_rows = st.session_state[layout_key]
+cost_memo.retain(range(len(layout)))
+# Only the open room's widgets are built; the other rooms keep their
+# selections (or get the defaults their widgets would start on).
+if room_rows:
+    room_tabs = st.tabs([f"Room: {room}" for room in room_rows], key="material_room_tabs", on_change="rerun")
+    # Settle the closed rooms first, so the open room's totals include them.
+    for tab, row_ids in zip(room_tabs, room_rows.values()):
+        if not tab.open:
+            for row_id in row_ids:
+                material_selection(row_id, show=False)
+    for tab, (room, row_ids) in zip(room_tabs, room_rows.items()):
+        if tab.open:
+            with tab:
+                room_materials(room, row_ids, group_by_room)
+
+    with st.expander("Bulk assign materials", expanded=False, key="bulk_assign_open", on_change="rerun") as bulk_panel:
+        if bulk_panel.open:
+            bulk_assign()
 
 # --- Save per-element materials to JSON only when user clicks Save ---
 st.markdown("---")
+conflict_key = f"save_conflict|{user}|{project}"
 if st.button("Save Materials"):
     project_data["element_materials"] = st.session_state["element_materials"]
-    save_project(user, project, project_data)
-    st.success("Materials saved successfully!")
+    project_data["version"] = st.session_state[version_key]
+    if save_project(user, project, project_data):
+        st.session_state[version_key] = project_data["version"]
+        st.success("Materials saved successfully!")
+    else:
+        # Drop this session's selections, so the page shows the saved ones next.
+        for key_prefix in element_materials:
+            for mat, _ in mat_labels:
+                for field in ("type", "grade", "brand", "model", "thickness"):
+                    st.session_state.pop(f"{key_prefix}_{mat}_{field}", None)
+        for key in ("element_materials", version_key, memo_key, breakup_key):
+            st.session_state.pop(key, None)
+        st.session_state[conflict_key] = True
+        st.rerun()
+if st.session_state.pop(conflict_key, False):
+    st.error("This project was changed in another session, so your selections were not saved. "
+             "Its saved materials are shown above.")
+
+@st.fragment
+def cost_summary():
+    st.markdown("### Cost Summary")
+    costs = current_costs()
+    project_totals = cost_memo.totals
+    total_shutter_area = project_totals["shutter_area"]
+    total_carcus_area = project_totals["carcus_area"]
+    total_laminate_area = project_totals["laminate_area"]
+    total_shutter_cost = project_totals["shutter_cost"]
+    total_carcus_cost = project_totals["carcus_cost"]
+    total_laminate_cost = project_totals["laminate_cost"]
+    if st.session_state.get(breakup_key, (None,))[0] != cost_memo.version:
+        st.session_state[breakup_key] = (cost_memo.version, pd.DataFrame({
+            "Room": [room for room, _, _, _, _ in layout],
+            "Element": [label for _, label, _, _, _ in layout],
+            "Shutter Area": costs["shutter_area"],
+            "Carcus Area": costs["carcus_area"],
+            "Laminate Area": costs["laminate_area"],
+            "Shutter Cost": costs["shutter_cost"],
+            "Carcus Cost": costs["carcus_cost"],
+            "Laminate Cost": costs["laminate_cost"]
+        }))
+    df_breakup = st.session_state[breakup_key][1]
+
+    # --- Cost Summary Side by Side ---
+    cost1, cost2, cost3, cost4 = st.columns(4)
+    with cost1:
+        st.metric("Total Shutter Area (sq.ft)", round(total_shutter_area, 2))
+        st.metric("Shutter Cost (₹)", round(total_shutter_cost, 2))
+    with cost2:
+        st.metric("Total Carcus Area (sq.ft)", round(total_carcus_area, 2))
+        st.metric("Carcus Cost (₹)", round(total_carcus_cost, 2))
+    with cost3:
+        st.metric("Total Laminate Area (sq.ft)", round(total_laminate_area, 2))
+        st.metric("Laminate Cost (₹)", round(total_laminate_cost, 2))
+    with cost4:
+        st.metric("Grand Total (₹)", round(total_shutter_cost + total_carcus_cost + total_laminate_cost, 2))
+
+    st.markdown("### Element-wise Cost Breakup")
+    if not df_breakup.empty:
+        with metrics.span("render_table"):
+            st.dataframe(df_breakup, use_container_width=True)
+    else:
+        st.info("No element-wise cost breakup to display.")
+
 
 # --- Calculate total areas and costs ---
-total_shutter_area = 0
-total_carcus_area = 0
-total_laminate_area = 0
-total_shutter_cost = 0
-total_carcus_cost = 0
-total_laminate_cost = 0
-elements_cost_breakup = []
-
-for room, elements in project_data.get("rooms", {}).items():
-    for el_name, el in elements.items():
-        if el_name == "Bunk Bed" and isinstance(el, dict):
-            for section_name, section in el.items():
-                key_prefix = f"{room}|{el_name}|{section_name}"
-                mat_data = element_materials.get(key_prefix, {})
-                h = section.get("height", 0)
-                l = section.get("length", 0)
-                w = section.get("width", 0)
-                shelves = section.get("num_shelves", 0)
-                shutter_area_val = shutter_area(h, l)
-                carcus_area_val = side_area(w, h) + top_bottom_area(l, w) + back_panel_area(h, l) + shelf_area(shelves, w, l)
-                laminate_area_val = shutter_area_val + carcus_area_val
-                shutter_cost = shutter_area_val * mat_data.get("shutter", {}).get("rate", 0)
-                carcus_cost = carcus_area_val * mat_data.get("carcus", {}).get("rate", 0)
-                laminate_cost = laminate_area_val * mat_data.get("laminate", {}).get("rate", 0)
-                total_shutter_area += shutter_area_val
-                total_carcus_area += carcus_area_val
-                total_laminate_area += laminate_area_val
-                total_shutter_cost += shutter_cost
-                total_carcus_cost += carcus_cost
-                total_laminate_cost += laminate_cost
-                elements_cost_breakup.append({
-                    "Room": room,
-                    "Element": f"{el_name} - {section_name}",
-                    "Shutter Area": shutter_area_val,
-                    "Carcus Area": carcus_area_val,
-                    "Laminate Area": laminate_area_val,
-                    "Shutter Cost": shutter_cost,
-                    "Carcus Cost": carcus_cost,
-                    "Laminate Cost": laminate_cost
-                })
-        else:
-            key_prefix = f"{room}|{el_name}"
-            mat_data = element_materials.get(key_prefix, {})
-            h = el.get("height", 0)
-            l = el.get("length", 0)
-            w = el.get("width", 0)
-            shelves = el.get("num_shelves", 0)
-            shutter_area_val = shutter_area(h, l)
-            carcus_area_val = side_area(w, h) + top_bottom_area(l, w) + back_panel_area(h, l) + shelf_area(shelves, w, l)
-            laminate_area_val = shutter_area_val + carcus_area_val
-            shutter_cost = shutter_area_val * mat_data.get("shutter", {}).get("rate", 0)
-            carcus_cost = carcus_area_val * mat_data.get("carcus", {}).get("rate", 0)
-            laminate_cost = laminate_area_val * mat_data.get("laminate", {}).get("rate", 0)
-            total_shutter_area += shutter_area_val
-            total_carcus_area += carcus_area_val
-            total_laminate_area += laminate_area_val
-            total_shutter_cost += shutter_cost
-            total_carcus_cost += carcus_cost
-            total_laminate_cost += laminate_cost
-            elements_cost_breakup.append({
-                "Room": room,
-                "Element": el_name,
-                "Shutter Area": shutter_area_val,
-                "Carcus Area": carcus_area_val,
-                "Laminate Area": laminate_area_val,
-                "Shutter Cost": shutter_cost,
-                "Carcus Cost": carcus_cost,
-                "Laminate Cost": laminate_cost
-            })
-
-# --- Cost Summary Side by Side ---
-st.markdown("### Cost Summary")
-cost1, cost2, cost3, cost4 = st.columns(4)
-with cost1:
-    st.metric("Total Shutter Area (sq.ft)", round(total_shutter_area, 2))
-    st.metric("Shutter Cost (₹)", round(total_shutter_cost, 2))
-with cost2:
-    st.metric("Total Carcus Area (sq.ft)", round(total_carcus_area, 2))
-    st.metric("Carcus Cost (₹)", round(total_carcus_cost, 2))
-with cost3:
-    st.metric("Total Laminate Area (sq.ft)", round(total_laminate_area, 2))
-    st.metric("Laminate Cost (₹)", round(total_laminate_cost, 2))
-with cost4:
-    st.metric("Grand Total (₹)", round(total_shutter_cost + total_carcus_cost + total_laminate_cost, 2))
-
-st.markdown("### Element-wise Cost Breakup")
-df_breakup = pd.DataFrame(elements_cost_breakup)
-if not df_breakup.empty:
-    st.dataframe(
-        df_breakup[
-            [
-                "Room", "Element",
-                "Shutter Area", "Carcus Area", "Laminate Area",
-                "Shutter Cost", "Carcus Cost", "Laminate Cost"
-            ] + [col for col in df_breakup.columns if col not in [
-                "Room", "Element", "Shutter Area", "Carcus Area", "Laminate Area",
-                "Shutter Cost", "Carcus Cost", "Laminate Cost"
-            ]]
-        ],
-        use_container_width=True
-    )
-else:
-    st.info("No element-wise cost breakup to display.")
+cost_summary()
+summary_drawn = True
 
 st.markdown("---")
 if st.button("Next: Go to Summary"):
-    st.switch_page("pages/03_Summary.py")
\ No newline at end of file
+    st.switch_page("pages/03_Summary.py")
+metrics.end_run()
+profiling.end_run("Material Selection", user, project)
@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from utils.db import load_project
+from quoting import ELEMENT_COLUMNS, quote
+from utils import metrics, profiling
 
 
 st.set_page_config(initial_sidebar_state="collapsed")
@@ -12,6 +14,8 @@ hide_sidebar_style = """
     </style>
 """
 st.markdown(hide_sidebar_style, unsafe_allow_html=True)
+metrics.begin_run("Summary")
+profiling.begin_run(st.session_state.get(profiling.SESSION_FLAG, False))
 
 if st.button("🏠 Home"):
     st.session_state.pop("project", None)
@@ -33,154 +37,11 @@ if not project_data:
     st.error("Project data not found.")
     st.stop()
 
-element_materials = project_data.get("element_materials", {})
-rooms = project_data.get("rooms", {})
-area_details = project_data.get("area_details", {})
-
-elements_data = []
-total_area = 0
-total_cost = 0
-
-for room, elements in rooms.items():
-    for el_name, el in elements.items():
-        # Handle Bunk Bed sections
-        if el_name == "Bunk Bed" and isinstance(el, dict):
-            for section_name, section in el.items():
-                key_prefix = f"{room}|{el_name}|{section_name}"
-                area_info = area_details.get(room, {}).get(el_name, {}).get(section_name, {})
-                mat_data = element_materials.get(key_prefix, {})
-                shutter = mat_data.get("shutter", {})
-                carcus = mat_data.get("carcus", {})
-                laminate_ = mat_data.get("laminate", {})
-
-                sa = area_info.get("shutter_area", 0)
-                sda = area_info.get("side_area", 0)
-                tba = area_info.get("top_bottom_area", 0)
-                bpa = area_info.get("back_panel_area", 0)
-                sha = area_info.get("shelf_area", 0)
-                ta = area_info.get("total_area", 0)
-
-                shutter_rate = shutter.get("rate", 0)
-                carcus_rate = carcus.get("rate", 0)
-                laminate_rate = laminate_.get("rate", 0)
-
-                shutter_cost = sa * shutter_rate
-                carcus_cost = (sda + tba + bpa + sha) * carcus_rate
-                laminate_cost = ta * laminate_rate
-                el_total_cost = shutter_cost + carcus_cost + laminate_cost
-
-                cost_per_sft = el_total_cost / ta if ta else 0
-
-                factory_binding = 340 * section.get("length", 0) * section.get("height", 0)
-                carpenter = 300 * section.get("length", 0) * section.get("height", 0)
-
-                SHEET_SQFT = 32
-                total_sheets = ta / SHEET_SQFT if SHEET_SQFT else 0
-
-                elements_data.append({
-                    "Room": room,
-                    "Element": f"{el_name} - {section_name}",
-                    "Height": section.get("height", 0),
-                    "Length": section.get("length", 0),
-                    "Width": section.get("width", 0),
-                    "No of Shelves": section.get("num_shelves", 0),
-                    "Shutter Material": " ".join([
-                        str(shutter.get("brand", "")),
-                        str(shutter.get("model", "")),
-                        str(shutter.get("grade", "")),
-                        str(shutter.get("thickness", ""))
-                    ]).strip(),
-                    "Carcus Material": " ".join([
-                        str(carcus.get("brand", "")),
-                        str(carcus.get("model", "")),
-                        str(carcus.get("grade", "")),
-                        str(carcus.get("thickness", ""))
-                    ]).strip(),
-                    "Laminate Type": " ".join([
-                        str(laminate_.get("material_type", "")),
-                        str(laminate_.get("brand", "")),
-                        str(laminate_.get("model", "")),
-                        str(laminate_.get("grade", "")),
-                        str(laminate_.get("thickness", ""))
-                    ]).strip(),
-                    "Total Sheets": round(total_sheets, 2),
-                    "Total Area (sft)": round(ta, 2),
-                    "Material Cost (₹)": round(el_total_cost, 2),
-                    "Cost per sft (₹)": round(cost_per_sft, 2),
-                    "Factory Binding (220+120 Install) (₹)": round(factory_binding, 2),
-                    "Carpenter (300) (₹)": round(carpenter, 2)
-                })
-
-                total_area += ta
-                total_cost += el_total_cost
-        else:
-            key_prefix = f"{room}|{el_name}"
-            area_info = area_details.get(room, {}).get(el_name, {})
-            mat_data = element_materials.get(key_prefix, {})
-            shutter = mat_data.get("shutter", {})
-            carcus = mat_data.get("carcus", {})
-            laminate_ = mat_data.get("laminate", {})
-
-            sa = area_info.get("shutter_area", 0)
-            sda = area_info.get("side_area", 0)
-            tba = area_info.get("top_bottom_area", 0)
-            bpa = area_info.get("back_panel_area", 0)
-            sha = area_info.get("shelf_area", 0)
-            ta = area_info.get("total_area", 0)
-
-            shutter_rate = shutter.get("rate", 0)
-            carcus_rate = carcus.get("rate", 0)
-            laminate_rate = laminate_.get("rate", 0)
-
-            shutter_cost = sa * shutter_rate
-            carcus_cost = (sda + tba + bpa + sha) * carcus_rate
-            laminate_cost = ta * laminate_rate
-            el_total_cost = shutter_cost + carcus_cost + laminate_cost
-
-            cost_per_sft = el_total_cost / ta if ta else 0
-
-            factory_binding = 340 * el.get("length", 0) * el.get("height", 0)
-            carpenter = 300 * el.get("length", 0) * el.get("height", 0)
-
-            SHEET_SQFT = 32
-            total_sheets = ta / SHEET_SQFT if SHEET_SQFT else 0
-
-            elements_data.append({
-                "Room": room,
-                "Element": el_name,
-                "Height": el.get("height", 0),
-                "Length": el.get("length", 0),
-                "Width": el.get("width", 0),
-                "No of Shelves": el.get("num_shelves", 0),
-                "Shutter Material": " ".join([
-                    str(shutter.get("brand", "")),
-                    str(shutter.get("model", "")),
-                    str(shutter.get("grade", "")),
-                    str(shutter.get("thickness", ""))
-                ]).strip(),
-                "Carcus Material": " ".join([
-                    str(carcus.get("brand", "")),
-                    str(carcus.get("model", "")),
-                    str(carcus.get("grade", "")),
-                    str(carcus.get("thickness", ""))
-                ]).strip(),
-                "Laminate Type": " ".join([
-                    str(laminate_.get("material_type", "")),
-                    str(laminate_.get("brand", "")),
-                    str(laminate_.get("model", "")),
-                    str(laminate_.get("grade", "")),
-                    str(laminate_.get("thickness", ""))
-                ]).strip(),
-                "Total Sheets": round(total_sheets, 2),
-                "Total Area (sft)": round(ta, 2),
-                "Material Cost (₹)": round(el_total_cost, 2),
-                "Cost per sft (₹)": round(cost_per_sft, 2),
-                "Factory Binding (220+120 Install) (₹)": round(factory_binding, 2),
-                "Carpenter (300) (₹)": round(carpenter, 2)
-            })
-
-            total_area += ta
-            total_cost += el_total_cost
+with metrics.span("cost_compute"):
+    result = quote(project_data)
+elements_data = result["elements"]
+total_area = result["totals"]["total_area"]
+total_cost = result["totals"]["material_cost"]
 
 # Add Back button to go to Materials page
 if st.button("⬅️ Back to Materials"):
@@ -190,10 +51,8 @@ if st.button("⬅️ Back to Materials"):
 st.title("Project Summary Dashboard")
 kpi1, kpi2, kpi3, kpi4 = st.columns(4)
 
-total_factory_binding = sum(e["Factory Binding (220+120 Install) (₹)"] for e in elements_data)
-total_carpenter = sum(e["Carpenter (300) (₹)"] for e in elements_data)
-total_with_factory = total_cost + total_factory_binding
-total_with_carpenter = total_cost + total_carpenter
+total_with_factory = result["totals"]["with_factory"]
+total_with_carpenter = result["totals"]["with_carpenter"]
 
 with kpi1:
     st.metric("Total Area (sft)", round(total_area, 2))
@@ -209,33 +68,12 @@ st.markdown("### Element-wise Details")
 
 group_by_room = st.toggle("Show Room-wise Details (Ungroup)", value=True)
 
-df = pd.DataFrame(elements_data)
-
-cols_order = [
-    "Room", "Element", "Height", "Length", "Width", "No of Shelves",
-    "Shutter Material", "Carcus Material", "Laminate Type",
-    "Total Sheets", "Total Area (sft)", "Material Cost (₹)", "Cost per sft (₹)",
-    "Factory Binding (220+120 Install) (₹)", "Carpenter (300) (₹)"
-]
-df = df[[col for col in cols_order if col in df.columns]]
-
-df["Final Cost with Factory (₹)"] = df["Material Cost (₹)"] + df["Factory Binding (220+120 Install) (₹)"]
-df["Final Cost with Carpentry (₹)"] = df["Material Cost (₹)"] + df["Carpenter (300) (₹)"]
-# Avoid division by zero in area calculation
-df['Area']=np.where(df['Height']==0,df['Length'] * 1, df['Length'] * df['Height'])
-
-
-cols_order = [
-    "Room", "Element", "Height", "Length", "Width","Area", "No of Shelves",
-    "Shutter Material", "Carcus Material", "Laminate Type",
-    "Total Sheets", "Total Area (sft)", "Material Cost (₹)", "Cost per sft (₹)",
-    "Factory Binding (220+120 Install) (₹)", "Carpenter (300) (₹)",
-    "Final Cost with Factory (₹)", "Final Cost with Carpentry (₹)"
-]
-df = df[[col for col in cols_order if col in df.columns]]
+with metrics.span("summary_dataframe"):
+    df = pd.DataFrame(elements_data, columns=ELEMENT_COLUMNS)
 
 from st_aggrid import AgGrid, GridOptionsBuilder
 
+@metrics.timed("render_table")
 def show_aggrid(df):
     gb = GridOptionsBuilder.from_dataframe(df)
     for col in df.columns:
@@ -288,3 +126,27 @@ else:
     # Add total row to summary df
     df_with_total = add_total_row(df, label="Total")
     show_aggrid(df_with_total)
+
+# --- Sheet plan from the cut list ---
+st.markdown("### Sheet Plan (8x4)")
+sheet_plan = result["sheet_plan"]
+plan1, plan2 = st.columns(2)
+plan1.metric("Sheets of 8x4 required", result["totals"]["sheets"])
+plan2.metric("Offcut waste (%)", round(result["totals"]["waste_pct"], 1))
+if sheet_plan:
+    st.dataframe(pd.DataFrame([
+        (g["material"], g["thickness"], g["panels"], g["sheets"], round(g["panel_area"], 2), round(g["waste_pct"], 1))
+        for g in sheet_plan
+    ], columns=["Material", "Thickness", "Panels", "Sheets", "Panel Area (sft)", "Waste (%)"]),
+        use_container_width=True, hide_index=True)
+    with st.expander("Cut layouts"):
+        group_labels = [f"{g['material']} {g['thickness']}".strip() for g in sheet_plan]
+        chosen = st.selectbox("Material", range(len(sheet_plan)), format_func=lambda i: group_labels[i])
+        layouts = sheet_plan[chosen]["layouts"]
+        sheet_no = st.number_input("Sheet", min_value=1, max_value=len(layouts), value=1, step=1)
+        st.dataframe(pd.DataFrame(
+            layouts[sheet_no - 1], columns=["Panel", "X (mm)", "Y (mm)", "Width (mm)", "Height (mm)"]
+        ), use_container_width=True, hide_index=True)
+metrics.end_run()
+profiling.end_run("Summary", user, project)
+
@@ -0,0 +1,5 @@
+"""Streamlit-free quoting: ``quote(project_data, catalog=None)``.
+
+Run ``python -m quoting --help`` for the command-line version.
+"""
+from quoting.engine import ELEMENT_COLUMNS, quote, quote_rows, reprice
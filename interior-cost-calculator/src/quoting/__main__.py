@@ -0,0 +1,136 @@
+"""Quote saved projects from the command line.
+
+    python -m quoting project.json [more.json ...] [--format csv|json] [--totals]
+    cat project.json | python -m quoting --format json
+
+Each input holds one project document (as stored by the app) or a list
+of them; "-" or no file reads standard input. With --store every project
+in the app's project store is re-quoted on a pool of --workers processes:
+
+    python -m quoting --store --workers 8 --totals -o totals.csv
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import textwrap
+from quoting.engine import ELEMENT_COLUMNS, quote, quote_rows
+
+TOTAL_COLUMNS = ["total_area", "material_cost", "factory_binding", "carpenter", "with_factory", "with_carpenter", "sheets", "waste_pct"]
+
+
+def _read_projects(path):
+    if path == "-":
+        data, name = json.load(sys.stdin), "stdin"
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        name = os.path.splitext(os.path.basename(path))[0]
+    projects = data if isinstance(data, list) else [data]
+    for i, project_data in enumerate(projects):
+        default = name if len(projects) == 1 else f"{name}[{i}]"
+        yield project_data.get("project_name") or default, project_data
+
+
+def _quote_files(paths, catalog, failures):
+    for path in paths:
+        try:
+            projects = list(_read_projects(path))
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            failures.append(path)
+            continue
+        for name, project_data in projects:
+            # A malformed project (e.g. null or non-numeric dimensions)
+            # fails on its own; the rest are still quoted.
+            try:
+                result = quote(project_data, catalog)
+            except (ValueError, TypeError, KeyError, AttributeError) as e:
+                print(f"{path}: {name}: {type(e).__name__}: {e}", file=sys.stderr)
+                failures.append(path)
+                continue
+            yield (name,), result
+
+
+def _quote_store(store, workers, catalog, failures):
+    from quoting.batch import requote_store
+    for username, project_name, result, error in requote_store(store, workers, catalog):
+        if error is None:
+            yield (username, project_name), result
+        else:
+            print(f"{username}/{project_name}: {error}", file=sys.stderr)
+            failures.append((username, project_name))
+
+
+def _write_csv(results, out, totals_only, key_columns):
+    # ``results`` holds (key values, quote) pairs; the keys lead each row.
+    writer = csv.writer(out)
+    if totals_only:
+        writer.writerow(key_columns + TOTAL_COLUMNS)
+        for keys, result in results:
+            writer.writerow(list(keys) + [result["totals"][col] for col in TOTAL_COLUMNS])
+        return
+    writer.writerow(key_columns + ELEMENT_COLUMNS)
+    for keys, result in results:
+        for row in quote_rows(result):
+            writer.writerow(list(keys) + row)
+
+
+def _write_json(results, out, totals_only, key_columns):
+    # One array, written a project at a time as the results come in.
+    out.write("[")
+    separator = "\n"
+    for keys, result in results:
+        result = dict(result, **{col.lower(): key for col, key in zip(key_columns, keys)})
+        if totals_only:
+            result.pop("elements")
+            result.pop("sheet_plan")
+        out.write(separator)
+        out.write(textwrap.indent(json.dumps(result, ensure_ascii=False, indent=2), "  "))
+        separator = ",\n"
+    out.write("]\n" if separator == "\n" else "\n]\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m quoting", description="Quote interior projects without the web app.")
+    parser.add_argument("files", nargs="*", default=["-"], help="project JSON files; '-' or none reads stdin")
+    parser.add_argument("--format", choices=("csv", "json"), default="csv")
+    parser.add_argument("--totals", action="store_true", help="one line of totals per project instead of element rows")
+    parser.add_argument("--reprice", action="store_true", help="use current prices from materials_cost.xlsx instead of saved rates")
+    parser.add_argument("-o", "--output", help="write here instead of stdout")
+    parser.add_argument("--store", action="store_true", help="re-quote every project in the project store (PROJECT_STORE / PROJECT_STORE_PATH)")
+    parser.add_argument("--workers", type=int, default=None, help="processes for --store (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    catalog = None
+    if args.reprice:
+        from data.material_costs import get_catalog
+        catalog = get_catalog()
+
+    # Results are written as they are produced, so a big --store run never
+    # holds every quote in memory.
+    failures = []
+    store = None
+    if args.store:
+        from utils.storage import open_store
+        store = open_store()
+        results = _quote_store(store, args.workers, catalog, failures)
+        key_columns = ["User", "Project"]
+    else:
+        results = _quote_files(args.files, catalog, failures)
+        key_columns = ["Project"]
+
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        (_write_json if args.format == "json" else _write_csv)(results, out, args.totals, key_columns)
+    finally:
+        if args.output:
+            out.close()
+        if store is not None:
+            store.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
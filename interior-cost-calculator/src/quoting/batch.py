@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from quoting.engine import quote
+
+# Projects sent to a worker at a time; large enough that pickling and
+# scheduling stay small next to the quoting itself.
+BATCH_SIZE = 32
+PROGRESS_INTERVAL_SECONDS = 2.0
+
+# Set in each worker by _init_worker; read-only from then on.
+_catalog = None
+
+
+def _init_worker(catalog):
+    global _catalog
+    _catalog = catalog
+
+
+def _quote_batch(batch):
+    results = []
+    for username, project_name, project_data in batch:
+        try:
+            results.append((username, project_name, quote(project_data, _catalog), None))
+        except Exception as e:
+            results.append((username, project_name, None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def _batches(projects, size):
+    batch = []
+    for item in projects:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _print_progress(done, failed, started):
+    elapsed = time.perf_counter() - started
+    rate = done / elapsed if elapsed else 0.0
+    print(f"Quoted {done} projects ({failed} failed) in {elapsed:.1f}s, {rate:.0f}/s", file=sys.stderr)
+
+
+def _pooled(batches, workers, catalog):
+    # Quoted batches in submission order, with at most two per worker in flight.
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(catalog,)) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append(pool.submit(_quote_batch, batch))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def requote_store(store, workers=None, catalog=None, batch_size=BATCH_SIZE, progress=_print_progress):
+    """Quote every project in ``store`` across a pool of worker processes.
+
+    Yields (username, project_name, result, error) in store order; result
+    is None and error set for a project that could not be quoted.
+    Projects are streamed from store.iter_projects() in batches and each
+    batch is handed on as soon as it is quoted, so only the batches in
+    flight are ever in memory. ``catalog`` is handed to each worker once
+    when it starts (under fork it is shared copy-on-write).
+    """
+    workers = workers or os.cpu_count() or 1
+    done = failed = 0
+    started = last_report = time.perf_counter()
+    batches = _batches(store.iter_projects(), batch_size)
+    if workers == 1:
+        # No pool: handy for debugging and for small stores.
+        _init_worker(catalog)
+        quoted_batches = map(_quote_batch, batches)
+    else:
+        quoted_batches = _pooled(batches, workers, catalog)
+    for quoted in quoted_batches:
+        for item in quoted:
+            done += 1
+            failed += item[3] is not None
+            yield item
+        if progress and time.perf_counter() - last_report >= PROGRESS_INTERVAL_SECONDS:
+            progress(done, failed, started)
+            last_report = time.perf_counter()
+    if progress:
+        progress(done, failed, started)
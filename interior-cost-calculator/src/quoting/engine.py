@@ -0,0 +1,118 @@
+import numpy as np
+from utils.cost_engine import element_table, compute
+from utils.cutlist import plan_project
+from utils.project_model import ProjectModel
+
+BOARD_FIELDS = ("brand", "model", "grade", "thickness")
+LAMINATE_FIELDS = ("material_type", "brand", "model", "grade", "thickness")
+
+# Columns of a quote, in the order the summary page shows them.
+ELEMENT_COLUMNS = [
+    "Room", "Element", "Height", "Length", "Width", "Area", "No of Shelves",
+    "Shutter Material", "Carcus Material", "Laminate Type",
+    "Total Sheets", "Total Area (sft)", "Material Cost (₹)", "Cost per sft (₹)",
+    "Factory Binding (220+120 Install) (₹)", "Carpenter (300) (₹)",
+    "Final Cost with Factory (₹)", "Final Cost with Carpentry (₹)"
+]
+
+
+def material_label(material, fields):
+    return " ".join(str(material.get(field, "")) for field in fields).strip()
+
+
+def _material_labels(model, material_ids, fields):
+    # Label each distinct material once, then pick per row by material id.
+    labels = np.array([material_label(m, fields) for m in model.materials] + [""], dtype=object)
+    return labels[material_ids].tolist()
+
+
+def _catalog_rate(catalog, mat, material):
+    if mat == "laminate":
+        return catalog.laminate["Laminate"].get(material.get("type"), {}).get(material.get("thickness"))
+    return catalog.option_index.price(
+        material.get("type"), material.get("grade"), material.get("brand"),
+        material.get("model"), material.get("thickness"),
+    )
+
+
+def reprice(project_data, catalog):
+    """Copy of a project with every selected rate looked up in ``catalog``.
+
+    Selections the catalog no longer lists keep their saved rate.
+    """
+    element_materials = {}
+    for key, selection in project_data.get("element_materials", {}).items():
+        repriced = {}
+        for mat, material in selection.items():
+            material = dict(material)
+            rate = _catalog_rate(catalog, mat, material) if mat in ("shutter", "carcus", "laminate") else None
+            if rate is not None:
+                material["rate"] = rate
+            repriced[mat] = material
+        element_materials[key] = repriced
+    return dict(project_data, element_materials=element_materials)
+
+
+def quote(project_data, catalog=None):
+    """Element-wise quote of a project, as on the summary page.
+
+    Uses the areas saved by the project input page and the rates saved
+    with each material, or current ``catalog`` prices when one is given
+    (see data.material_costs.get_catalog). Total Sheets comes from the
+    cut list (utils.cutlist): each element's share of the 8x4 sheets its
+    panels need. Returns {"project", "elements": {column: [values]},
+    "totals", "sheet_plan"} with plain Python values, where sheet_plan
+    lists the cut list per board material and thickness.
+    """
+    if catalog is not None:
+        project_data = reprice(project_data, catalog)
+    model = ProjectModel.from_dict(project_data)
+    table = element_table(model)
+    costs = compute(table, stored_areas=True)
+    plan = plan_project(model)
+
+    material_cost = np.round(costs["material_cost"], 2)
+    factory_binding = np.round(costs["factory_binding"], 2)
+    carpenter = np.round(costs["carpenter"], 2)
+    length = table["length"]
+    elements = {
+        "Room": table["room"],
+        "Element": table["element"],
+        "Height": table["height"].tolist(),
+        "Length": length.tolist(),
+        "Width": table["width"].tolist(),
+        # Front area, or just the length for elements without a height.
+        "Area": np.where(table["height"] == 0, length * 1, length * table["height"]).tolist(),
+        "No of Shelves": table["num_shelves"].tolist(),
+        "Shutter Material": _material_labels(model, table["shutter"], BOARD_FIELDS),
+        "Carcus Material": _material_labels(model, table["carcus"], BOARD_FIELDS),
+        "Laminate Type": _material_labels(model, table["laminate"], LAMINATE_FIELDS),
+        "Total Sheets": np.round(plan["element_sheets"], 2).tolist(),
+        "Total Area (sft)": np.round(costs["laminate_area"], 2).tolist(),
+        "Material Cost (₹)": material_cost.tolist(),
+        "Cost per sft (₹)": np.round(costs["cost_per_sft"], 2).tolist(),
+        "Factory Binding (220+120 Install) (₹)": factory_binding.tolist(),
+        "Carpenter (300) (₹)": carpenter.tolist(),
+        "Final Cost with Factory (₹)": (material_cost + factory_binding).tolist(),
+        "Final Cost with Carpentry (₹)": (material_cost + carpenter).tolist(),
+    }
+
+    total_cost = costs["material_cost"].sum().item()
+    total_factory_binding = factory_binding.sum().item()
+    total_carpenter = carpenter.sum().item()
+    totals = {
+        "total_area": costs["laminate_area"].sum().item(),
+        "material_cost": total_cost,
+        "factory_binding": total_factory_binding,
+        "carpenter": total_carpenter,
+        "with_factory": total_cost + total_factory_binding,
+        "with_carpenter": total_cost + total_carpenter,
+        "sheets": plan["sheets"],
+        "waste_pct": plan["waste_pct"],
+    }
+    return {"project": project_data.get("project_name"), "elements": elements, "totals": totals, "sheet_plan": plan["groups"]}
+
+
+def quote_rows(result):
+    """The elements of a quote as a list of rows, in ELEMENT_COLUMNS order."""
+    return [list(row) for row in zip(*(result["elements"][col] for col in ELEMENT_COLUMNS))]
@@ -0,0 +1,149 @@
+import threading
+from contextlib import contextmanager
+
+# Number of users whose parsed projects are kept in memory.
+CACHE_MAX_USERS = 256
+
+
+def clone_json(value):
+    """Deep-copy a parsed JSON value (much cheaper than copy.deepcopy)."""
+    if isinstance(value, dict):
+        return {k: clone_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [clone_json(v) for v in value]
+    return value
+
+
+class ReadWriteLock:
+    """Many concurrent readers or one writer; waiting writers go first."""
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class UserView:
+    """Parsed projects of one user: project_name -> (stamp, doc)."""
+
+    __slots__ = ("projects", "last_used")
+
+    def __init__(self):
+        self.projects = {}
+        self.last_used = 0
+
+
+class ProjectCache:
+    """Process-wide cache of parsed projects shared by all sessions.
+
+    Each entry is stored with a stamp describing where it was read from
+    (file mtime/size plus the journal tail signature). A lookup whose
+    stamp no longer matches is a miss, so changes made by other processes
+    or by the compactor are picked up without explicit invalidation.
+    Callers always get their own copy of the document.
+    """
+
+    def __init__(self, max_users=CACHE_MAX_USERS):
+        self.max_users = max_users
+        self._lock = ReadWriteLock()
+        self._views = {}
+        self._tick = 0
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, username, project_name, stamp, loader):
+        """Return a copy of the cached project, loading it on a miss."""
+        with self._lock.read():
+            view = self._views.get(username)
+            cached = view.projects.get(project_name) if view else None
+            if cached is not None and cached[0] == stamp:
+                # Racy on purpose: a lost update only blurs the LRU order.
+                self._tick += 1
+                view.last_used = self._tick
+                doc = cached[1]
+            else:
+                doc = cached = None
+        self._count(cached is not None)
+        if cached is None:
+            doc = loader()
+            with self._lock.write():
+                self._view(username).projects[project_name] = (stamp, doc)
+        return clone_json(doc)
+
+    def _view(self, username):
+        # Called with the write lock held.
+        self._tick += 1
+        view = self._views.get(username)
+        if view is None:
+            if len(self._views) >= self.max_users:
+                oldest = min(self._views, key=lambda u: self._views[u].last_used)
+                del self._views[oldest]
+                self.evictions += 1
+            view = self._views[username] = UserView()
+        view.last_used = self._tick
+        return view
+
+    def invalidate(self, username, project_name=None):
+        with self._lock.write():
+            view = self._views.get(username)
+            if view is None:
+                return
+            if project_name is None:
+                del self._views[username]
+            else:
+                view.projects.pop(project_name, None)
+
+    def clear(self):
+        with self._lock.write():
+            self._views.clear()
+
+    def stats(self):
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "users": len(self._views),
+        }
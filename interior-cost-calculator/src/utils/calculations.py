@@ -4,6 +4,7 @@ def calculate_area(length, width, height=1):
 
 
 def calculate_sheets_needed(total_area, sheet_area=32):
+    """Area-only lower bound; utils.cutlist.plan_project gives real sheet counts."""
     return total_area / sheet_area
 
 def calculate_material_cost(material_type, quantity, material_costs):
@@ -24,6 +25,8 @@ def calculate_total_area(elements):
         total_area += calculate_area(element['length'], element['width'], element['height'])
     return total_area
 
+# The area functions below work on scalars and element-wise on NumPy arrays.
+
 def shutter_area(height, length):
     """Calculate Shutter Area = Height * Length"""
     return height * length
@@ -0,0 +1,177 @@
+import numpy as np
+from utils.calculations import shutter_area, side_area, top_bottom_area, back_panel_area, shelf_area
+from utils.project_model import DIMENSIONS, MATERIALS, NONE
+
+# Labour is charged per sft of element front (length x height).
+FACTORY_BINDING_RATE = 340  # 220 binding + 120 installation
+CARPENTER_RATE = 300
+SHEET_SQFT = 32
+
+AREA_FIELDS = ("shutter_area", "side_area", "top_bottom_area", "back_panel_area", "shelf_area", "total_area")
+# What compute() reads for one element when areas come from the dimensions.
+ROW_INPUTS = DIMENSIONS + tuple(f"{mat}_rate" for mat in MATERIALS)
+
+
+def element_table(model):
+    """Column table of a ProjectModel, one row per element or section.
+
+    Holds the model's id, dimension and material-id columns plus the
+    per-sft rates of the selected materials and the areas stored in
+    area_details (0 where missing). "room" and "element" are label lists
+    and "key" holds a (room, element, section or None) tuple per row.
+    """
+    table = model.columns()
+    rooms = np.array(model.rooms.names + [""], dtype=object)
+    table["room_id"] = table.pop("room")
+    table["room"] = rooms[table["room_id"]].tolist()
+    table["element"] = [model.row_label(row) for row in model.rows]
+    rates = np.array(model.material_values("rate"), dtype=float)
+    for mat in MATERIALS:
+        table[f"{mat}_rate"] = rates[table[mat]]
+    area_details = model.fields.get("area_details", {})
+    keys = []
+    stored = []
+    for row in model.rows:
+        room, element = model.rooms[row.room], model.elements[row.element]
+        section = model.sections[row.section] if row.section != NONE else None
+        areas = area_details.get(room, {}).get(element, {})
+        if section is not None:
+            areas = areas.get(section, {})
+        keys.append((room, element, section))
+        stored.append(areas)
+    table["key"] = keys
+    for field in AREA_FIELDS:
+        table[field] = np.array([areas.get(field, 0) for areas in stored], dtype=float)
+    return table
+
+
+def compute(table, stored_areas=False):
+    """Areas, costs and labour for every row of an element table.
+
+    Areas come from the dimensions, or with ``stored_areas`` from the
+    area_details saved by the project input page (whose total is rounded
+    up to whole sft). Returns a dict of arrays aligned with the table.
+    """
+    h, l, w, shelves = (table[field] for field in DIMENSIONS)
+    if stored_areas:
+        shutter = table["shutter_area"]
+        carcus = table["side_area"] + table["top_bottom_area"] + table["back_panel_area"] + table["shelf_area"]
+        laminate = table["total_area"]
+    else:
+        shutter = shutter_area(h, l)
+        carcus = side_area(w, h) + top_bottom_area(l, w) + back_panel_area(h, l) + shelf_area(shelves, w, l)
+        laminate = shutter + carcus
+    shutter_cost = shutter * table["shutter_rate"]
+    carcus_cost = carcus * table["carcus_rate"]
+    laminate_cost = laminate * table["laminate_rate"]
+    material_cost = shutter_cost + carcus_cost + laminate_cost
+    front = l * h
+    return {
+        "shutter_area": shutter,
+        "carcus_area": carcus,
+        "laminate_area": laminate,
+        "shutter_cost": shutter_cost,
+        "carcus_cost": carcus_cost,
+        "laminate_cost": laminate_cost,
+        "material_cost": material_cost,
+        "cost_per_sft": np.divide(material_cost, laminate, out=np.zeros_like(material_cost), where=laminate != 0),
+        "factory_binding": FACTORY_BINDING_RATE * front,
+        "carpenter": CARPENTER_RATE * front,
+        "total_sheets": laminate / SHEET_SQFT,
+    }
+
+
+def totals(result):
+    """Project totals of a compute() result."""
+    return {name: values.sum().item() for name, values in result.items() if name != "cost_per_sft"}
+
+
+def row_inputs(dims, selection):
+    """compute() inputs of one element, straight from its document entries.
+
+    ``dims`` is the element's (or section's) entry under "rooms" and
+    ``selection`` its element_materials entry. Returns a tuple in
+    ROW_INPUTS order, with rate 0 for a material that is not selected.
+    """
+    return tuple(float(dims.get(field, 0)) for field in DIMENSIONS) + tuple(
+        float(selection[mat].get("rate", 0)) if selection.get(mat) else 0.0 for mat in MATERIALS
+    )
+
+
+class IncrementalCosts:
+    """compute() results kept between reruns, repricing changed elements only.
+
+    Elements are addressed by key (the page uses the element_materials
+    key) and described by their row_inputs(), so a rerun never builds a
+    ProjectModel or element table. set_row() marks an element dirty only
+    when its inputs changed; flush() prices the dirty elements and adjusts
+    the project totals by their delta. ``version`` increases whenever any
+    result changes, so callers can cache things derived from the results.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self._positions = {}
+        self._inputs = np.zeros((0, len(ROW_INPUTS)))
+        self._dirty = set()
+        self.result = compute(self._table(slice(None)))
+        self.totals = totals(self.result)
+        self.version = 0
+        self.recomputed = 0
+
+    def _table(self, rows):
+        return {field: self._inputs[rows, i] for i, field in enumerate(ROW_INPUTS)}
+
+    def retain(self, keys):
+        """Lay the rows out as ``keys``, keeping the results of known ones.
+
+        Keys not seen before start out dirty with zero inputs until
+        set_row() describes them.
+        """
+        keys = list(keys)
+        if keys == self.keys:
+            return
+        previous = np.array([self._positions.get(key, -1) for key in keys], dtype=np.int64)
+        known = previous >= 0
+        carried = np.maximum(previous, 0)
+        if self.keys:
+            self._inputs = np.where(known[:, None], self._inputs[carried], 0.0)
+            self.result = {name: np.where(known, values[carried], 0.0) for name, values in self.result.items()}
+        else:
+            self._inputs = np.zeros((len(keys), len(ROW_INPUTS)))
+            self.result = {name: np.zeros(len(keys)) for name in self.result}
+        self.keys = keys
+        self._positions = {key: i for i, key in enumerate(keys)}
+        self._dirty = {key for key in self._dirty if key in self._positions}
+        self._dirty.update(key for key, was_known in zip(keys, known) if not was_known)
+        self.totals = totals(self.result)
+        self.version += 1
+
+    def set_row(self, key, inputs):
+        """Describe one element by its row_inputs(); unchanged inputs are a no-op."""
+        position = self._positions.get(key)
+        if position is None:
+            self.retain(self.keys + [key])
+            position = self._positions[key]
+        elif key not in self._dirty and tuple(self._inputs[position]) == inputs:
+            return
+        self._inputs[position] = inputs
+        self._dirty.add(key)
+
+    def flush(self):
+        """Price the dirty elements and return the results, aligned with ``keys``."""
+        self.recomputed = len(self._dirty)
+        if self._dirty:
+            rows = np.array(sorted(self._positions[key] for key in self._dirty), dtype=np.int64)
+            for name, values in compute(self._table(rows)).items():
+                if name in self.totals:
+                    self.totals[name] += (values - self.result[name][rows]).sum().item()
+                self.result[name][rows] = values
+            self._dirty.clear()
+            self.version += 1
+        return self.result
+
+    def total(self, name, keys):
+        """Sum of one result over some elements, e.g. the rows of one room."""
+        rows = [self._positions[key] for key in keys if key in self._positions]
+        return self.result[name][rows].sum().item()
@@ -0,0 +1,181 @@
+import math
+from functools import lru_cache
+from utils.project_model import MATERIALS, NONE, ProjectModel
+
+# An 8x4 board as sold (2440 x 1220 mm). Sizes are nominal feet, which
+# carpenters cut from the nominal board (two 2 ft strips from a 4 ft
+# width), so no saw kerf is reserved unless one is passed in.
+SHEET_MM = (2440, 1220)
+KERF_MM = 0
+MM_PER_FT = 304.8
+# Panels of unassigned material, or everything when not split by material.
+NO_MATERIAL = "Unassigned"
+SKU_FIELDS = ("type", "grade", "brand", "model")
+_SHUTTER, _CARCUS = MATERIALS.index("shutter"), MATERIALS.index("carcus")
+
+
+def _mm(feet):
+    return round(feet * MM_PER_FT)
+
+
+def element_panels(height, length, width, num_shelves):
+    """Panels of one element as (part, material, length ft, width ft).
+
+    The same parts the area formulas in utils.calculations count: the
+    shutter in the shutter material, two sides, top and bottom, the back
+    and the shelves in the carcus material. Parts without area are left out.
+    """
+    panels = [
+        ("Shutter", "shutter", length, height),
+        ("Side", "carcus", height, width),
+        ("Side", "carcus", height, width),
+        ("Top", "carcus", length, width),
+        ("Bottom", "carcus", length, width),
+        ("Back", "carcus", length, height),
+    ]
+    panels += [("Shelf", "carcus", length, width)] * int(num_shelves)
+    return [panel for panel in panels if panel[2] > 0 and panel[3] > 0]
+
+
+def _split(w, h, sheet_w, sheet_h):
+    """Cut a panel that no sheet can hold into equal pieces that fit."""
+    if (w <= sheet_w and h <= sheet_h) or (w <= sheet_h and h <= sheet_w):
+        return [(w, h)]
+    along = (math.ceil(w / sheet_w), math.ceil(h / sheet_h))
+    across = (math.ceil(w / sheet_h), math.ceil(h / sheet_w))
+    cols, rows = min(along, across, key=lambda grid: grid[0] * grid[1])
+    return [(math.ceil(w / cols), math.ceil(h / rows))] * (cols * rows)
+
+
+@lru_cache(maxsize=512)
+def _pack(sizes, sheet, kerf):
+    """Guillotine best-area-fit of ``sizes`` (sorted, largest first).
+
+    Each panel goes into the free rectangle, on any open sheet and in
+    either orientation, that it fills best; the rest of that rectangle is
+    split along the shorter leftover side. Returns a tuple of sheets, each
+    a tuple of (size index, x, y, width, height). Cached, so a panel set
+    that comes back (the same project rerun, or rooms built alike) is
+    packed once.
+    """
+    sheet_w, sheet_h = sheet
+    free = []
+    sheets = []
+    # Smallest short side and area still to place, to drop useless scraps.
+    min_side = [0] * len(sizes)
+    min_area = [0] * len(sizes)
+    side = area = math.inf
+    for i in range(len(sizes) - 1, -1, -1):
+        w, h = sizes[i]
+        side, area = min(side, w, h), min(area, w * h)
+        min_side[i], min_area[i] = side, area
+
+    for i, (w, h) in enumerate(sizes):
+        best = None
+        kept = []
+        for rect in free:
+            s, x, y, fw, fh = rect
+            if min(fw, fh) < min_side[i] or fw * fh < min_area[i]:
+                continue
+            kept.append(rect)
+            for pw, ph in ((w, h), (h, w)):
+                if pw <= fw and ph <= fh:
+                    score = fw * fh - pw * ph
+                    if best is None or score < best[0]:
+                        best = (score, len(kept) - 1, pw, ph)
+        free = kept
+        if best is None:
+            sheets.append([])
+            free.append((len(sheets) - 1, 0, 0, sheet_w, sheet_h))
+            pw, ph = (w, h) if w <= sheet_w and h <= sheet_h else (h, w)
+            best = (0, len(free) - 1, pw, ph)
+        _, index, pw, ph = best
+        s, x, y, fw, fh = free.pop(index)
+        sheets[s].append((i, x, y, pw, ph))
+        right_w, top_h = fw - pw - kerf, fh - ph - kerf
+        if right_w < top_h:
+            right, top = (s, x + pw + kerf, y, right_w, ph), (s, x, y + ph + kerf, fw, top_h)
+        else:
+            right, top = (s, x + pw + kerf, y, right_w, fh), (s, x, y + ph + kerf, pw, top_h)
+        free += [rect for rect in (right, top) if rect[3] > 0 and rect[4] > 0]
+    return tuple(tuple(placements) for placements in sheets)
+
+
+def pack(panels, sheet=SHEET_MM, kerf=KERF_MM):
+    """Lay out [(label, width mm, height mm)] panels on sheets.
+
+    Returns a list of sheets, each a list of (label, x, y, width, height)
+    in mm; a placed width/height swapped from the input means the panel
+    was rotated.
+    """
+    pieces = []
+    for label, w, h in panels:
+        parts = _split(w, h, *sheet)
+        for n, (pw, ph) in enumerate(parts, start=1):
+            pieces.append((f"{label} ({n}/{len(parts)})" if len(parts) > 1 else label, max(pw, ph), min(pw, ph)))
+    pieces.sort(key=lambda piece: (piece[1] * piece[2], piece[1]), reverse=True)
+    layout = _pack(tuple((w, h) for _, w, h in pieces), tuple(sheet), kerf)
+    return [[(pieces[i][0], x, y, w, h) for i, x, y, w, h in placements] for placements in layout]
+
+
+def sku(material):
+    """Group key of a board selection: (SKU label, thickness)."""
+    if not material:
+        return NO_MATERIAL, ""
+    label = " ".join(str(material[field]) for field in SKU_FIELDS if material.get(field) not in (None, "", "-"))
+    return label or NO_MATERIAL, str(material.get("thickness", ""))
+
+
+def plan_project(project_data, by_material=True, sheet=SHEET_MM, kerf=KERF_MM):
+    """Cut list of a project: real 8x4 sheet counts, layouts and waste.
+
+    Panels are grouped by board SKU and thickness (or all together without
+    ``by_material``) and each group is packed on its own. Returns
+    {"groups": [...], "sheets", "waste_pct", "element_sheets"}, where each
+    group has material, thickness, panels, sheets, panel/sheet area in sft,
+    waste_pct and layouts (see pack()), and element_sheets gives every
+    element row of the project its share of its groups' sheets by panel
+    area, so the shares add up to the sheet count.
+    """
+    model = project_data if isinstance(project_data, ProjectModel) else ProjectModel.from_dict(project_data)
+    groups = {}
+    for row_index, row in enumerate(model.rows):
+        name = model.row_label(row)
+        for part, mat, length, width in element_panels(row.height, row.length, row.width, row.num_shelves):
+            material_id = row.materials[_SHUTTER if mat == "shutter" else _CARCUS]
+            if not by_material:
+                key = (NO_MATERIAL, "")
+            else:
+                key = sku(model.materials[material_id] if material_id != NONE else None)
+            label = f"{model.rooms[row.room]} / {name} / {part}"
+            groups.setdefault(key, []).append((row_index, label, _mm(length), _mm(width)))
+
+    sheet_mm2 = sheet[0] * sheet[1]
+    mm2_per_sqft = MM_PER_FT * MM_PER_FT
+    element_sheets = [0.0] * len(model.rows)
+    result = []
+    for (material, thickness), panels in sorted(groups.items()):
+        layouts = pack([(label, w, h) for _, label, w, h in panels], sheet, kerf)
+        panel_mm2 = sum(w * h for _, _, w, h in panels)
+        used_mm2 = len(layouts) * sheet_mm2
+        for row_index, _, w, h in panels:
+            element_sheets[row_index] += len(layouts) * w * h / panel_mm2
+        result.append({
+            "material": material,
+            "thickness": thickness,
+            "panels": len(panels),
+            "sheets": len(layouts),
+            "panel_area": panel_mm2 / mm2_per_sqft,
+            "sheet_area": used_mm2 / mm2_per_sqft,
+            "waste_pct": 100 * (1 - panel_mm2 / used_mm2),
+            "layouts": layouts,
+        })
+    total_sheets = sum(group["sheets"] for group in result)
+    total_panel = sum(group["panel_area"] for group in result)
+    total_sheet = sum(group["sheet_area"] for group in result)
+    return {
+        "groups": result,
+        "sheets": total_sheets,
+        "waste_pct": 100 * (1 - total_panel / total_sheet) if total_sheet else 0.0,
+        "element_sheets": element_sheets,
+    }
@@ -1,22 +1,22 @@
 import mysql.connector
 from mysql.connector import Error
 import hashlib
-import streamlit as st
-import json
 import os
-from datetime import datetime
-from uuid import uuid4
-
-DATA_PATH = os.path.abspath(
-                    os.path.join(
-                        os.path.dirname(__file__),
-                        "..", "..", "..", "json dumps", "data.json"
-                    )
-                )
-                            
+import threading
+import streamlit as st
+from utils.pool import ConnectionPool, POOL_SIZE, POOL_TIMEOUT_SECONDS
+from utils.storage import get_store
+from utils.metrics import span
+
+# Comma-separated usernames that get the admin panel on the home page.
+ADMIN_USERS_ENV = "APP_ADMINS"
+
+_pool = None
+_pool_lock = threading.Lock()
 
 
 def get_db_connection():
+    """Open a new, unpooled MySQL connection."""
     return mysql.connector.connect(
         host=st.secrets["mysql"]["host"],
         database=st.secrets["mysql"]["database"],
@@ -26,88 +26,82 @@ def get_db_connection():
     )
 
 
+def get_pool():
+    """The process-wide MySQL connection pool, built on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    get_db_connection,
+                    size=int(st.secrets["mysql"].get("pool_size", POOL_SIZE)),
+                    timeout=float(st.secrets["mysql"].get("pool_timeout", POOL_TIMEOUT_SECONDS))
+                )
+    return _pool
+
+
+def db_connection():
+    """Borrow a pooled connection: ``with db_connection() as conn: ...``"""
+    return get_pool().connection()
+
+
+def pool_stats():
+    """Checkout, wait and timeout counters of the connection pool.
+
+    None until the pool is first used, so asking never opens a connection.
+    """
+    return _pool.stats() if _pool is not None else None
+
+
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
 
 def create_user(username, password):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("INSERT INTO Users (username, password_hash) VALUES (%s, %s)", (username, hash_password(password)))
-        conn.commit()
-        return True
-    except Error:
-        return False
-    finally:
-        cursor.close()
-        conn.close()
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("INSERT INTO Users (username, password_hash) VALUES (%s, %s)", (username, hash_password(password)))
+            conn.commit()
+            return True
+        except Error:
+            conn.rollback()
+            return False
+        finally:
+            cursor.close()
 
 
 def authenticate_user(username, password):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT password_hash FROM Users WHERE username=%s", (username,))
-    row = cursor.fetchone()
-    cursor.close()
-    conn.close()
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT password_hash FROM Users WHERE username=%s", (username,))
+        row = cursor.fetchone()
+        cursor.close()
     if row and row[0] == hash_password(password):
         return True
     return False
 
 
-def _load_json():
-    if not os.path.exists(DATA_PATH):
-        return {"projects": []}
-    with open(DATA_PATH, "r", encoding="utf-8") as f:
-        try:
-            data = json.load(f)
-        except Exception:
-            data = {"projects": []}
-    if "projects" not in data:
-        # migrate old format to new
-        data = {"projects": [data]}
-    return data
-
-
-def _save_json(data):
-    with open(DATA_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+def is_admin(username):
+    admins = os.environ.get(ADMIN_USERS_ENV, "")
+    return bool(username) and username in {name.strip() for name in admins.split(",")}
 
 
 def save_project(username, project_name, project_data):
-    data = _load_json()
-    # Ensure project_id exists
-    if "project_id" not in project_data:
-        project_data["project_id"] = str(uuid4())
-    # Add username and project_name for filtering
-    project_data["username"] = username
-    project_data["project_name"] = project_name
-    # Remove old project with same username+project_name
-    data["projects"] = [p for p in data["projects"] if not (p.get("username") == username and p.get("project_name") == project_name)]
-    data["projects"].append(project_data)
-    _save_json(data)
-    return True
+    with span("save_project"):
+        return get_store().save_project(username, project_name, project_data)
 
 
 def load_project(username, project_name):
-    data = _load_json()
-    for p in data.get("projects", []):
-        if p.get("username") == username and p.get("project_name") == project_name:
-            return p
-    return None
+    with span("load_project"):
+        return get_store().load_project(username, project_name)
 
 
 def list_projects(username):
-    data = _load_json()
-    result = []
-    for p in data.get("projects", []):
-        if p.get("username") == username:
-            result.append((
-                p.get("project_name"),
-                p.get("created_at", ""),
-                p.get("last_modified", "")
-            ))
-    return result
+    with span("list_projects"):
+        return get_store().list_projects(username)
 
 
+def delete_project(username, project_name):
+    with span("delete_project"):
+        return get_store().delete_project(username, project_name)
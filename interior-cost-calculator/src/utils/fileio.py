@@ -0,0 +1,33 @@
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(path, mode="w", fsync=False):
+    """Write ``path`` through a temp file renamed over it at the end.
+
+    Readers never see a partial file. If the block fails the temp file is
+    removed and ``path`` is left as it was. With ``fsync`` the data is on
+    disk before the rename.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, mode, encoding=None if "b" in mode else "utf-8") as f:
+            yield f
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def file_sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
@@ -0,0 +1,61 @@
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Exclusive lock shared by threads and processes through a lock file.
+
+    Use as a context manager, or call acquire(blocking=False) to only try.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._fd = None
+
+    def acquire(self, blocking=True):
+        if not self._thread_lock.acquire(blocking):
+            return False
+        try:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            self._thread_lock.release()
+            if blocking:
+                raise
+            return False
+        self._fd = fd
+        return True
+
+    def release(self):
+        fd, self._fd = self._fd, None
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+            self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
@@ -0,0 +1,67 @@
+import threading
+
+# Project fields copied into the index so listing never opens project files.
+INDEXED_FIELDS = ("created_at", "last_modified")
+
+
+def index_entry(projects, entry, location):
+    """Apply one journal entry to a user's {project_name: meta} mapping."""
+    project_name = entry["project"]
+    if entry["op"] == "delete":
+        projects.pop(project_name, None)
+        return
+    meta = projects.setdefault(project_name, {})
+    meta["location"] = location
+    changed = entry.get("set", {})
+    for field in INDEXED_FIELDS:
+        if field in changed:
+            meta[field] = changed[field]
+    for field in entry.get("unset", []):
+        if field in INDEXED_FIELDS:
+            meta.pop(field, None)
+
+
+class ProjectIndex:
+    """In-memory username -> project_name -> meta index.
+
+    A user's mapping is loaded on first use through ``load_user`` (which
+    reads the persisted index and replays the journal tail) and is then
+    kept current by apply() on every save and delete.
+    """
+
+    def __init__(self, load_user, locate):
+        self._load_user = load_user
+        self._locate = locate
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def _projects(self, username):
+        # Called with the lock held.
+        projects = self._users.get(username)
+        if projects is None:
+            projects = self._users[username] = self._load_user(username)
+        return projects
+
+    def apply(self, entry):
+        with self._lock:
+            projects = self._users.get(entry["user"])
+            if projects is not None:
+                index_entry(projects, entry, self._locate(entry["user"], entry["project"]))
+
+    def location(self, username, project_name):
+        """Storage location of a project relative to the store, or None."""
+        with self._lock:
+            meta = self._projects(username).get(project_name)
+            return meta["location"] if meta else None
+
+    def projects(self, username):
+        """[(project_name, meta), ...] for a user, in creation order."""
+        with self._lock:
+            return [(name, dict(meta)) for name, meta in self._projects(username).items()]
+
+    def forget(self, username=None):
+        with self._lock:
+            if username is None:
+                self._users.clear()
+            else:
+                self._users.pop(username, None)
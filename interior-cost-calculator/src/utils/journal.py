@@ -0,0 +1,315 @@
+import json
+import os
+import threading
+import time
+from utils.filelock import FileLock
+
+# Roll over to a new segment once the active one grows past this size.
+SEGMENT_MAX_BYTES = 1024 * 1024
+# How often the background compactor wakes up when nothing has been sealed.
+COMPACT_INTERVAL_SECONDS = 30
+
+_SEGMENT_PREFIX = "segment-"
+_SEGMENT_SUFFIX = ".log"
+
+
+def _segment_name(number):
+    return f"{_SEGMENT_PREFIX}{number:08d}{_SEGMENT_SUFFIX}"
+
+
+def _segment_number(file):
+    if not (file.startswith(_SEGMENT_PREFIX) and file.endswith(_SEGMENT_SUFFIX)):
+        return None
+    try:
+        return int(file[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)])
+    except ValueError:
+        return None
+
+
+def _read_segment(path, offset=0):
+    """Return ([(entry, line), ...], end) for complete lines after offset.
+
+    ``end`` is the offset just past the last complete line, so a line that
+    another process is still writing is picked up by the next read.
+    """
+    entries = []
+    end = offset
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            end += len(line)
+            try:
+                entries.append((json.loads(line), line))
+            except ValueError:
+                continue
+    return entries, end
+
+
+def apply_entries(doc, entries):
+    """Replay journal entries for one project on top of its snapshot."""
+    for entry in entries:
+        if entry["op"] == "delete":
+            doc = None
+        else:
+            doc = dict(doc or {})
+            doc.update(entry.get("set", {}))
+            for key in entry.get("unset", []):
+                doc.pop(key, None)
+    return doc
+
+
+def diff_entry(username, project_name, current, new):
+    """Build a put entry holding only the top-level keys that changed."""
+    current = current or {}
+    changed = {k: v for k, v in new.items() if k not in current or current[k] != v}
+    removed = [k for k in current if k not in new]
+    if not changed and not removed:
+        return None
+    entry = {"op": "put", "user": username, "project": project_name, "set": changed}
+    if removed:
+        entry["unset"] = removed
+    return entry
+
+
+class Journal:
+    """Append-only log of project changes, split into numbered segments.
+
+    Every change is one JSON line appended (and fsynced) to the active
+    segment, the highest-numbered one. Readers combine the compacted
+    snapshot of a project with the entries still in the journal (the
+    "tail"). Sealed segments are folded into snapshots by compact() and
+    then removed.
+
+    Several processes may share a journal directory: appends and segment
+    changes happen under a lock file, and refresh() picks up entries other
+    processes wrote. ``on_entries`` is called with those foreign entries.
+    If another process compacts segments before this one has read them to
+    the end, those entries are gone for good; ``on_lost`` is then called so
+    whatever was built from the journal can be reloaded from the snapshots.
+    """
+
+    def __init__(self, directory, segment_max_bytes=SEGMENT_MAX_BYTES, fsync=True, on_entries=None,
+                 on_lost=None):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync = fsync
+        self.on_entries = on_entries
+        self.on_lost = on_lost
+        self.sealed = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+        self._file_lock = FileLock(os.path.join(directory, ".lock"))
+        self._compact_lock = FileLock(os.path.join(directory, ".compact.lock"))
+        self._lock = threading.Lock()
+        self._tail = {}      # (user, project) -> [(segment, json line), ...]
+        self._by_user = {}   # user -> {project, ...} with tail entries
+        self._offsets = {}   # segment -> bytes already read
+        self._complete = set()  # sealed segments read to the end
+        self._highest = None    # highest segment number seen so far
+        self._changes = 0
+        self._touched = {}   # (user, project) -> change number of last tail update
+        self._seq = 0
+        self.refresh()
+
+    def _path(self, number):
+        return os.path.join(self.directory, _segment_name(number))
+
+    def _segments(self):
+        numbers = [_segment_number(f) for f in os.listdir(self.directory)]
+        return sorted(n for n in numbers if n is not None)
+
+    def _remember(self, segment, entry, line):
+        key = (entry["user"], entry["project"])
+        # Keep the serialized line so every reader parses its own private copy.
+        self._tail.setdefault(key, []).append((segment, line))
+        self._by_user.setdefault(entry["user"], set()).add(entry["project"])
+        self._changes += 1
+        self._touched[key] = self._changes
+        self._seq = max(self._seq, entry.get("seq", 0))
+
+    def _forget_segments(self, gone):
+        # Called with the lock held, once the segments are folded and removed.
+        for number in gone:
+            self._offsets.pop(number, None)
+            self._complete.discard(number)
+        for key in list(self._tail):
+            kept = [item for item in self._tail[key] if item[0] not in gone]
+            if len(kept) == len(self._tail[key]):
+                continue
+            self._changes += 1
+            self._touched[key] = self._changes
+            if kept:
+                self._tail[key] = kept
+            else:
+                del self._tail[key]
+                self._by_user[key[0]].discard(key[1])
+
+    def refresh(self):
+        """Pick up entries and compactions from other processes."""
+        segments = self._segments()
+        present = set(segments)
+        new = []
+        with self._lock:
+            gone = {n for n in self._offsets if n not in present}
+            # Segments removed before this process read them to the end, or
+            # created and compacted between two refreshes.
+            lost = bool(gone - self._complete)
+            if self._highest is None:
+                self._highest = segments[0] - 1 if segments else 0
+            if segments:
+                lost = lost or any(n not in self._offsets for n in range(self._highest + 1, segments[0]))
+            if gone:
+                self._forget_segments(gone)
+            for number in segments:
+                offset = self._offsets.get(number, 0)
+                try:
+                    size = os.path.getsize(self._path(number))
+                    if size > offset:
+                        entries, offset = _read_segment(self._path(number), offset)
+                        for entry, line in entries:
+                            self._remember(number, entry, line)
+                            new.append(entry)
+                except FileNotFoundError:
+                    # Compacted since it was listed: whatever was not read
+                    # yet is only in the snapshots now.
+                    lost = lost or number not in self._complete
+                    continue
+                self._offsets[number] = offset
+                # Nothing is appended to a segment once a later one exists.
+                if number < segments[-1] and offset >= size:
+                    self._complete.add(number)
+            if segments:
+                self._highest = max(self._highest, segments[-1])
+        if len(segments) > 1:
+            self.sealed.set()
+        if lost and self.on_lost:
+            self.on_lost()
+        if new and self.on_entries:
+            self.on_entries(new)
+        return new
+
+    def append(self, entry):
+        """Durably append one entry to the active segment."""
+        with self._file_lock:
+            self.refresh()
+            segments = self._segments()
+            number = segments[-1] if segments else 1
+            with open(self._path(number), "ab") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size != self._offsets.get(number, 0):
+                    # A writer crashed mid-line; cut the torn bytes off.
+                    size = self._offsets.get(number, 0)
+                    f.truncate(size)
+                with self._lock:
+                    self._seq += 1
+                    entry = dict(entry, seq=self._seq)
+                line = (json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8")
+                f.write(line)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            with self._lock:
+                self._remember(number, entry, line)
+                self._offsets[number] = size + len(line)
+            if size + len(line) >= self.segment_max_bytes:
+                self._seal(number)
+        return entry
+
+    def _seal(self, active):
+        # Called with the file lock held: start the next segment.
+        open(self._path(active + 1), "ab").close()
+        with self._lock:
+            if self._offsets.get(active, 0) >= os.path.getsize(self._path(active)):
+                self._complete.add(active)
+            self._offsets[active + 1] = 0
+            self._highest = max(self._highest or 0, active + 1)
+        self.sealed.set()
+
+    def entries_for(self, username, project_name):
+        """Tail entries for one project, oldest first."""
+        with self._lock:
+            lines = [line for _, line in self._tail.get((username, project_name), [])]
+        return [json.loads(line) for line in lines]
+
+    def tail_signature(self, username, project_name):
+        """Value that changes whenever the project's tail changes."""
+        return self._touched.get((username, project_name), 0)
+
+    def projects_for(self, username):
+        """Project names of a user that have entries in the tail."""
+        with self._lock:
+            return set(self._by_user.get(username, ()))
+
+    def compact(self, fold, force=False, wait=False):
+        """Fold sealed segments into snapshots, then delete them.
+
+        ``fold`` receives {(user, project): [entry, ...]} and must persist
+        the resulting snapshots before returning. With ``force`` the active
+        segment is sealed first so the whole journal is folded. Only one
+        process compacts at a time; the others return straight away, or
+        with ``wait`` take their turn once it is done.
+        """
+        self.sealed.clear()
+        if not self._compact_lock.acquire(blocking=wait):
+            return 0
+        try:
+            with self._file_lock:
+                self.refresh()
+                segments = self._segments()
+                if force and segments and os.path.getsize(self._path(segments[-1])):
+                    self._seal(segments[-1])
+                    segments.append(segments[-1] + 1)
+                sealed = segments[:-1]
+            if not sealed:
+                return 0
+            grouped = {}
+            for number in sealed:
+                entries, _ = _read_segment(self._path(number))
+                for entry, _ in entries:
+                    grouped.setdefault((entry["user"], entry["project"]), []).append(entry)
+            fold(grouped)
+            with self._file_lock:
+                for number in sealed:
+                    os.remove(self._path(number))
+            self.refresh()
+            return len(sealed)
+        finally:
+            self._compact_lock.release()
+
+
+class Compactor(threading.Thread):
+    """Daemon thread that folds sealed journal segments in the background.
+
+    The last failure is kept in ``error`` (with ``failed_at``) until a pass
+    succeeds, so it can be shown to an admin instead of being lost.
+    """
+
+    def __init__(self, journal, fold, interval=COMPACT_INTERVAL_SECONDS):
+        super().__init__(name="journal-compactor", daemon=True)
+        self.journal = journal
+        self.fold = fold
+        self.interval = interval
+        self._stopped = threading.Event()
+        self.error = None
+        self.failed_at = None
+
+    def run(self):
+        while not self._stopped.is_set():
+            triggered = self.journal.sealed.wait(self.interval)
+            if self._stopped.is_set():
+                break
+            try:
+                # On a quiet interval fold the active segment too, so the
+                # tail that readers replay stays short.
+                self.journal.compact(self.fold, force=not triggered)
+            except Exception as e:
+                # Segments stay on disk, so the next pass simply retries.
+                self.error = e
+                self.failed_at = time.strftime("%Y-%m-%d %H:%M:%S")
+            else:
+                self.error = self.failed_at = None
+
+    def stop(self):
+        self._stopped.set()
+        self.journal.sealed.set()
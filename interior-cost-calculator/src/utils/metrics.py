@@ -0,0 +1,180 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from utils.fileio import atomic_write
+
+# Set to 1 to record timing spans; off by default.
+METRICS_ENV = "APP_METRICS"
+# Optional file the metrics are exported to after each page run; a .json
+# name gets JSON, anything else Prometheus text format.
+METRICS_FILE_ENV = "APP_METRICS_FILE"
+EXPORT_INTERVAL_SECONDS = 5.0
+# Page runs kept for the admin panel.
+RECENT_RUNS = 50
+# Page of spans recorded outside a page run (fragment reruns, scripts).
+NO_PAGE = "-"
+
+_enabled = os.environ.get(METRICS_ENV, "").lower() in ("1", "true", "yes", "on")
+_lock = threading.Lock()
+# (page, span) -> [calls, seconds], since start or the last reset().
+_totals = {}
+_page_runs = {}
+_recent = deque(maxlen=RECENT_RUNS)
+_last_export = 0.0
+# The page run of the current script thread.
+_local = threading.local()
+# Returned by span() while disabled, so a span costs one global lookup.
+_NO_SPAN = nullcontext()
+
+
+def enabled():
+    return _enabled
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+
+def _record(name, seconds):
+    run = getattr(_local, "run", None)
+    page = run["page"] if run is not None else NO_PAGE
+    with _lock:
+        entry = _totals.get((page, name))
+        if entry is None:
+            entry = _totals[(page, name)] = [0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds
+    if run is not None:
+        calls, total = run["spans"].get(name, (0, 0.0))
+        run["spans"][name] = (calls + 1, total + seconds)
+
+
+class _Span:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+def span(name):
+    """Time a block: ``with span("cost_compute"): ...``"""
+    return _Span(name) if _enabled else _NO_SPAN
+
+
+def timed(name):
+    """Decorator form of span()."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def begin_run(page):
+    """Start attributing spans on this thread to a run of ``page``.
+
+    Pages call this at the top and end_run() at the bottom. Runs cut short
+    by st.stop() or a page switch still count in the totals; they are only
+    missing from the recent runs.
+    """
+    if not _enabled:
+        _local.run = None
+        return
+    _local.run = {"page": page, "started": time.time(), "clock": time.perf_counter(), "spans": {}}
+    with _lock:
+        _page_runs[page] = _page_runs.get(page, 0) + 1
+
+
+def end_run():
+    """Finish this thread's page run and export if it is time to."""
+    run = getattr(_local, "run", None)
+    _local.run = None
+    if run is None or not _enabled:
+        return
+    finished = {
+        "page": run["page"],
+        "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run["started"])),
+        "seconds": time.perf_counter() - run["clock"],
+        "spans": {name: {"calls": calls, "seconds": seconds} for name, (calls, seconds) in run["spans"].items()},
+    }
+    with _lock:
+        _recent.append(finished)
+    _maybe_export()
+
+
+def snapshot():
+    """Totals and recent runs as plain data (the JSON export)."""
+    with _lock:
+        pages = {page: {"runs": runs, "spans": {}} for page, runs in _page_runs.items()}
+        for (page, name), (calls, seconds) in sorted(_totals.items()):
+            pages.setdefault(page, {"runs": 0, "spans": {}})["spans"][name] = {"calls": calls, "seconds": seconds}
+        recent = list(_recent)
+    return {"enabled": _enabled, "pages": pages, "recent_runs": recent}
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text():
+    """Totals in the Prometheus text exposition format."""
+    data = snapshot()["pages"]
+    lines = [
+        "# HELP app_page_runs_total Script runs per page.",
+        "# TYPE app_page_runs_total counter",
+    ]
+    lines += [f'app_page_runs_total{{page="{_label(page)}"}} {info["runs"]}' for page, info in data.items()]
+    for metric, field, help_text in (
+        ("app_span_calls_total", "calls", "Timed calls per page and span."),
+        ("app_span_seconds_total", "seconds", "Seconds spent per page and span."),
+    ):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        for page, info in data.items():
+            for name, values in info["spans"].items():
+                lines.append(f'{metric}{{page="{_label(page)}",span="{_label(name)}"}} {values[field]}')
+    return "\n".join(lines) + "\n"
+
+
+def export(path):
+    """Write the metrics to ``path`` (JSON for *.json, else Prometheus text)."""
+    text = json.dumps(snapshot(), indent=2) if path.endswith(".json") else prometheus_text()
+    with atomic_write(path) as f:
+        f.write(text)
+
+
+def _maybe_export():
+    global _last_export
+    path = os.environ.get(METRICS_FILE_ENV)
+    now = time.monotonic()
+    if not path or now - _last_export < EXPORT_INTERVAL_SECONDS:
+        return
+    _last_export = now
+    try:
+        export(path)
+    except OSError:
+        pass
+
+
+def reset():
+    """Forget every total and recent run."""
+    with _lock:
+        _totals.clear()
+        _page_runs.clear()
+        _recent.clear()
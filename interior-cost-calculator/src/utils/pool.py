@@ -0,0 +1,162 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Defaults used when st.secrets["mysql"] does not set pool_size / pool_timeout.
+POOL_SIZE = 5
+POOL_TIMEOUT_SECONDS = 10.0
+
+
+class PoolTimeout(Exception):
+    """No connection became free within the pool timeout."""
+
+
+def is_alive(conn):
+    """Cheap liveness probe for a DB-API connection."""
+    if hasattr(conn, "is_connected"):
+        # mysql.connector pings the server here.
+        return conn.is_connected()
+    try:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+        finally:
+            cursor.close()
+        return True
+    except Exception:
+        return False
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of DB-API connections.
+
+    ``connect`` is any zero-argument callable returning a new connection,
+    so a stand-in driver (e.g. sqlite3) can be plugged in for tests. At
+    most ``size`` connections exist at once; a checkout waits up to
+    ``timeout`` seconds for one to be returned, then raises PoolTimeout.
+    Idle connections are health-checked before being handed out.
+    """
+
+    def __init__(self, connect, size=POOL_SIZE, timeout=POOL_TIMEOUT_SECONDS, health_check=is_alive):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self._health_check = health_check
+        self._idle = deque()
+        self._open = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "timeouts": 0,
+            "created": 0,
+            "discarded": 0,
+        }
+
+    def _acquire(self):
+        start = time.perf_counter()
+        deadline = start + self.timeout
+        waited = False
+        with self._cond:
+            while not self._idle and self._open >= self.size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(f"No database connection free after {self.timeout}s")
+                waited = True
+                self._cond.wait(remaining)
+            conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                # Reserve the slot now; the connection is opened outside the lock.
+                self._open += 1
+            elapsed = time.perf_counter() - start
+            self._stats["checkouts"] += 1
+            if waited:
+                self._stats["waits"] += 1
+                self._stats["wait_seconds"] += elapsed
+                self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], elapsed)
+        return conn
+
+    def _release_slot(self):
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def _checkout(self):
+        conn = self._acquire()
+        if conn is not None and not self._health_check(conn):
+            self._discard(conn, release_slot=False)
+            conn = None
+        if conn is None:
+            try:
+                conn = self._connect()
+            except BaseException:
+                self._release_slot()
+                raise
+            with self._cond:
+                self._stats["created"] += 1
+        return conn
+
+    def _discard(self, conn, release_slot=True):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._stats["discarded"] += 1
+        if release_slot:
+            self._release_slot()
+
+    def _checkin(self, conn):
+        # End whatever transaction the borrower left open, even after a bare
+        # SELECT: a reused REPEATABLE READ snapshot would hide rows other
+        # connections committed since. A connection that cannot be reset
+        # is dropped.
+        try:
+            conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it is rolled back and returned afterwards.
+
+        Commit inside the block to keep changes: uncommitted work,
+        including a read-only transaction, is rolled back on return.
+        """
+        conn = self._checkout()
+        try:
+            yield conn
+        finally:
+            self._checkin(conn)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["open"] = self._open
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._open - len(self._idle)
+        stats["avg_wait_seconds"] = stats["wait_seconds"] / stats["waits"] if stats["waits"] else 0.0
+        return stats
+
+    def close(self):
+        """Close the idle connections."""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
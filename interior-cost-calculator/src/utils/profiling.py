@@ -0,0 +1,132 @@
+import cProfile
+import io
+import os
+import pstats
+import tempfile
+import threading
+import time
+from urllib.parse import quote, unquote
+
+# Set to 1 to profile every page run; admins can also turn it on for their
+# own session from the home page (the SESSION_FLAG session state key).
+PROFILE_ENV = "APP_PROFILE"
+SESSION_FLAG = "profile_slow_runs"
+# Only runs at least this slow are kept.
+THRESHOLD_ENV = "APP_PROFILE_THRESHOLD_MS"
+DEFAULT_THRESHOLD_MS = 1000
+PROFILE_DIR_ENV = "APP_PROFILE_DIR"
+PROFILE_DIR = os.path.join(tempfile.gettempdir(), "interior-cost-profiles")
+# Oldest profiles are removed beyond this many.
+MAX_PROFILES = 100
+# <time>__<page>__<user>__<project>__<ms>ms.prof, each part URL-quoted
+# with "_" escaped too, so a name holding "__" cannot shift the fields.
+_SEPARATOR = "__"
+
+_always = os.environ.get(PROFILE_ENV, "").lower() in ("1", "true", "yes", "on")
+_local = threading.local()
+
+
+def threshold_ms():
+    try:
+        return float(os.environ.get(THRESHOLD_ENV, DEFAULT_THRESHOLD_MS))
+    except ValueError:
+        return DEFAULT_THRESHOLD_MS
+
+
+def profile_dir():
+    return os.environ.get(PROFILE_DIR_ENV) or PROFILE_DIR
+
+
+def active(session_flag=False):
+    """Whether page runs are profiled (APP_PROFILE or the session's flag)."""
+    return _always or bool(session_flag)
+
+
+def begin_run(session_flag=False):
+    """Start profiling this thread's page run if profiling is on."""
+    profiler = getattr(_local, "profiler", None)
+    if profiler is not None:
+        # A run that ended in st.stop() or a page switch never got to end_run().
+        profiler.disable()
+        _local.profiler = None
+    if not (_always or session_flag):
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another run is being profiled and this Python allows only one.
+        return
+    _local.profiler = profiler
+    _local.started = time.perf_counter()
+
+
+def end_run(page, username=None, project_name=None):
+    """Stop profiling; keep the profile if the run was over the threshold.
+
+    Returns the saved file's path, or None.
+    """
+    profiler = getattr(_local, "profiler", None)
+    if profiler is None:
+        return None
+    profiler.disable()
+    _local.profiler = None
+    elapsed_ms = (time.perf_counter() - _local.started) * 1000
+    if elapsed_ms < threshold_ms():
+        return None
+    directory = profile_dir()
+    parts = [time.strftime("%Y%m%d-%H%M%S"), page, username or "-", project_name or "-"]
+    name = _SEPARATOR.join(_encode(part) for part in parts)
+    path = os.path.join(directory, f"{name}{_SEPARATOR}{elapsed_ms:.0f}ms.prof")
+    try:
+        os.makedirs(directory, exist_ok=True)
+        profiler.dump_stats(path)
+        _prune(directory)
+    except OSError:
+        return None
+    return path
+
+
+def _encode(part):
+    return quote(str(part), safe="").replace("_", "%5F")
+
+
+def _prune(directory):
+    files = sorted(f for f in os.listdir(directory) if f.endswith(".prof"))
+    for name in files[:-MAX_PROFILES]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
+
+
+def list_profiles():
+    """Saved profiles, newest first, as dicts of file, path and identifiers."""
+    directory = profile_dir()
+    try:
+        files = sorted((f for f in os.listdir(directory) if f.endswith(".prof")), reverse=True)
+    except OSError:
+        return []
+    profiles = []
+    for name in files:
+        parts = name[:-len("ms.prof")].split(_SEPARATOR)
+        if len(parts) != 5:
+            continue
+        created, page, username, project_name, ms = (unquote(part) for part in parts)
+        profiles.append({
+            "file": name,
+            "path": os.path.join(directory, name),
+            "created": created,
+            "page": page,
+            "user": username,
+            "project": project_name,
+            "ms": float(ms),
+        })
+    return profiles
+
+
+def report(path, limit=30, sort="cumulative"):
+    """The top ``limit`` functions of a saved profile, as pstats prints them."""
+    out = io.StringIO()
+    pstats.Stats(path, stream=out).strip_dirs().sort_stats(sort).print_stats(limit)
+    return out.getvalue()
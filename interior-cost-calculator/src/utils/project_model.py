@@ -0,0 +1,219 @@
+import numpy as np
+
+# Elements whose dimensions are split into named sections.
+SECTIONED_ELEMENTS = ("Bunk Bed",)
+DIMENSIONS = ("height", "length", "width", "num_shelves")
+_DIMENSION_KEYS = frozenset(DIMENSIONS)
+MATERIALS = ("shutter", "carcus", "laminate")
+_MATERIAL_KINDS = frozenset(MATERIALS)
+# Id of "no section" / "no material selected".
+NONE = -1
+
+
+class Names:
+    """Interned strings: each distinct name gets a small integer id."""
+
+    __slots__ = ("names", "_ids")
+
+    def __init__(self):
+        self.names = []
+        self._ids = {}
+
+    def intern(self, name):
+        name_id = self._ids.get(name)
+        if name_id is None:
+            name_id = self._ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def id(self, name):
+        return self._ids.get(name, NONE)
+
+    def __getitem__(self, name_id):
+        return self.names[name_id]
+
+    def __len__(self):
+        return len(self.names)
+
+
+class ElementRow:
+    """One element, or one section of a sectioned element, of a project."""
+
+    __slots__ = ("room", "element", "section", "height", "length", "width", "num_shelves", "materials", "extra")
+
+    def __init__(self, room, element, section, dims, materials):
+        self.room = room
+        self.element = element
+        self.section = section
+        self.height = dims.get("height", 0)
+        self.length = dims.get("length", 0)
+        self.width = dims.get("width", 0)
+        self.num_shelves = dims.get("num_shelves", 0)
+        # One material id per entry of MATERIALS, NONE when not selected.
+        self.materials = materials
+        # Keys of the dimensions entry the model doesn't interpret (e.g. a note).
+        self.extra = {key: value for key, value in dims.items() if key not in _DIMENSION_KEYS}
+
+    def dims(self):
+        return {"length": self.length, "width": self.width, "height": self.height, "num_shelves": self.num_shelves}
+
+    def entry(self):
+        """The row's entry under "rooms": its dimensions and any extra keys."""
+        return {**self.dims(), **self.extra}
+
+
+class ProjectModel:
+    """Typed, normalized form of a project document.
+
+    Rooms, elements and sections are interned to integer ids, every
+    element (or Bunk Bed section) is an ElementRow, and each distinct
+    material selection is stored once in ``materials`` and referenced by
+    index. from_dict()/to_dict() convert to and from the JSON document the
+    store keeps; keys the model does not interpret are carried through.
+    """
+
+    def __init__(self):
+        self.rooms = Names()
+        self.elements = Names()
+        self.sections = Names()
+        self.rows = []
+        self.materials = []
+        self._material_ids = {}
+        # Element ids per room id, in document order; a sectioned element
+        # without sections has no rows but still belongs here.
+        self.layout = {}
+        self.fields = {}
+        self._field_order = []
+        # element_materials entries that match no row, or extra material kinds.
+        self._unmatched_materials = {}
+
+    @staticmethod
+    def key(room, element, section=None):
+        """The "room|element[|section]" key used by element_materials."""
+        return f"{room}|{element}|{section}" if section is not None else f"{room}|{element}"
+
+    def _material_id(self, material):
+        if not material:
+            return NONE
+        signature = tuple(material.items())
+        try:
+            material_id = self._material_ids.get(signature)
+        except TypeError:
+            # Unhashable values; keep the selection but don't share it.
+            material_id = None
+            signature = None
+        if material_id is None:
+            material_id = len(self.materials)
+            self.materials.append(dict(material))
+            if signature is not None:
+                self._material_ids[signature] = material_id
+        return material_id
+
+    def _add_row(self, room_id, element_id, section_id, dims, selection):
+        material_id = self._material_id
+        materials = (
+            material_id(selection.get("shutter")),
+            material_id(selection.get("carcus")),
+            material_id(selection.get("laminate")),
+        )
+        self.rows.append(ElementRow(room_id, element_id, section_id, dims, materials))
+
+    @classmethod
+    def from_dict(cls, project_data):
+        model = cls()
+        model._field_order = list(project_data)
+        model.fields = {k: v for k, v in project_data.items() if k not in ("rooms", "element_materials")}
+        selections = dict(project_data.get("element_materials", {}))
+        for room, elements in project_data.get("rooms", {}).items():
+            room_id = model.rooms.intern(room)
+            layout = model.layout[room_id] = []
+            for el_name, el in elements.items():
+                element_id = model.elements.intern(el_name)
+                layout.append(element_id)
+                if el_name in SECTIONED_ELEMENTS and isinstance(el, dict):
+                    for section_name, section in el.items():
+                        key = cls.key(room, el_name, section_name)
+                        model._add_row(room_id, element_id, model.sections.intern(section_name), section,
+                                       model._take_selection(selections, key))
+                else:
+                    key = cls.key(room, el_name)
+                    model._add_row(room_id, element_id, NONE, el, model._take_selection(selections, key))
+        for key, selection in selections.items():
+            model._unmatched_materials[key] = selection
+        return model
+
+    def _take_selection(self, selections, key):
+        selection = selections.pop(key, None)
+        if selection is None:
+            return {}
+        if selection.keys() <= _MATERIAL_KINDS and selection:
+            return selection
+        extra = {mat: value for mat, value in selection.items() if mat not in _MATERIAL_KINDS}
+        if extra or not any(selection.get(mat) for mat in MATERIALS):
+            # Kinds the model doesn't know, or an empty entry, go back out as they were.
+            self._unmatched_materials[key] = extra
+        return selection
+
+    def row_key(self, row):
+        section = self.sections[row.section] if row.section != NONE else None
+        return self.key(self.rooms[row.room], self.elements[row.element], section)
+
+    def row_label(self, row):
+        """Element name shown in tables, e.g. "Bunk Bed - Bunk bed Upper"."""
+        if row.section == NONE:
+            return self.elements[row.element]
+        return f"{self.elements[row.element]} - {self.sections[row.section]}"
+
+    def selection(self, row):
+        """The row's materials as an element_materials entry."""
+        return {
+            mat: dict(self.materials[material_id])
+            for mat, material_id in zip(MATERIALS, row.materials)
+            if material_id != NONE
+        }
+
+    def columns(self):
+        """Column view: one NumPy array per field, aligned with ``rows``.
+
+        Material columns hold ids into ``materials`` with NONE (-1) for no
+        selection, so ``values[ids]`` on an array with one extra trailing
+        default looks up a per-material value for every row at once.
+        """
+        rows = self.rows
+        columns = {
+            "room": np.array([row.room for row in rows], dtype=np.int32),
+            "element": np.array([row.element for row in rows], dtype=np.int32),
+            "section": np.array([row.section for row in rows], dtype=np.int32),
+        }
+        for field in DIMENSIONS:
+            columns[field] = np.array([getattr(row, field) for row in rows])
+        for i, mat in enumerate(MATERIALS):
+            columns[mat] = np.array([row.materials[i] for row in rows], dtype=np.int32)
+        return columns
+
+    def material_values(self, field, default=0):
+        """``field`` of every distinct material, plus ``default`` for NONE."""
+        return [material.get(field, default) for material in self.materials] + [default]
+
+    def to_dict(self):
+        built = {}
+        element_materials = {}
+        for row in self.rows:
+            if row.section == NONE:
+                built[(row.room, row.element)] = row.entry()
+            else:
+                built.setdefault((row.room, row.element), {})[self.sections[row.section]] = row.entry()
+            selection = self.selection(row)
+            if selection:
+                element_materials[self.row_key(row)] = selection
+        for key, extra in self._unmatched_materials.items():
+            element_materials.setdefault(key, {}).update(extra)
+        values = dict(self.fields)
+        values["rooms"] = {
+            self.rooms[room_id]: {self.elements[e]: built.get((room_id, e), {}) for e in element_ids}
+            for room_id, element_ids in self.layout.items()
+        }
+        if element_materials or "element_materials" in self._field_order:
+            values["element_materials"] = element_materials
+        order = self._field_order + [key for key in values if key not in self._field_order]
+        return {key: values[key] for key in order if key in values}
@@ -0,0 +1,528 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote, unquote
+from uuid import uuid4
+from utils.journal import Journal, Compactor, apply_entries, diff_entry
+from utils.cache import ProjectCache
+from utils.index import ProjectIndex, index_entry
+from utils.filelock import FileLock
+from utils.fileio import atomic_write
+from utils.metrics import timed
+
+STORE_DIR = os.path.abspath(
+                    os.path.join(
+                        os.path.dirname(__file__),
+                        "..", "..", "..", "json dumps"
+                    )
+                )
+# Legacy single-file store, only read to seed a new store.
+DATA_PATH = os.path.join(STORE_DIR, "data.json")
+# One file per project, sharded by username: projects/<user>/<project>.json
+PROJECTS_DIR = os.path.join(STORE_DIR, "projects")
+SQLITE_PATH = os.path.join(STORE_DIR, "projects.sqlite3")
+# Dot-prefixed names cannot collide with _safe_name() output.
+MANIFEST_FILE = ".manifest.json"
+MANIFEST_VERSION = 1
+# Saves are appended here and folded into the project files in the background.
+JOURNAL_DIR = ".journal"
+# Per-user index of project name -> location/dates, stored in each shard.
+INDEX_FILE = ".index.json"
+# Held across processes while a save or delete is committed.
+LOCK_FILE = ".lock"
+
+# Environment variables selecting the backend ("json" or "sqlite") and its path.
+STORE_BACKEND_ENV = "PROJECT_STORE"
+STORE_PATH_ENV = "PROJECT_STORE_PATH"
+
+
+def _load_json(path=DATA_PATH):
+    """Read the legacy single-file store (json dumps/data.json)."""
+    if not os.path.exists(path):
+        return {"projects": []}
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except Exception:
+            data = {"projects": []}
+    if "projects" not in data:
+        # migrate old format to new
+        data = {"projects": [data]}
+    return data
+
+
+def _legacy_projects(path):
+    for p in _load_json(path).get("projects", []):
+        if p.get("username") is not None and p.get("project_name") is not None:
+            yield p
+
+
+def _version(project_data):
+    return int(project_data.get("version", 0)) if project_data else 0
+
+
+def _prepare_project(username, project_name, project_data):
+    # Ensure project_id exists
+    if "project_id" not in project_data:
+        project_data["project_id"] = str(uuid4())
+    # Add username and project_name for filtering
+    project_data["username"] = username
+    project_data["project_name"] = project_name
+
+
+def _safe_name(name):
+    """Encode a username/project name so it is a single safe path component."""
+    encoded = quote(str(name), safe="")
+    if encoded.startswith("."):
+        encoded = "%2E" + encoded[1:]
+    return encoded
+
+
+@timed("json_read")
+def _read_json_file(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+@timed("json_write")
+def _write_json_file(path, data):
+    with atomic_write(path, fsync=True) as f:
+        json.dump(data, f, separators=(",", ":"))
+
+
+def _file_stamp(path):
+    try:
+        info = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (info.st_mtime_ns, info.st_size)
+
+
+class ProjectStore:
+    """Interface every project storage backend implements.
+
+    Projects are JSON-compatible dicts addressed by (username, project_name).
+    """
+
+    def save_project(self, username, project_name, project_data):
+        """Save a project, checking its version (compare-and-swap).
+
+        ``project_data["version"]`` must match the stored version (missing
+        counts as 0); on success it is bumped and True is returned. If the
+        project changed since it was loaded, nothing is written and False
+        is returned.
+        """
+        raise NotImplementedError
+
+    def load_project(self, username, project_name):
+        raise NotImplementedError
+
+    def list_projects(self, username):
+        """[(project_name, created_at, last_modified), ...] for a user."""
+        raise NotImplementedError
+
+    def delete_project(self, username, project_name):
+        """Delete a project; returns False if it did not exist."""
+        raise NotImplementedError
+
+    def iter_projects(self):
+        """Yield (username, project_name, project_data) for every project.
+
+        Projects are read one at a time, so the whole store is never in
+        memory at once.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class JsonProjectStore(ProjectStore):
+    """Per-project JSON files sharded by user, written through a journal.
+
+    Saves are appended to the journal and folded into the project files by
+    a background compactor. Reads go through a process-wide cache and a
+    per-user index, so no operation touches other users' data.
+
+    Several server processes can share one store: files are replaced
+    atomically, a lock file is held only while a save or delete commits,
+    and each process replays the journal entries the others wrote.
+    """
+
+    def __init__(self, root=PROJECTS_DIR, legacy_path=DATA_PATH):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST_FILE)
+        os.makedirs(root, exist_ok=True)
+        self._lock = FileLock(os.path.join(root, LOCK_FILE))
+        # Parsed projects shared by every session in this process.
+        self._cache = ProjectCache()
+        with self._lock:
+            if not os.path.exists(self.manifest_path):
+                self._split_legacy(legacy_path)
+            for username in self._load_manifest()["users"]:
+                index_path = os.path.join(self._user_dir(username), INDEX_FILE)
+                if not os.path.exists(index_path):
+                    _write_json_file(index_path, self._scan_user_index(username))
+        self._index = ProjectIndex(self._load_user_index, self._project_location)
+        self._journal = Journal(os.path.join(root, JOURNAL_DIR), on_entries=self._on_foreign_entries,
+                                on_lost=self._on_lost_entries)
+        self._compactor = Compactor(self._journal, self._fold_into_snapshots)
+        self._compactor.start()
+
+    def _split_legacy(self, legacy_path):
+        """Create the sharded layout, splitting the legacy data.json."""
+        manifest = {"version": MANIFEST_VERSION, "users": {}}
+        for p in _legacy_projects(legacy_path):
+            user_dir = self._user_dir(p["username"])
+            os.makedirs(user_dir, exist_ok=True)
+            manifest["users"][p["username"]] = os.path.basename(user_dir)
+            _write_json_file(self._project_path(p["username"], p["project_name"]), p)
+        _write_json_file(self.manifest_path, manifest)
+
+    def _user_dir(self, username):
+        return os.path.join(self.root, _safe_name(username))
+
+    def _project_location(self, username, project_name):
+        return f"{_safe_name(username)}/{_safe_name(project_name)}.json"
+
+    def _project_path(self, username, project_name):
+        return os.path.join(self.root, self._project_location(username, project_name))
+
+    def _load_manifest(self):
+        manifest = _read_json_file(self.manifest_path)
+        if not manifest:
+            manifest = {"version": MANIFEST_VERSION, "users": {}}
+        return manifest
+
+    def _register_user_shard(self, username):
+        """Create the user's shard directory and record it in the manifest."""
+        user_dir = self._user_dir(username)
+        if os.path.isdir(user_dir):
+            return user_dir
+        os.makedirs(user_dir, exist_ok=True)
+        manifest = self._load_manifest()
+        manifest["users"][username] = os.path.basename(user_dir)
+        _write_json_file(self.manifest_path, manifest)
+        return user_dir
+
+    def _scan_user_index(self, username):
+        """Rebuild a user's index from the project files in their shard."""
+        projects = {}
+        user_dir = self._user_dir(username)
+        if not os.path.isdir(user_dir):
+            return projects
+        for file in sorted(os.listdir(user_dir)):
+            if file.startswith(".") or not file.endswith(".json"):
+                continue
+            p = _read_json_file(os.path.join(user_dir, file))
+            if not p:
+                continue
+            project_name = p.get("project_name", unquote(file[:-len(".json")]))
+            entry = {"op": "put", "user": username, "project": project_name, "set": p}
+            index_entry(projects, entry, self._project_location(username, project_name))
+        return projects
+
+    def _read_user_index(self, username):
+        """The persisted index of a user's compacted projects."""
+        projects = _read_json_file(os.path.join(self._user_dir(username), INDEX_FILE))
+        if projects is None:
+            projects = self._scan_user_index(username)
+        return projects
+
+    def _load_user_index(self, username):
+        # Persisted index plus whatever is still waiting in the journal. The
+        # tail is copied first, as in _current_project().
+        tail = sorted((
+            entry
+            for project_name in self._journal.projects_for(username)
+            for entry in self._journal.entries_for(username, project_name)
+        ), key=lambda entry: entry.get("seq", 0))
+        projects = self._read_user_index(username)
+        for entry in tail:
+            index_entry(projects, entry, self._project_location(username, entry["project"]))
+        return projects
+
+    def _on_foreign_entries(self, entries):
+        # Saves and deletes committed by other processes.
+        for entry in entries:
+            self._index.apply(entry)
+
+    def _on_lost_entries(self):
+        # Another process compacted entries this one never read; the
+        # snapshots and persisted indexes now hold them, so reload from disk.
+        self._index.forget()
+        self._cache.clear()
+
+    def _fold_into_snapshots(self, grouped):
+        """Apply compacted journal entries to the project files and indexes."""
+        by_user = {}
+        for (username, project_name), entries in grouped.items():
+            by_user.setdefault(username, []).extend(entries)
+            path = self._project_path(username, project_name)
+            doc = apply_entries(_read_json_file(path), entries)
+            if doc is None:
+                if os.path.exists(path):
+                    os.remove(path)
+                continue
+            with self._lock:
+                self._register_user_shard(username)
+            _write_json_file(path, doc)
+        for username, entries in by_user.items():
+            projects = self._read_user_index(username)
+            for entry in entries:
+                index_entry(projects, entry, self._project_location(username, entry["project"]))
+            with self._lock:
+                self._register_user_shard(username)
+            _write_json_file(os.path.join(self._user_dir(username), INDEX_FILE), projects)
+
+    def _current_project(self, username, project_name):
+        # Take the stamp and copy the tail before reading the snapshot: if a
+        # compaction lands in between, replaying already-folded entries is
+        # harmless and the changed stamp makes the next lookup a miss.
+        path = self._project_path(username, project_name)
+        stamp = (_file_stamp(path), self._journal.tail_signature(username, project_name))
+
+        def load():
+            tail = self._journal.entries_for(username, project_name)
+            return apply_entries(_read_json_file(path), tail)
+
+        return self._cache.get(username, project_name, stamp, load)
+
+    def cache_stats(self):
+        """Hit/miss counters of the in-process project cache."""
+        return self._cache.stats()
+
+    def compaction_error(self):
+        """(time, error) of the last failed background compaction, or None."""
+        error = self._compactor.error
+        return (self._compactor.failed_at, error) if error is not None else None
+
+    def compact(self):
+        """Fold the whole journal into the project files right away.
+
+        Waits for a compaction already running in another process or in
+        the background, so every save made before the call is in the files.
+        """
+        return self._journal.compact(self._fold_into_snapshots, force=True, wait=True)
+
+    def save_project(self, username, project_name, project_data):
+        _prepare_project(username, project_name, project_data)
+        with self._lock:
+            self._journal.refresh()
+            current = self._current_project(username, project_name)
+            if current is not None and _version(project_data) != _version(current):
+                return False
+            self._register_user_shard(username)
+            project_data["version"] = _version(current) + 1
+            # Only the top-level keys that changed are written to the journal.
+            entry = diff_entry(username, project_name, current, project_data)
+            if entry:
+                self._index.apply(self._journal.append(entry))
+            self._cache.invalidate(username, project_name)
+        return True
+
+    def load_project(self, username, project_name):
+        self._journal.refresh()
+        if self._index.location(username, project_name) is None:
+            return None
+        return self._current_project(username, project_name)
+
+    def list_projects(self, username):
+        self._journal.refresh()
+        return [
+            (project_name, meta.get("created_at", ""), meta.get("last_modified", ""))
+            for project_name, meta in self._index.projects(username)
+        ]
+
+    def delete_project(self, username, project_name):
+        with self._lock:
+            self._journal.refresh()
+            if self._index.location(username, project_name) is None:
+                return False
+            entry = {"op": "delete", "user": username, "project": project_name}
+            self._index.apply(self._journal.append(entry))
+            self._cache.invalidate(username, project_name)
+        return True
+
+    def iter_projects(self):
+        self._journal.refresh()
+        users = set(self._load_manifest()["users"])
+        for username in sorted(users):
+            for project_name, _ in self._index.projects(username):
+                project_data = self._current_project(username, project_name)
+                if project_data is not None:
+                    yield username, project_name, project_data
+
+    def close(self):
+        self._compactor.stop()
+
+
+class SQLiteProjectStore(ProjectStore):
+    """Projects as rows of an embedded SQLite database in WAL mode.
+
+    WAL lets readers run alongside a writer, every save is one transaction,
+    and (username, project_name) is the primary key so lookups are indexed.
+    The version check of save_project() runs inside the write transaction.
+    """
+
+    def __init__(self, path=SQLITE_PATH, legacy_path=DATA_PATH, timeout=30.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        conn = self._connection()
+        with self._transaction(conn):
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS projects ("
+                " username TEXT NOT NULL,"
+                " project_name TEXT NOT NULL,"
+                " created_at TEXT NOT NULL DEFAULT '',"
+                " last_modified TEXT NOT NULL DEFAULT '',"
+                " data TEXT NOT NULL,"
+                " version INTEGER NOT NULL DEFAULT 0,"
+                " PRIMARY KEY (username, project_name))"
+            )
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(projects)")]
+            if "version" not in columns:
+                conn.execute("ALTER TABLE projects ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            if conn.execute("SELECT COUNT(*) FROM projects").fetchone()[0] == 0:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO projects VALUES (?, ?, ?, ?, ?, ?)",
+                    [self._row(p["username"], p["project_name"], p) for p in _legacy_projects(legacy_path)]
+                )
+
+    def _connection(self):
+        # sqlite3 connections must stay on the thread that created them.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # Autocommit mode: transactions are opened explicitly below.
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    @contextmanager
+    def _transaction(conn):
+        # IMMEDIATE takes the write lock up front, so read-check-write is atomic.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _row(username, project_name, project_data):
+        return (
+            username,
+            project_name,
+            str(project_data.get("created_at", "")),
+            str(project_data.get("last_modified", "")),
+            json.dumps(project_data, separators=(",", ":")),
+            _version(project_data),
+        )
+
+    def save_project(self, username, project_name, project_data):
+        _prepare_project(username, project_name, project_data)
+        conn = self._connection()
+        with self._transaction(conn):
+            row = conn.execute(
+                "SELECT version FROM projects WHERE username=? AND project_name=?",
+                (username, project_name)
+            ).fetchone()
+            if row is not None and _version(project_data) != row[0]:
+                return False
+            saved = dict(project_data, version=(row[0] if row else 0) + 1)
+            conn.execute(
+                "INSERT INTO projects (username, project_name, created_at, last_modified, data, version)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (username, project_name) DO UPDATE SET"
+                " created_at=excluded.created_at, last_modified=excluded.last_modified,"
+                " data=excluded.data, version=excluded.version",
+                self._row(username, project_name, saved)
+            )
+        project_data["version"] = saved["version"]
+        return True
+
+    def load_project(self, username, project_name):
+        row = self._connection().execute(
+            "SELECT data FROM projects WHERE username=? AND project_name=?",
+            (username, project_name)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def list_projects(self, username):
+        return self._connection().execute(
+            "SELECT project_name, created_at, last_modified FROM projects WHERE username=? ORDER BY rowid",
+            (username,)
+        ).fetchall()
+
+    def delete_project(self, username, project_name):
+        conn = self._connection()
+        with self._transaction(conn):
+            cursor = conn.execute(
+                "DELETE FROM projects WHERE username=? AND project_name=?",
+                (username, project_name)
+            )
+        return cursor.rowcount > 0
+
+    def iter_projects(self):
+        # A separate connection, so callers can save while iterating.
+        conn = sqlite3.connect(self.path, timeout=self.timeout)
+        try:
+            cursor = conn.execute("SELECT username, project_name, data FROM projects ORDER BY username, rowid")
+            for username, project_name, data in cursor:
+                yield username, project_name, json.loads(data)
+        finally:
+            conn.close()
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+BACKENDS = {
+    "json": JsonProjectStore,
+    "sqlite": SQLiteProjectStore,
+}
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def open_store(backend=None, path=None):
+    """Create a store; defaults come from PROJECT_STORE / PROJECT_STORE_PATH."""
+    backend = (backend or os.environ.get(STORE_BACKEND_ENV) or "json").lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown project store backend: {backend}")
+    path = path or os.environ.get(STORE_PATH_ENV)
+    return BACKENDS[backend](path) if path else BACKENDS[backend]()
+
+
+def get_store():
+    """The process-wide project store, opened on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = open_store()
+    return _store
+
+
+def set_store(store):
+    """Replace the process-wide store (e.g. to point at another backend)."""
+    global _store
+    with _store_lock:
+        previous, _store = _store, store
+    if previous is not None and previous is not store:
+        previous.close()
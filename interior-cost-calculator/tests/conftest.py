@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The app runs from src/ (streamlit run main.py), so its modules import as
+# top-level packages: utils, data, quoting.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
@@ -0,0 +1,75 @@
+"""A SQLite connection that accepts the MySQL the migration scripts send.
+
+Only the few MySQL-isms migrate.py uses are translated. The tables match
+the MySQL schema: Projects is unique on (user_id, project_name) and
+Materials has no unique key.
+"""
+import re
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS Users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE, password_hash TEXT);
+CREATE TABLE IF NOT EXISTS Projects (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INT, project_name TEXT,
+                                     created_at TEXT, last_modified TEXT, UNIQUE(user_id, project_name));
+CREATE TABLE IF NOT EXISTS Rooms (id INTEGER PRIMARY KEY AUTOINCREMENT, project_id INT, room_name TEXT);
+CREATE TABLE IF NOT EXISTS Elements (id INTEGER PRIMARY KEY AUTOINCREMENT, room_id INT, element_name TEXT,
+                                     height REAL, length REAL, width REAL, num_shelves INT);
+CREATE TABLE IF NOT EXISTS Materials (id INTEGER PRIMARY KEY AUTOINCREMENT, element_id INT, material_type TEXT,
+                                      type TEXT, brand TEXT, model TEXT, grade TEXT, thickness TEXT, rate REAL);
+"""
+
+
+def translate(sql):
+    sql = sql.replace("%s", "?").replace("NOW()", "CURRENT_TIMESTAMP").replace("INSERT IGNORE", "INSERT OR IGNORE")
+    # Only Projects is upserted.
+    return sql.replace("ON DUPLICATE KEY UPDATE", "ON CONFLICT(user_id, project_name) DO UPDATE SET")
+
+
+class Cursor:
+    def __init__(self, db):
+        self._cursor = db.cursor()
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(translate(sql), tuple(params))
+
+    def executemany(self, sql, rows):
+        self._cursor.executemany(translate(sql), [tuple(row) for row in rows])
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+
+class Connection:
+    """DB-API connection to a SQLite file (or memory) with the MySQL schema."""
+
+    def __init__(self, path=":memory:"):
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def cursor(self):
+        return Cursor(self.db)
+
+    def commit(self):
+        self.db.commit()
+
+    def rollback(self):
+        self.db.rollback()
+
+    def close(self):
+        self.db.close()
+
+    def query(self, sql, params=()):
+        return self.db.execute(sql, params).fetchall()
+
+    def count(self, table):
+        return self.query(f"SELECT COUNT(*) FROM {table}")[0][0]
+
+    def add_user(self, username):
+        self.db.execute("INSERT INTO Users (username, password_hash) VALUES (?, 'x')", (username,))
+        self.db.commit()
@@ -0,0 +1,71 @@
+import numpy as np
+from utils.cost_engine import IncrementalCosts, compute, element_table, row_inputs
+from utils.project_model import ProjectModel
+
+PROJECT = {
+    "rooms": {
+        "Kitchen": {"Wardrobe": {"height": 7, "length": 6, "width": 2, "num_shelves": 3}, "Loft": {"height": 2, "length": 4, "width": 2}},
+        "Bed 1": {"Bunk Bed": {"Upper": {"height": 3.5, "length": 6.25, "width": 1, "num_shelves": 1},
+                               "Lower": {"height": 2, "length": 6.25, "width": 1}}},
+    },
+    "element_materials": {
+        "Kitchen|Wardrobe": {"shutter": {"type": "Plywood", "rate": 75.5}, "carcus": {"rate": 60}, "laminate": {"rate": 32}},
+        "Bed 1|Bunk Bed|Upper": {"carcus": {"rate": 40}},
+    },
+}
+
+
+def rows(project):
+    for room, elements in project["rooms"].items():
+        for name, el in elements.items():
+            if name == "Bunk Bed":
+                for section, dims in el.items():
+                    yield f"{room}|{name}|{section}", dims
+            else:
+                yield f"{room}|{name}", el
+
+
+def fill(memo, project):
+    memo.retain(key for key, _ in rows(project))
+    for key, dims in rows(project):
+        memo.set_row(key, row_inputs(dims, project["element_materials"].get(key, {})))
+    return memo.flush()
+
+
+def assert_matches_engine(memo, project):
+    expected = compute(element_table(ProjectModel.from_dict(project)))
+    for name, values in expected.items():
+        assert np.allclose(memo.result[name], values)
+        if name in memo.totals:
+            assert np.isclose(memo.totals[name], values.sum())
+
+
+def test_memo_matches_a_full_compute():
+    memo = IncrementalCosts()
+    fill(memo, PROJECT)
+    assert memo.recomputed == 4
+    assert_matches_engine(memo, PROJECT)
+
+
+def test_only_changed_rows_are_repriced():
+    memo = IncrementalCosts()
+    fill(memo, PROJECT)
+    version = memo.version
+    fill(memo, PROJECT)
+    assert memo.recomputed == 0 and memo.version == version
+    changed = dict(PROJECT, element_materials=dict(PROJECT["element_materials"], **{"Kitchen|Loft": {"shutter": {"rate": 90}}}))
+    fill(memo, changed)
+    assert memo.recomputed == 1 and memo.version > version
+    assert_matches_engine(memo, changed)
+    assert np.isclose(memo.total("material_cost", ["Kitchen|Wardrobe", "Kitchen|Loft"]), memo.result["material_cost"][:2].sum())
+
+
+def test_removed_and_added_elements_keep_totals_right():
+    memo = IncrementalCosts()
+    fill(memo, PROJECT)
+    rooms = {"Bed 1": PROJECT["rooms"]["Bed 1"], "Hall": {"TV Unit": {"height": 3, "length": 5, "width": 1}}}
+    smaller = dict(PROJECT, rooms=rooms)
+    fill(memo, smaller)
+    assert memo.recomputed == 1
+    assert memo.keys == ["Bed 1|Bunk Bed|Upper", "Bed 1|Bunk Bed|Lower", "Hall|TV Unit"]
+    assert_matches_engine(memo, smaller)
@@ -0,0 +1,109 @@
+import pytest
+from utils.cutlist import NO_MATERIAL, SHEET_MM, element_panels, pack, plan_project, sku
+
+PLY = {"type": "Plywood", "grade": "BWR", "brand": "Century", "model": "Sainik", "thickness": "18mm", "rate": 95}
+MDF = {"type": "MDF", "grade": "-", "brand": "Action", "model": "-", "thickness": "12mm", "rate": 50}
+
+PROJECT = {
+    "rooms": {
+        "Kitchen": {"Wardrobe": {"height": 7, "length": 6, "width": 2, "num_shelves": 3}, "Loft": {"height": 2, "length": 4, "width": 2}},
+        "Bed 1": {"Bunk Bed": {"Upper": {"height": 3.5, "length": 6.25, "width": 1, "num_shelves": 1},
+                               "Lower": {"height": 2, "length": 6.25, "width": 1}}},
+    },
+    "element_materials": {
+        "Kitchen|Wardrobe": {"shutter": PLY, "carcus": MDF},
+        "Bed 1|Bunk Bed|Upper": {"shutter": MDF, "carcus": MDF},
+    },
+}
+
+
+def overlaps(a, b):
+    _, ax, ay, aw, ah = a
+    _, bx, by, bw, bh = b
+    return ax < bx + bw and bx < ax + aw and ay < by + bh and by < ay + ah
+
+
+def assert_valid(layouts, sheet=SHEET_MM):
+    for placements in layouts:
+        for _, x, y, w, h in placements:
+            assert x >= 0 and y >= 0
+            assert x + w <= sheet[0] and y + h <= sheet[1]
+        for i, a in enumerate(placements):
+            for b in placements[i + 1:]:
+                assert not overlaps(a, b)
+
+
+def test_pack_places_every_panel_inside_a_sheet_without_overlap():
+    panels = [(f"P{i}", 300 + 97 * i % 1500, 200 + 61 * i % 900) for i in range(40)]
+    layouts = pack(panels)
+    assert_valid(layouts)
+    placed = sorted(label for placements in layouts for label, *_ in placements)
+    assert placed == sorted(label for label, _, _ in panels)
+
+
+def test_pack_rotates_and_keeps_sizes():
+    layouts = pack([("Tall", 600, 2400)])
+    assert len(layouts) == 1
+    (label, x, y, w, h), = layouts[0]
+    assert (label, x, y) == ("Tall", 0, 0)
+    assert sorted((w, h)) == [600, 2400]
+
+
+def test_pack_with_kerf_leaves_gaps():
+    layouts = pack([("A", 1220, 600), ("B", 1220, 600)], kerf=4)
+    assert_valid(layouts)
+    assert sum(len(placements) for placements in layouts) == 2
+
+
+def test_oversize_panel_is_split_into_pieces_that_fit():
+    layouts = pack([("Wall", 5000, 3000)])
+    pieces = [placement for placements in layouts for placement in placements]
+    assert len(pieces) == 9
+    assert {label for label, *_ in pieces} == {f"Wall ({n}/9)" for n in range(1, 10)}
+    assert_valid(layouts)
+
+
+def test_element_panels_skip_parts_without_area():
+    panels = element_panels(7, 6, 0, 2)
+    assert [part for part, *_ in panels] == ["Shutter", "Back"]
+    assert len(element_panels(7, 6, 2, 3)) == 9
+
+
+def test_sku_labels():
+    assert sku(None) == (NO_MATERIAL, "")
+    assert sku(PLY) == ("Plywood BWR Century Sainik", "18mm")
+    assert sku(MDF) == ("MDF Action", "12mm")
+
+
+def test_plan_groups_panels_by_material():
+    plan = plan_project(PROJECT)
+    groups = {(group["material"], group["thickness"]): group for group in plan["groups"]}
+    assert set(groups) == {("MDF Action", "12mm"), ("Plywood BWR Century Sainik", "18mm"), (NO_MATERIAL, "")}
+    # Only the wardrobe shutter is plywood.
+    assert groups[("Plywood BWR Century Sainik", "18mm")]["panels"] == 1
+    # Wardrobe carcus (8 panels) and the upper bunk (shutter + 6 carcus).
+    assert groups[("MDF Action", "12mm")]["panels"] == 15
+    assert plan["sheets"] == sum(group["sheets"] for group in plan["groups"])
+    for group in plan["groups"]:
+        assert_valid(group["layouts"])
+        assert group["sheets"] == len(group["layouts"])
+        assert 0 <= group["waste_pct"] < 100
+
+
+def test_plan_without_materials_is_one_group():
+    plan = plan_project(PROJECT, by_material=False)
+    assert [(group["material"], group["thickness"]) for group in plan["groups"]] == [(NO_MATERIAL, "")]
+    assert plan["groups"][0]["panels"] == sum(group["panels"] for group in plan_project(PROJECT)["groups"])
+
+
+def test_element_sheets_add_up_to_sheets():
+    for by_material in (True, False):
+        plan = plan_project(PROJECT, by_material=by_material)
+        assert len(plan["element_sheets"]) == 4
+        assert all(share > 0 for share in plan["element_sheets"])
+        assert sum(plan["element_sheets"]) == pytest.approx(plan["sheets"])
+
+
+def test_empty_project():
+    plan = plan_project({"rooms": {}})
+    assert plan == {"groups": [], "sheets": 0, "waste_pct": 0.0, "element_sheets": []}
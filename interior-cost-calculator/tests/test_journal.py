@@ -0,0 +1,93 @@
+import os
+import pytest
+from utils.journal import Journal, apply_entries, diff_entry
+
+
+def put(project, **fields):
+    return {"op": "put", "user": "u", "project": project, "set": fields}
+
+
+def segment_files(journal):
+    return sorted(f for f in os.listdir(journal.directory) if f.startswith("segment-"))
+
+
+def test_append_assigns_sequence_and_keeps_tail(tmp_path):
+    journal = Journal(str(tmp_path), fsync=False)
+    first = journal.append(put("p", a=1))
+    second = journal.append(put("p", b=2))
+    assert second["seq"] == first["seq"] + 1
+    assert [e["set"] for e in journal.entries_for("u", "p")] == [{"a": 1}, {"b": 2}]
+    assert journal.projects_for("u") == {"p"}
+
+
+def test_refresh_picks_up_other_writers_entries(tmp_path):
+    seen = []
+    reader = Journal(str(tmp_path), fsync=False, on_entries=seen.extend)
+    writer = Journal(str(tmp_path), fsync=False)
+    writer.append(put("p", a=1))
+    assert reader.entries_for("u", "p") == []
+    assert [e["set"] for e in reader.refresh()] == [{"a": 1}]
+    assert [e["project"] for e in seen] == ["p"]
+    assert reader.refresh() == []
+    # The reader's next sequence number continues after the writer's.
+    assert reader.append(put("p", b=2))["seq"] == 2
+
+
+def test_compact_folds_sealed_segments_and_removes_them(tmp_path):
+    journal = Journal(str(tmp_path), segment_max_bytes=1, fsync=False)
+    journal.append(put("p", a=1))
+    journal.append(put("p", b=2))
+    journal.append({"op": "delete", "user": "u", "project": "q"})
+    folded = {}
+    assert journal.compact(folded.update) == 3
+    assert [e["op"] for e in folded[("u", "p")]] == ["put", "put"]
+    assert ("u", "q") in folded
+    assert journal.entries_for("u", "p") == []
+    assert journal.projects_for("u") == set()
+    assert len(segment_files(journal)) == 1
+
+
+def test_compact_force_folds_the_active_segment(tmp_path):
+    journal = Journal(str(tmp_path), fsync=False)
+    journal.append(put("p", a=1))
+    folded = {}
+    assert journal.compact(folded.update) == 0
+    assert journal.compact(folded.update, force=True) == 1
+    assert apply_entries(None, folded[("u", "p")]) == {"a": 1}
+    assert journal.entries_for("u", "p") == []
+
+
+def test_failed_fold_keeps_segments(tmp_path):
+    journal = Journal(str(tmp_path), fsync=False)
+    journal.append(put("p", a=1))
+
+    def fold(grouped):
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        journal.compact(fold, force=True)
+    assert [e["set"] for e in Journal(str(tmp_path)).entries_for("u", "p")] == [{"a": 1}]
+
+
+def test_torn_line_is_ignored_and_cut_off_by_the_next_append(tmp_path):
+    journal = Journal(str(tmp_path), fsync=False)
+    journal.append(put("p", a=1))
+    path = os.path.join(journal.directory, segment_files(journal)[-1])
+    # A writer that crashed halfway through a line.
+    with open(path, "ab") as f:
+        f.write(b'{"op":"put","user":"u","project":"p","set":{"b"')
+    reader = Journal(str(tmp_path), fsync=False)
+    assert [e["set"] for e in reader.entries_for("u", "p")] == [{"a": 1}]
+    reader.append(put("p", c=3))
+    assert [e["set"] for e in Journal(str(tmp_path)).entries_for("u", "p")] == [{"a": 1}, {"c": 3}]
+    with open(path, "rb") as f:
+        assert all(line.endswith(b"}\n") for line in f)
+
+
+def test_diff_entry_and_replay():
+    current = {"a": 1, "b": 2}
+    assert diff_entry("u", "p", current, dict(current)) is None
+    entry = diff_entry("u", "p", current, {"a": 1, "c": 3})
+    assert entry["set"] == {"c": 3} and entry["unset"] == ["b"]
+    assert apply_entries(current, [entry]) == {"a": 1, "c": 3}
+    assert apply_entries(current, [entry, {"op": "delete"}]) is None
@@ -0,0 +1,176 @@
+import json
+
+import pytest
+from migrate import iter_project_files, migrate_element_materials_only, migrate_projects, project_rows
+from mysql_standin import Connection
+from utils.storage import JsonProjectStore
+
+SHUTTER = {"type": "Plywood", "brand": "Century", "model": "Sainik", "grade": "BWR", "thickness": "18mm", "rate": 95}
+CARCUS = {"type": "MDF", "brand": "Action", "model": "-", "grade": "-", "thickness": "12mm", "rate": 50}
+LAMINATE = {"type": "Standard", "thickness": "0.8mm (Avg Price)", "rate": 32}
+
+
+def make_project(rooms=2):
+    """A project with a wardrobe in every room and a bunk bed in the first."""
+    data = {"rooms": {}, "element_materials": {}}
+    for n in range(rooms):
+        room = f"Room {n}"
+        data["rooms"][room] = {"Wardrobe": {"height": 7, "length": 6, "width": 2, "num_shelves": 3}}
+        data["element_materials"][f"{room}|Wardrobe"] = {"shutter": SHUTTER, "carcus": CARCUS, "laminate": LAMINATE}
+    data["rooms"]["Room 0"]["Bunk Bed"] = {
+        "Upper": {"height": 3.5, "length": 6.25, "width": 1, "num_shelves": 1},
+        "Lower": {"height": 2, "length": 6.25, "width": 1},
+    }
+    data["element_materials"]["Room 0|Bunk Bed|Upper"] = {"carcus": CARCUS}
+    return data
+
+
+@pytest.fixture
+def conn():
+    conn = Connection()
+    conn.add_user("alice")
+    conn.add_user("bob")
+    yield conn
+    conn.close()
+
+
+def counts(conn):
+    return {table: conn.count(table) for table in ("Projects", "Rooms", "Elements", "Materials")}
+
+
+def test_project_rows():
+    rooms, elements, materials = project_rows(make_project(2))
+    assert rooms == ["Room 0", "Room 1"]
+    assert [element[:2] for element in elements] == [
+        ("Room 0", "Wardrobe"), ("Room 0", "Bunk Bed - Upper"), ("Room 0", "Bunk Bed - Lower"), ("Room 1", "Wardrobe"),
+    ]
+    assert elements[2] == ("Room 0", "Bunk Bed - Lower", 2, 6.25, 1, 0)
+    assert len(materials) == 7
+    assert materials[0] == ("Room 0", "Wardrobe", "shutter", "Century", "Sainik", "BWR", "18mm", 95)
+    assert ("Room 0", "Bunk Bed - Upper", "carcus", "Action", "-", "-", "12mm", 50) in materials
+
+
+def projects():
+    return [("alice", f"P{n}", make_project(n + 1)) for n in range(4)] + [("bob", "Flat", make_project(3))]
+
+
+def expected_counts():
+    rows = [project_rows(data) for _, _, data in projects()]
+    return {
+        "Projects": len(rows),
+        "Rooms": sum(len(rooms) for rooms, _, _ in rows),
+        "Elements": sum(len(elements) for _, elements, _ in rows),
+        "Materials": sum(len(materials) for _, _, materials in rows),
+    }
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 50])
+def test_migrate_projects_in_batches(conn, batch_size):
+    assert migrate_projects(projects(), conn, batch_size=batch_size) == 5
+    assert counts(conn) == expected_counts()
+    # Every material hangs off an element of the right project.
+    rows = conn.query(
+        "SELECT u.username, p.project_name, r.room_name, e.element_name, m.material_type, m.rate "
+        "FROM Materials m JOIN Elements e ON m.element_id = e.id JOIN Rooms r ON e.room_id = r.id "
+        "JOIN Projects p ON r.project_id = p.id JOIN Users u ON p.user_id = u.id"
+    )
+    assert ("bob", "Flat", "Room 2", "Wardrobe", "laminate", 32) in rows
+    assert ("alice", "P0", "Room 0", "Bunk Bed - Upper", "carcus", 50) in rows
+
+
+def test_rerun_is_idempotent(conn):
+    migrate_projects(projects(), conn, batch_size=2)
+    before = counts(conn)
+    project_ids = conn.query("SELECT id, user_id, project_name FROM Projects ORDER BY id")
+    assert migrate_projects(projects(), conn, batch_size=3) == 5
+    assert counts(conn) == before
+    assert conn.query("SELECT id, user_id, project_name FROM Projects ORDER BY id") == project_ids
+
+
+def test_rerun_replaces_changed_project(conn):
+    migrate_projects(projects(), conn)
+    changed = make_project(1)
+    changed["element_materials"]["Room 0|Wardrobe"]["shutter"] = dict(SHUTTER, rate=120)
+    migrate_projects([("bob", "Flat", changed)], conn)
+    assert conn.query(
+        "SELECT COUNT(*) FROM Rooms r JOIN Projects p ON r.project_id = p.id WHERE p.project_name = 'Flat'"
+    ) == [(1,)]
+    assert conn.query("SELECT COUNT(*) FROM Materials WHERE rate = 120") == [(1,)]
+    # The other projects are untouched.
+    assert conn.count("Projects") == 5
+
+
+def test_last_copy_wins_and_unknown_users_are_skipped(conn, capsys):
+    batch = [("alice", "P0", make_project(3)), ("carol", "Lost", make_project(1)), ("alice", "P0", make_project(1))]
+    assert migrate_projects(batch, conn) == 1
+    assert "User carol not found" in capsys.readouterr().out
+    assert counts(conn)["Rooms"] == 1
+    assert conn.query("SELECT project_name FROM Projects") == [("P0",)]
+
+
+def test_failing_batch_is_rolled_back(conn):
+    migrate_projects(projects()[:1], conn)
+    before = counts(conn)
+    broken = make_project(1)
+    broken["rooms"]["Room 0"]["Wardrobe"] = None
+    with pytest.raises(AttributeError):
+        migrate_projects([("alice", "P0", make_project(2)), ("bob", "Broken", broken)], conn)
+    assert counts(conn) == before
+
+
+def write_project(tmp_path, data):
+    path = tmp_path / "project.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return str(path)
+
+
+def test_materials_resync_replaces_rows(conn, tmp_path):
+    migrate_projects(projects(), conn)
+    before = counts(conn)
+    data = make_project(4)
+    data["element_materials"]["Room 1|Wardrobe"]["shutter"] = dict(SHUTTER, rate=120)
+    data["element_materials"]["Room 0|Bunk Bed|Upper"]["laminate"] = LAMINATE
+    path = write_project(tmp_path, data)
+    for _ in range(2):
+        assert migrate_element_materials_only("alice", "P3", path, conn) is True
+    # One new row (the bunk laminate), no duplicates after two re-syncs.
+    assert counts(conn) == dict(before, Materials=before["Materials"] + 1)
+    assert conn.query(
+        "SELECT element_id, material_type, COUNT(*) FROM Materials GROUP BY element_id, material_type HAVING COUNT(*) > 1"
+    ) == []
+    assert conn.query("SELECT type, rate FROM Materials WHERE rate = 120") == [("Plywood", 120)]
+
+
+def test_materials_resync_reports_missing_rows(conn, tmp_path):
+    migrate_projects(projects(), conn)
+    before = counts(conn)
+    data = make_project(1)
+    data["element_materials"]["Attic|Shelf"] = {"carcus": CARCUS}
+    data["element_materials"]["Room 0|Wardrobe"]["carcus"] = dict(CARCUS, rate=77)
+    path = write_project(tmp_path, data)
+    assert migrate_element_materials_only("alice", "P0", path, conn) is False
+    # The elements that were found are still re-synced.
+    assert conn.query("SELECT COUNT(*) FROM Materials WHERE rate = 77") == [(1,)]
+    assert counts(conn) == before
+    assert migrate_element_materials_only("alice", "Missing", path, conn) is False
+    assert migrate_element_materials_only("carol", "P0", path, conn) is False
+
+
+def test_iter_project_files_of_a_live_store(tmp_path):
+    root = str(tmp_path / "projects")
+    store = JsonProjectStore(root, legacy_path=str(tmp_path / "missing.json"))
+    try:
+        store.save_project("a b", "Living / Hall", make_project(1))
+        store.save_project("a b", ".hidden 100%", make_project(2))
+        store.save_project("bob", "Gone", make_project(1))
+        store.delete_project("bob", "Gone")
+        data = store.load_project("a b", "Living / Hall")
+        data["rooms"]["Extra"] = {}
+        assert store.save_project("a b", "Living / Hall", data)
+    finally:
+        store.close()
+    # Nothing above was compacted; listing the files folds the journal first.
+    files = list(iter_project_files(root))
+    assert [(username, project_name) for username, project_name, _ in files] == [("a b", ".hidden 100%"), ("a b", "Living / Hall")]
+    with open(files[1][2], "r", encoding="utf-8") as f:
+        assert "Extra" in json.load(f)["rooms"]
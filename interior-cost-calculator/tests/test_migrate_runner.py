@@ -0,0 +1,96 @@
+import json
+from functools import partial
+
+import pytest
+import migrate_runner
+from migrate_runner import append_checkpoint, load_checkpoint, run, save_checkpoint
+from mysql_standin import Connection
+from test_migrate import make_project
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "db.sqlite3")
+    conn = Connection(path)
+    conn.add_user("alice")
+    conn.add_user("bob")
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = tmp_path / "projects"
+    for username, count in (("alice", 3), ("bob", 2), ("carol", 1)):
+        (root / username).mkdir(parents=True)
+        for n in range(count):
+            (root / username / f"P{n}.json").write_text(json.dumps(make_project(n + 1)), encoding="utf-8")
+    return root
+
+
+def migrate(root, db_path, **kwargs):
+    return run(str(root), workers=2, connect=partial(Connection, db_path), **kwargs)
+
+
+def count(db_path, table):
+    conn = Connection(db_path)
+    try:
+        return conn.count(table)
+    finally:
+        conn.close()
+
+
+def test_checkpoint_log_round_trip(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    save_checkpoint(path, {"a.json": "1", "b.json": "2"})
+    with open(path, "a", encoding="utf-8") as log:
+        append_checkpoint(log, [("a.json", None), ("c.json", "3"), ("b.json", "4")])
+        # A run killed halfway through a write.
+        log.write('{"path": "d.json", "sha')
+    assert load_checkpoint(path) == {"b.json": "4", "c.json": "3"}
+
+
+def test_checkpoint_of_another_version_is_ignored(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    path.write_text(json.dumps({"version": 1, "files": {"a.json": "1"}}), encoding="utf-8")
+    assert load_checkpoint(str(path)) == {}
+    assert load_checkpoint(str(tmp_path / "missing.jsonl")) == {}
+
+
+def test_run_skips_unchanged_files(root, db_path):
+    report = migrate(root, db_path)
+    assert (report["files"], report["migrated"], report["skipped"], report["failed"]) == (6, 5, 0, 1)
+    assert report["errors"] == [(str(root / "carol" / "P0.json"), "user not found in DB")]
+    assert count(db_path, "Projects") == 5
+
+    (root / "bob" / "P1.json").write_text(json.dumps(make_project(4)), encoding="utf-8")
+    report = migrate(root, db_path)
+    # The changed file and carol's, which never made it into the checkpoint.
+    assert (report["migrated"], report["skipped"], report["failed"]) == (1, 4, 1)
+    assert count(db_path, "Projects") == 5
+
+    report = migrate(root, db_path, force=True)
+    assert (report["migrated"], report["skipped"]) == (5, 0)
+
+
+def test_run_resumes_from_interrupted_checkpoint(root, db_path, monkeypatch):
+    real_append = migrate_runner.append_checkpoint
+
+    def append_then_stop(log, records):
+        # Killed right after the first user's results were logged.
+        real_append(log, records)
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(migrate_runner, "append_checkpoint", append_then_stop)
+    with pytest.raises(KeyboardInterrupt):
+        run(str(root), workers=1, connect=partial(Connection, db_path))
+    checkpoint = migrate_runner.default_checkpoint(str(root), "full")
+    assert sorted(load_checkpoint(checkpoint)) == [str(root / "alice" / f"P{n}.json") for n in range(3)]
+
+    monkeypatch.setattr(migrate_runner, "append_checkpoint", real_append)
+    report = migrate(root, db_path)
+    assert (report["migrated"], report["skipped"], report["failed"]) == (2, 3, 1)
+    assert count(db_path, "Projects") == 5
+    with open(checkpoint, "r", encoding="utf-8") as f:
+        assert json.loads(f.readline())["completed"] is None
+    assert len(load_checkpoint(checkpoint)) == 5
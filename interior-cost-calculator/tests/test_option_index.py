@@ -0,0 +1,115 @@
+import math
+
+import pandas as pd
+import pytest
+from data import material_costs
+from data.option_index import LEVELS, NO_OPTION, PRICE_COLUMN, OptionIndex
+
+TABLES = {
+    "Plywood": {
+        "Grade": ["BWR", "BWR", "BWR", "MR", "MR", None],
+        "Brand": ["Century", "Century", "Greenply", "Century", None, "Century"],
+        "Model": ["Sainik", "Sainik", "Club", "Club", "Plain", "Sainik"],
+        "Thickness": ["18mm", "12mm", "18mm", "18mm", "6mm", "18mm"],
+        PRICE_COLUMN: [95.0, 80.0, 110.0, 70.0, 30.0, 999.0],
+    },
+    "MDF": {
+        "Grade": ["", "", ""],
+        "Brand": ["Action", "Action", "Merino"],
+        "Model": [float("nan"), float("nan"), "Pre-lam"],
+        "Thickness": ["18mm", "12mm", "18mm"],
+        PRICE_COLUMN: [60.0, 50.0, 75.0],
+    },
+}
+
+
+def pandas_selection(df, mat_type, picks):
+    """The filtering the material page did before the option index.
+
+    ``picks`` chooses an option at each level (by position); returns the
+    option list shown at every level, the stored choices and the price.
+    """
+    shown, chosen = [], []
+    filtered = df
+    for depth, level in enumerate(LEVELS):
+        values = filtered[level].dropna().unique().tolist()
+        if depth == 0 and mat_type == "MDF" and len(values) == 1 and (values[0] == "" or pd.isna(values[0])):
+            values = []
+        shown.append(values)
+        value = values[picks[depth] % len(values)] if values else NO_OPTION
+        chosen.append(value)
+        filtered = filtered[filtered[level] == value] if value != NO_OPTION else filtered
+    if not filtered.empty and PRICE_COLUMN in filtered.columns:
+        price = float(filtered.iloc[0][PRICE_COLUMN])
+    else:
+        price = None
+    return shown, chosen, price
+
+
+def index_selection(index, mat_type, picks):
+    shown, chosen = [], []
+    for depth in range(len(LEVELS)):
+        values = list(index.options(mat_type, *chosen))
+        shown.append(values)
+        chosen.append(values[picks[depth] % len(values)] if values else NO_OPTION)
+    return shown, chosen, index.price(mat_type, *chosen)
+
+
+def all_picks(depth=len(LEVELS), width=3):
+    if depth == 0:
+        yield ()
+        return
+    for rest in all_picks(depth - 1, width):
+        for pick in range(width):
+            yield rest + (pick,)
+
+
+def assert_same(expected, actual):
+    (exp_shown, exp_chosen, exp_price), (shown, chosen, price) = expected, actual
+    assert shown == exp_shown
+    assert chosen == exp_chosen
+    assert price == exp_price or (price is None and exp_price is None)
+
+
+@pytest.mark.parametrize("mat_type", list(TABLES))
+def test_matches_pandas_filtering(mat_type):
+    index = OptionIndex(TABLES)
+    df = pd.DataFrame(TABLES[mat_type])
+    for picks in all_picks():
+        assert_same(pandas_selection(df, mat_type, picks), index_selection(index, mat_type, picks))
+
+
+def test_missing_values_are_not_options():
+    index = OptionIndex(TABLES)
+    assert index.options("Plywood") == ("BWR", "MR")
+    assert index.options("Plywood", "MR") == ("Century",)
+    # Every MDF row has an empty grade, so the grade level is skipped.
+    assert index.options("MDF") == ()
+    assert index.options("MDF", NO_OPTION, "Action") == ()
+    assert index.price("MDF", NO_OPTION, "Action", NO_OPTION, "12mm") == 50.0
+
+
+def test_first_row_wins_on_duplicate_selection():
+    tables = {"Plywood": {level: ["x", "x"] for level in LEVELS}}
+    tables["Plywood"][PRICE_COLUMN] = [10, 20]
+    assert OptionIndex(tables).price("Plywood", "x", "x", "x", "x") == 10.0
+
+
+def test_table_without_levels_offers_nothing():
+    index = OptionIndex({"Plywood": {"Grade": ["BWR"], PRICE_COLUMN: [1.0]}})
+    assert index.options("Plywood") == ()
+    assert index.price("Plywood", "BWR", NO_OPTION, NO_OPTION, NO_OPTION) is None
+
+
+def test_workbook_matches_pandas_filtering(tmp_path, monkeypatch):
+    monkeypatch.setattr(material_costs, "cache_path", str(tmp_path / "cache.pkl"))
+    cache = material_costs._load_compiled()
+    catalog = material_costs.MaterialCatalog(cache["sheets"], cache["sha256"])
+    for mat_type, df in catalog.type_map.items():
+        for picks in all_picks(width=4):
+            expected = pandas_selection(df, mat_type, picks)
+            actual = index_selection(catalog.option_index, mat_type, picks)
+            if expected[2] is not None and math.isnan(expected[2]):
+                assert actual[2] is not None and math.isnan(actual[2])
+                expected, actual = expected[:2] + (None,), actual[:2] + (None,)
+            assert_same(expected, actual)
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+from data import material_costs
+from utils import storage
+from utils.storage import SQLiteProjectStore
+
+PAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "pages")
+PROJECT = {
+    "house_type": "Villa",
+    "num_bedrooms": 1,
+    "rooms": {
+        "Master Bedroom": {"Wardrobe": {"length": 4.0, "width": 2.0, "height": 7.0, "num_shelves": 3}},
+        "Kitchen": {"Loft": {"length": 8.0, "width": 2.0, "height": 2.0, "num_shelves": 1}},
+    },
+}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(material_costs, "cache_path", str(tmp_path / "cache.pkl"))
+    store = SQLiteProjectStore(str(tmp_path / "projects.sqlite3"), legacy_path=str(tmp_path / "missing.json"))
+    storage.set_store(store)
+    store.save_project("u", "p", dict(PROJECT))
+    yield store
+    storage.set_store(None)
+
+
+def open_page(name):
+    at = AppTest.from_file(os.path.join(PAGES, name), default_timeout=60)
+    at.session_state["username"] = "u"
+    at.session_state["project"] = "p"
+    return at.run()
+
+
+def click(at, label):
+    next(button for button in at.button if button.label == label).click().run()
+    assert not at.exception
+
+
+def save_elsewhere(store):
+    other = store.load_project("u", "p")
+    other["rooms"]["Kitchen"]["Loft"]["length"] = 9.5
+    other["element_materials"] = {"Kitchen|Loft": {"shutter": {"type": "MDF", "rate": 1}}}
+    assert store.save_project("u", "p", other)
+    return other["version"]
+
+
+@pytest.mark.parametrize("page, save", [
+    ("01_ProjectInput.py", "Calculate & Save"),
+    ("02_MaterialSelection.py", "Save Materials"),
+])
+def test_save_does_not_overwrite_another_session(store, page, save):
+    at = open_page(page)
+    click(at, save)
+    click(at, save)
+    assert not at.error
+    version = save_elsewhere(store)
+
+    click(at, save)
+    assert "changed in another session" in at.error[0].value
+    assert store.load_project("u", "p")["version"] == version
+
+    # The page now shows the other session's data, and saving it works.
+    click(at, save)
+    assert not at.error
+    saved = store.load_project("u", "p")
+    assert saved["version"] == version + 1
+    assert saved["rooms"]["Kitchen"]["Loft"]["length"] == 9.5
+    assert saved["element_materials"]["Kitchen|Loft"]["shutter"]["type"] == "MDF"
@@ -0,0 +1,70 @@
+import sqlite3
+import pytest
+from utils.pool import ConnectionPool, PoolTimeout
+
+
+class Connection:
+    """sqlite3 connection that records rollbacks and can fail them."""
+
+    def __init__(self, fail_rollback=False):
+        self.conn = sqlite3.connect(":memory:")
+        self.fail_rollback = fail_rollback
+        self.rollbacks = 0
+        self.closed = False
+
+    def cursor(self):
+        return self.conn.cursor()
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.rollbacks += 1
+        if self.fail_rollback:
+            raise sqlite3.OperationalError("connection lost")
+        self.conn.rollback()
+
+    def close(self):
+        self.closed = True
+        self.conn.close()
+
+
+def test_read_only_borrow_is_rolled_back_before_reuse():
+    pool = ConnectionPool(Connection, size=1)
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.close()
+    assert conn.rollbacks == 1
+    with pool.connection() as again:
+        assert again is conn
+    assert pool.stats()["created"] == 1
+
+
+def test_connection_that_cannot_be_reset_is_discarded():
+    pool = ConnectionPool(lambda: Connection(fail_rollback=True), size=1)
+    with pool.connection() as conn:
+        pass
+    assert conn.closed
+    stats = pool.stats()
+    assert stats["discarded"] == 1 and stats["open"] == 0 and stats["idle"] == 0
+    with pool.connection() as fresh:
+        assert fresh is not conn
+
+
+def test_error_rolls_back_and_returns_the_connection():
+    pool = ConnectionPool(Connection, size=1)
+    with pytest.raises(ValueError):
+        with pool.connection() as conn:
+            raise ValueError("boom")
+    assert conn.rollbacks == 1
+    assert pool.stats()["idle"] == 1
+
+
+def test_checkout_times_out_when_pool_is_exhausted():
+    pool = ConnectionPool(Connection, size=1, timeout=0.05)
+    with pool.connection():
+        with pytest.raises(PoolTimeout):
+            with pool.connection():
+                pass
+    assert pool.stats()["timeouts"] == 1
@@ -0,0 +1,21 @@
+from utils import profiling
+
+
+def test_names_with_underscores_survive_the_file_name(tmp_path, monkeypatch):
+    monkeypatch.setenv(profiling.PROFILE_DIR_ENV, str(tmp_path))
+    monkeypatch.setenv(profiling.THRESHOLD_ENV, "0")
+    profiling.begin_run(session_flag=True)
+    path = profiling.end_run("Material Selection", "site__admin", "flat_2__wing_b/x")
+    assert path is not None
+    [profile] = profiling.list_profiles()
+    assert profile["path"] == path
+    assert (profile["page"], profile["user"], profile["project"]) == ("Material Selection", "site__admin", "flat_2__wing_b/x")
+    assert "Material" in profile["file"] and profile["ms"] >= 0
+
+
+def test_runs_under_the_threshold_are_not_kept(tmp_path, monkeypatch):
+    monkeypatch.setenv(profiling.PROFILE_DIR_ENV, str(tmp_path))
+    monkeypatch.setenv(profiling.THRESHOLD_ENV, "60000")
+    profiling.begin_run(session_flag=True)
+    assert profiling.end_run("Summary", "u", "p") is None
+    assert profiling.list_profiles() == []
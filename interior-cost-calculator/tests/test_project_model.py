@@ -0,0 +1,62 @@
+import copy
+
+from utils.project_model import NONE, ProjectModel
+
+PROJECT = {
+    "project_name": "Flat",
+    "house_type": "Villa",
+    "rooms": {
+        "Kitchen": {
+            "Wardrobe": {"length": 6, "width": 2, "height": 7, "num_shelves": 3, "note": "mirror door", "area": 42},
+            "Loft": {"length": 4, "width": 2, "height": 2, "num_shelves": 0},
+        },
+        "Bed 1": {
+            "Bunk Bed": {
+                "Upper": {"length": 6.25, "width": 1, "height": 3.5, "num_shelves": 1, "note": "ladder"},
+                "Lower": {"length": 6.25, "width": 1, "height": 2, "num_shelves": 0},
+            },
+            "Loft": {"length": 4, "width": 2, "height": 2, "num_shelves": 0},
+        },
+        "Dining": {},
+    },
+    "element_materials": {
+        "Kitchen|Wardrobe": {"shutter": {"type": "Plywood", "rate": 75.5}, "carcus": {"type": "MDF", "rate": 60}},
+        "Bed 1|Bunk Bed|Upper": {"carcus": {"type": "MDF", "rate": 60}, "handles": {"rate": 5}},
+        "Attic|Shelf": {"carcus": {"rate": 40}},
+    },
+    "version": 3,
+}
+
+
+def test_round_trip_keeps_the_document():
+    assert ProjectModel.from_dict(copy.deepcopy(PROJECT)).to_dict() == PROJECT
+
+
+def test_extra_dimension_keys_are_carried_through():
+    model = ProjectModel.from_dict(PROJECT)
+    wardrobe = model.rows[0]
+    assert wardrobe.extra == {"note": "mirror door", "area": 42}
+    assert wardrobe.dims() == {"length": 6, "width": 2, "height": 7, "num_shelves": 3}
+    rooms = model.to_dict()["rooms"]
+    assert rooms["Kitchen"]["Wardrobe"]["note"] == "mirror door"
+    assert rooms["Bed 1"]["Bunk Bed"]["Upper"]["note"] == "ladder"
+    assert "note" not in rooms["Kitchen"]["Loft"]
+
+
+def test_names_are_interned():
+    model = ProjectModel.from_dict(PROJECT)
+    assert model.rooms.names == ["Kitchen", "Bed 1", "Dining"]
+    # "Loft" appears in two rooms but is stored once.
+    assert model.elements.names == ["Wardrobe", "Loft", "Bunk Bed"]
+    assert [model.row_key(row) for row in model.rows] == [
+        "Kitchen|Wardrobe", "Kitchen|Loft", "Bed 1|Bunk Bed|Upper", "Bed 1|Bunk Bed|Lower", "Bed 1|Loft",
+    ]
+    assert [model.row_label(row) for row in model.rows][2] == "Bunk Bed - Upper"
+    assert model.rows[0].section == NONE
+
+
+def test_identical_materials_are_stored_once():
+    model = ProjectModel.from_dict(PROJECT)
+    assert model.rows[0].materials[1] == model.rows[2].materials[1]
+    assert len(model.materials) == 2
+    assert model.selection(model.rows[1]) == {}
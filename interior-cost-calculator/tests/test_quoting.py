@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+import os
+
+import pytest
+from quoting import ELEMENT_COLUMNS, quote, quote_rows
+from quoting.__main__ import TOTAL_COLUMNS, main
+
+SAMPLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "json dumps", "data.json")
+
+
+@pytest.fixture(scope="module")
+def sample():
+    """The saved sample project (the one with a project_name) from the JSON dump."""
+    with open(SAMPLE_PATH, "r", encoding="utf-8") as f:
+        projects = json.load(f)["projects"]
+    return next(p for p in projects if p.get("project_name"))
+
+
+@pytest.fixture
+def sample_file(sample, tmp_path):
+    path = tmp_path / "sample.json"
+    path.write_text(json.dumps(sample), encoding="utf-8")
+    return str(path)
+
+
+def test_quote_matches_summary_totals(sample):
+    totals = quote(sample)["totals"]
+    assert totals["total_area"] == pytest.approx(2542)
+    assert totals["material_cost"] == pytest.approx(444762.3)
+    assert totals["with_factory"] == pytest.approx(599462.3)
+    assert totals["with_carpenter"] == pytest.approx(totals["material_cost"] + totals["carpenter"])
+
+
+def test_quote_rows_follow_element_columns(sample):
+    result = quote(sample)
+    rows = quote_rows(result)
+    assert rows and all(len(row) == len(ELEMENT_COLUMNS) for row in rows)
+    material_cost = ELEMENT_COLUMNS.index("Material Cost (₹)")
+    assert sum(row[material_cost] for row in rows) == pytest.approx(result["totals"]["material_cost"])
+
+
+def test_cli_csv_totals(sample, sample_file, capsys):
+    assert main([sample_file, "--totals"]) == 0
+    rows = list(csv.reader(io.StringIO(capsys.readouterr().out)))
+    assert rows[0] == ["Project"] + TOTAL_COLUMNS
+    assert len(rows) == 2
+    assert rows[1][0] == sample["project_name"]
+    totals = dict(zip(TOTAL_COLUMNS, map(float, rows[1][1:])))
+    assert totals["with_factory"] == pytest.approx(599462.3)
+
+
+def test_cli_csv_elements(sample_file, capsys):
+    assert main([sample_file, "--format", "csv"]) == 0
+    rows = list(csv.reader(io.StringIO(capsys.readouterr().out)))
+    assert rows[0] == ["Project"] + ELEMENT_COLUMNS
+    assert len(rows) > 1 and all(len(row) == len(rows[0]) for row in rows)
+
+
+def test_cli_json(sample, sample_file, capsys):
+    assert main([sample_file, "--format", "json"]) == 0
+    (result,) = json.loads(capsys.readouterr().out)
+    assert result["project"] == sample["project_name"]
+    assert set(result["elements"]) == set(ELEMENT_COLUMNS)
+    assert result["totals"]["total_area"] == pytest.approx(2542)
+
+
+def test_cli_json_totals_to_file(sample_file, tmp_path):
+    out = tmp_path / "totals.json"
+    assert main([sample_file, sample_file, "--format", "json", "--totals", "-o", str(out)]) == 0
+    results = json.loads(out.read_text(encoding="utf-8"))
+    assert len(results) == 2
+    assert all(set(result) == {"project", "totals"} for result in results)
+
+
+def test_cli_json_with_no_projects(tmp_path, capsys):
+    path = tmp_path / "empty.json"
+    path.write_text("[]", encoding="utf-8")
+    assert main([str(path), "--format", "json"]) == 0
+    assert json.loads(capsys.readouterr().out) == []
+
+
+def test_cli_skips_bad_projects(sample, tmp_path, capsys):
+    path = tmp_path / "mixed.json"
+    bad = dict(sample, project_name="Broken", rooms={"Hall": {"TV Unit": {"height": None, "length": "x"}}})
+    path.write_text(json.dumps([bad, sample]), encoding="utf-8")
+    assert main([str(path), "--totals"]) == 1
+    captured = capsys.readouterr()
+    rows = list(csv.reader(io.StringIO(captured.out)))
+    assert [row[0] for row in rows[1:]] == [sample["project_name"]]
+    assert "Broken" in captured.err
@@ -0,0 +1,105 @@
+import pytest
+from utils.storage import JsonProjectStore, SQLiteProjectStore
+
+
+@pytest.fixture
+def open_json_store(tmp_path):
+    stores = []
+
+    def open_store():
+        store = JsonProjectStore(str(tmp_path / "projects"), legacy_path=str(tmp_path / "missing.json"))
+        stores.append(store)
+        return store
+
+    yield open_store
+    for store in stores:
+        store.close()
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def store(request, tmp_path):
+    missing = str(tmp_path / "missing.json")
+    if request.param == "sqlite":
+        store = SQLiteProjectStore(str(tmp_path / "projects.sqlite3"), legacy_path=missing)
+    else:
+        store = JsonProjectStore(str(tmp_path / "projects"), legacy_path=missing)
+    yield store
+    store.close()
+
+
+def test_save_load_list_delete(store):
+    assert store.save_project("u", "a b/c", {"rooms": {"Kitchen": {}}, "created_at": "2024-01-01"})
+    assert store.save_project("u", "second", {"rooms": {}})
+    loaded = store.load_project("u", "a b/c")
+    assert loaded["rooms"] == {"Kitchen": {}} and loaded["username"] == "u" and loaded["version"] == 1
+    assert [name for name, _, _ in store.list_projects("u")] == ["a b/c", "second"]
+    assert store.list_projects("other") == []
+    assert store.delete_project("u", "second")
+    assert not store.delete_project("u", "second")
+    assert store.load_project("u", "second") is None
+    assert [(u, p) for u, p, _ in store.iter_projects()] == [("u", "a b/c")]
+
+
+def test_save_is_compare_and_swap_on_version(store):
+    assert store.save_project("u", "p", {"rooms": {}})
+    first, second = store.load_project("u", "p"), store.load_project("u", "p")
+    first["rooms"] = {"Hall": {}}
+    assert store.save_project("u", "p", first)
+    assert first["version"] == 2
+    # Loaded before the other save, so it is stale and must not overwrite it.
+    second["rooms"] = {"Bedroom": {}}
+    assert not store.save_project("u", "p", second)
+    assert store.load_project("u", "p")["rooms"] == {"Hall": {}}
+    assert store.save_project("u", "p", store.load_project("u", "p"))
+    assert store.load_project("u", "p")["version"] == 3
+
+
+def test_json_store_survives_compaction_and_reopen(open_json_store):
+    store = open_json_store()
+    store.save_project("u", "p", {"rooms": {"Hall": {}}})
+    store.save_project("u", "q", {"rooms": {}})
+    store.delete_project("u", "q")
+    store.compact()
+    reopened = open_json_store()
+    assert reopened.load_project("u", "p")["rooms"] == {"Hall": {}}
+    assert [name for name, _, _ in reopened.list_projects("u")] == ["p"]
+    assert reopened.load_project("u", "q") is None
+
+
+def test_version_check_spans_instances(open_json_store):
+    a, b = open_json_store(), open_json_store()
+    a.save_project("u", "p", {"rooms": {}})
+    from_a, from_b = a.load_project("u", "p"), b.load_project("u", "p")
+    assert b.save_project("u", "p", from_b)
+    assert not a.save_project("u", "p", from_a)
+    assert a.load_project("u", "p")["version"] == 2
+
+
+def test_other_instance_sees_save_compacted_before_it_read_it(open_json_store):
+    a, b = open_json_store(), open_json_store()
+    assert b.list_projects("u") == []
+    a.save_project("u", "X", {"rooms": {}})
+    a.compact()
+    assert [name for name, _, _ in b.list_projects("u")] == ["X"]
+    assert b.load_project("u", "X")["project_name"] == "X"
+
+
+def test_other_instance_sees_delete_compacted_before_it_read_it(open_json_store):
+    a, b = open_json_store(), open_json_store()
+    a.save_project("u", "X", {"rooms": {}})
+    assert [name for name, _, _ in b.list_projects("u")] == ["X"]
+    a.delete_project("u", "X")
+    a.compact()
+    assert b.list_projects("u") == []
+    assert b.load_project("u", "X") is None
+    assert b.delete_project("u", "X") is False
+
+
+def test_other_instance_sees_segments_created_and_compacted_between_reads(open_json_store):
+    a, b = open_json_store(), open_json_store()
+    assert b.list_projects("u") == []
+    a._journal.segment_max_bytes = 1
+    for i in range(4):
+        a.save_project("u", f"P{i}", {"rooms": {}})
+    a.compact()
+    assert sorted(name for name, _, _ in b.list_projects("u")) == ["P0", "P1", "P2", "P3"]